@@ -0,0 +1,245 @@
+"""
+Quiz list, detail and submit at high concurrency: sync views behind a
+threaded WSGI handler vs. the native async views behind the ASGI handler.
+
+    python -m benchmarks.async_views --requests 2000 --concurrency 200 --threads 16 --db-latency 5
+
+Both sides run in-process against the same seeded test database, so only
+the request handling model differs. ``--db-latency`` adds a sleep to every
+query to stand in for a database across the network; with a local SQLite
+file there is no I/O to overlap and both sides are CPU-bound.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.common import setup_django, summarize, test_database
+
+Call = Tuple[str, str, str, bytes]
+
+# Mounted as ROOT_URLCONF: the viewset routes under /sync/, the async views under /async/.
+urlpatterns: list = []
+
+
+def mount_urls() -> None:
+    from django.conf import settings
+    from django.urls import clear_url_caches, include, path
+
+    from quiz import urls as quiz_urls
+
+    urlpatterns[:] = [
+        path("sync/", include((quiz_urls.urlpatterns, "quiz"), namespace="sync")),
+        path("async/", include((quiz_urls.async_urlpatterns, "quiz"), namespace="async")),
+    ]
+    settings.ROOT_URLCONF = __name__
+    clear_url_caches()
+
+
+def add_db_latency(milliseconds: float) -> None:
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(milliseconds / 1000)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(connection)
+
+
+def seed(quizzes: int, players: int):
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from quiz.models import AnswerOption, Question, Quiz, QuizStats
+
+    User = get_user_model()
+    creator = User.objects.create(username="bench-author")
+    created = Quiz.objects.bulk_create(
+        [Quiz(title=f"Quiz {index}", description="Benchmark quiz", creator=creator) for index in range(quizzes)]
+    )
+    QuizStats.objects.bulk_create([QuizStats(quiz=quiz, question_count=5) for quiz in created])
+    questions = Question.objects.bulk_create(
+        [Question(quiz=quiz, title=f"Question {order}", order=order) for quiz in created for order in range(1, 6)]
+    )
+    AnswerOption.objects.bulk_create(
+        [
+            AnswerOption(question=question, text=text, is_correct=text == "A")
+            for question in questions
+            for text in "ABCD"
+        ]
+    )
+
+    users = [User.objects.create(username=f"bench-player-{index}") for index in range(players)]
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+    # Quiz detail is restricted to the creator.
+    return created, [str(AccessToken.for_user(creator))], tokens
+
+
+def submission(quiz) -> bytes:
+    answers = [
+        {"question": question.pk, "selected_options": [option.pk for option in question.answer_options.all()][:1]}
+        for question in quiz.questions.prefetch_related("answer_options")
+    ]
+    return json.dumps({"answers": answers}).encode()
+
+
+def scenarios(quizzes, creator_tokens, player_tokens) -> Dict[str, Callable[[int], Call]]:
+    quiz = quizzes[len(quizzes) // 2]
+    body = submission(quiz)
+    return {
+        "list": lambda i: ("GET", "quizzes/", player_tokens[i % len(player_tokens)], b""),
+        "detail": lambda i: ("GET", f"quizzes/{quiz.pk}/", creator_tokens[0], b""),
+        "submit": lambda i: ("POST", f"quizzes/{quiz.pk}/submit/", player_tokens[i % len(player_tokens)], body),
+    }
+
+
+def wsgi_round(calls: List[Call], threads: int) -> Tuple[List[float], float]:
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    statuses: Dict[int, int] = {}
+
+    def start_response(status, headers):
+        code = int(status.split()[0])
+        statuses[code] = statuses.get(code, 0) + 1
+
+    def one(call: Call) -> float:
+        method, path, token, body = call
+        headers = {"Authorization": f"Bearer {token}"}
+        if method == "POST":
+            request = factory.post(f"/sync/api/{path}", body, content_type="application/json", headers=headers)
+        else:
+            request = factory.get(f"/sync/api/{path}", headers=headers)
+        started = time.perf_counter()
+        response = handler(request.environ, start_response)
+        b"".join(response)
+        response.close()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        timings = list(executor.map(one, calls))
+    elapsed = time.perf_counter() - started
+    check_statuses("WSGI", statuses)
+    return timings, elapsed
+
+
+def check_statuses(side: str, statuses: Dict[int, int]) -> None:
+    failed = {code: count for code, count in statuses.items() if code >= 400}
+    if failed:
+        raise SystemExit(f"{side} requests failed: {failed}")
+
+
+async def asgi_round(calls: List[Call], concurrency: int) -> Tuple[List[float], float]:
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Dict[int, int] = {}
+
+    async def one(call: Call) -> float:
+        method, path, token, body = call
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": f"/async/api/{path}",
+            "raw_path": f"/async/api/{path}".encode(),
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Bearer {token}".encode()),
+                (b"content-type", b"application/json"),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses[message["status"]] = statuses.get(message["status"], 0) + 1
+
+        async with semaphore:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            elapsed = (time.perf_counter() - started) * 1000
+        disconnected.set()
+        return elapsed
+
+    started = time.perf_counter()
+    timings = await asyncio.gather(*(one(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    check_statuses("ASGI", statuses)
+    return list(timings), elapsed
+
+
+def print_row(label: str, timings: List[float], elapsed: float) -> None:
+    summary = summarize(timings)
+    print(
+        f"{label:<28} {len(timings) / elapsed:8.0f} req/s   p50 {summary['p50']:8.2f} ms   "
+        f"p95 {summary['p95']:8.2f} ms   max {summary['max']:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario and side.")
+    parser.add_argument("--concurrency", type=int, default=200, help="In-flight requests on the ASGI side.")
+    parser.add_argument("--threads", type=int, default=16, help="Worker threads on the WSGI side.")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Milliseconds added to every query.")
+    parser.add_argument("--quizzes", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+
+    # A file rather than shared-cache memory so concurrent writers wait on
+    # the busy timeout instead of failing with "table is locked".
+    database = settings.DATABASES["default"]
+    if database["ENGINE"].endswith("sqlite3"):
+        database.setdefault("TEST", {})["NAME"] = os.path.join(tempfile.gettempdir(), "bench_async_views.sqlite3")
+        database.setdefault("OPTIONS", {})["timeout"] = 30
+    setup_test_environment()
+    mount_urls()
+    with test_database():
+        quizzes, creator_tokens, player_tokens = seed(args.quizzes, players=50)
+        if args.db_latency:
+            add_db_latency(args.db_latency)
+        print(
+            f"{args.requests} requests per run, WSGI {args.threads} threads, "
+            f"ASGI concurrency {args.concurrency}, db latency {args.db_latency} ms"
+        )
+        for name, make_call in scenarios(quizzes, creator_tokens, player_tokens).items():
+            calls = [make_call(index) for index in range(args.requests)]
+            print_row(f"{name} sync/WSGI", *wsgi_round(calls, args.threads))
+            print_row(f"{name} async/ASGI", *asyncio.run(asgi_round(calls, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created through Django's
+test runner machinery, so they never touch the configured database.
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pickmequiz.settings")
+
+
+def setup_django() -> None:
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity: int = 0):
+    from django.test.utils import setup_databases, teardown_databases
+
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+
+
+def measure(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def report(label: str, timings: List[float]) -> None:
+    summary = summarize(timings)
+    print(
+        f"{label:<60} p50 {summary['p50']:9.2f} ms   "
+        f"p95 {summary['p95']:9.2f} ms   max {summary['max']:9.2f} ms"
+    )
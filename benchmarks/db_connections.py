@@ -0,0 +1,84 @@
+"""
+Per-request database connection overhead: a new connection per request
+vs. persistent connections (with and without health checks) vs. the
+psycopg 3 connection pool.
+
+    DATABASE_ENGINE=postgresql POSTGRES_DB=... python -m benchmarks.db_connections --requests 2000
+
+Each simulated request runs Django's request_started/request_finished
+signals around one primary key lookup, which is where Django opens,
+checks, reuses or closes connections. The pool mode is skipped unless
+the database is PostgreSQL and psycopg 3 with the pool extra is installed.
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import measure, report, setup_django, test_database
+
+
+def modes(vendor: str):
+    yield "new connection per request (CONN_MAX_AGE=0)", {"CONN_MAX_AGE": 0}
+    yield "persistent (CONN_MAX_AGE=600)", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False}
+    yield "persistent with health checks", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}
+    if vendor == "postgresql":
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            print("pool: skipped, psycopg[pool] is not installed")
+            return
+        yield "pool (min 2, max 4)", {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": {"min_size": 2, "max_size": 4}}}
+
+
+def run(requests: int) -> None:
+    from django.contrib.auth import get_user_model
+    from django.core.signals import request_finished, request_started
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    User = get_user_model()
+    user_id = User.objects.create(username="bench").pk
+    base = connections["default"]
+    base.close()
+    opened = []
+    connection_created.connect(lambda sender, connection, **kwargs: opened.append(connection), weak=False)
+
+    def request():
+        request_started.send(sender=None)
+        User.objects.filter(pk=user_id).first()
+        request_finished.send(sender=None)
+
+    for label, overrides in modes(base.vendor):
+        settings_dict = {**base.settings_dict, **overrides}
+        settings_dict["OPTIONS"] = {**base.settings_dict["OPTIONS"], **overrides.get("OPTIONS", {})}
+        connection = base.__class__(settings_dict, alias="default")
+        connections["default"] = connection
+        request()  # warm up (and fill the pool)
+        opened.clear()
+        report(f"{label}", measure(request, requests))
+        print(f"{'':<60} {len(opened)} connections opened")
+        connection.close()
+        if connection.vendor == "postgresql" and connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close_pool()
+    connections["default"] = base
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    if database["ENGINE"].endswith("sqlite3"):
+        # Closing the last connection would drop the default in-memory test database.
+        database.setdefault("TEST", {})["NAME"] = os.path.join(tempfile.gettempdir(), "bench_db_connections.sqlite3")
+    with test_database():
+        run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+One live session with many players on a single worker: connect, broadcast
+a question, ingest everyone's answer and broadcast the final counts.
+
+    python -m benchmarks.live_sessions --players 1000 --questions 5
+
+Sockets are driven in-process through the ASGI WebSocket protocol, so the
+figures cover the consumer, the in-memory channel layer and the batched
+answer writes, but not a server's network I/O.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import setup_django, test_database
+
+
+class Socket:
+    def __init__(self, application, path: str, token: str):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        scope = {"type": "websocket", "path": path, "query_string": f"token={token}".encode(), "headers": []}
+        self.task = asyncio.ensure_future(application(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self) -> None:
+        await self.inbox.put({"type": "websocket.connect"})
+        accepted = await self.outbox.get()
+        if accepted["type"] != "websocket.accept":
+            raise SystemExit(f"Socket refused: {accepted}")
+        await self.outbox.get()  # state
+
+    async def send(self, data) -> None:
+        await self.inbox.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self, kind: str):
+        while True:
+            message = json.loads((await self.outbox.get())["text"])
+            if message["type"] == kind:
+                return message
+
+    async def close(self) -> None:
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+def seed(players: int, questions: int):
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from live.models import LiveSession
+    from quiz.models import AnswerOption, Question, Quiz
+
+    User = get_user_model()
+    host = User.objects.create(username="bench-host")
+    quiz = Quiz.objects.create(title="Live benchmark", description="Benchmark quiz", creator=host)
+    created = Question.objects.bulk_create(
+        [Question(quiz=quiz, title=f"Question {order}", order=order) for order in range(1, questions + 1)]
+    )
+    AnswerOption.objects.bulk_create(
+        [AnswerOption(question=question, text=text, is_correct=text == "A") for question in created for text in "ABCD"]
+    )
+    users = User.objects.bulk_create([User(username=f"bench-player-{index}") for index in range(players)])
+    session = LiveSession.objects.create(quiz=quiz, host=host, code="BENCH1")
+    return session, str(AccessToken.for_user(host)), [str(AccessToken.for_user(user)) for user in users]
+
+
+async def run(session, host_token, player_tokens, questions: int) -> None:
+    from live.routing import websocket_router
+
+    application = websocket_router(None)
+    path = f"/ws/live/{session.code}/"
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    host = Socket(application, path, host_token)
+    await host.connect()
+    players = [Socket(application, path, token) for token in player_tokens]
+    await asyncio.gather(*(player.connect() for player in players))
+    connect_seconds = time.perf_counter() - started
+    # Peak RSS growth in KiB (Linux), a rough upper bound of what the sockets hold.
+    per_socket = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / (len(players) + 1)
+    print(f"connect {len(players)} players      {connect_seconds * 1000:9.1f} ms   ~{per_socket:.1f} KiB per socket")
+
+    for number in range(1, questions + 1):
+        started = time.perf_counter()
+        await host.send({"type": "next"})
+        received = await asyncio.gather(*(player.receive("question") for player in players))
+        broadcast = time.perf_counter() - started
+
+        started = time.perf_counter()
+        question = received[0]["question"]
+        options = [option["id"] for option in question["answer_options"]]
+        for index, player in enumerate(players):
+            await player.send({"type": "answer", "question": question["id"], "selected_options": [options[index % 4]]})
+        counts = await host.receive("answer_counts")
+        while counts["answers"] < len(players):
+            counts = await host.receive("answer_counts")
+        ingest = time.perf_counter() - started
+        print(
+            f"question {number}: broadcast to all {broadcast * 1000:9.1f} ms   "
+            f"all answers stored and counted {ingest * 1000:9.1f} ms"
+        )
+
+    started = time.perf_counter()
+    await host.send({"type": "finish"})
+    await asyncio.gather(*(player.receive("finished") for player in players))
+    print(f"finish and broadcast results  {(time.perf_counter() - started) * 1000:9.1f} ms")
+    await asyncio.gather(host.close(), *(player.close() for player in players))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    if database["ENGINE"].endswith("sqlite3"):
+        database.setdefault("TEST", {})["NAME"] = os.path.join(tempfile.gettempdir(), "bench_live_sessions.sqlite3")
+    with test_database():
+        session, host_token, player_tokens = seed(args.players, args.questions)
+        asyncio.run(run(session, host_token, player_tokens, args.questions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Quiz search latency: full-text backend vs. LIKE '%term%'.
+
+    python -m benchmarks.search --quizzes 1000000
+
+Seeds a test database with synthetic quizzes, then times the first page
+of a few searches of varying selectivity through each backend.
+"""
+
+import argparse
+import random
+
+from benchmarks.common import measure, report, setup_django, test_database
+
+SYLLABLES = "ka lo mi nu ra se ti vo za be do fi gu ha je ki lu ma ne po".split()
+
+
+def vocabulary(rng, size=50000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def pick_terms(words):
+    # Word frequency follows Zipf's law over the vocabulary order, so low
+    # indexes are common words and high indexes are rare ones.
+    return {
+        "common word": words[2],
+        "mid word": words[200],
+        "rare word": words[20000],
+        "two words": f"{words[5]} {words[300]}",
+        "prefix": words[1000][:4],
+        "no match": "zzzz",
+    }
+
+
+def sentence(rng, words, weights, length):
+    return " ".join(rng.choices(words, cum_weights=weights, k=length))
+
+
+def zipf_weights(size):
+    total, weights = 0.0, []
+    for rank in range(1, size + 1):
+        total += 1.0 / rank
+        weights.append(total)
+    return weights
+
+
+def seed(quizzes: int, words, batch_size: int = 20000) -> None:
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    creator = get_user_model().objects.create(username="bench")
+    rng = random.Random(1)
+    weights = zipf_weights(len(words))
+    now = timezone.now()
+    sql = (
+        "INSERT INTO quiz (title, description, category, is_time_limited, created_at, "
+        "creator_id, last_modified) VALUES (%s, %s, 'general', %s, %s, %s, %s)"
+    )
+    for start in range(0, quizzes, batch_size):
+        rows = [
+            (
+                sentence(rng, words, weights, 4),
+                sentence(rng, words, weights, 20),
+                False,
+                now,
+                creator.pk,
+                now,
+            )
+            for _ in range(min(batch_size, quizzes - start))
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quizzes", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from quiz.models import Quiz
+    from quiz.search import ContainsSearchBackend, get_search_backend, tokenize
+
+    words = vocabulary(random.Random(0))
+    with test_database():
+        seed(args.quizzes, words)
+        backends = [get_search_backend(connection), ContainsSearchBackend()]
+        print(f"{args.quizzes} quizzes on {connection.vendor}")
+        for label, term in pick_terms(words).items():
+            tokens = tokenize(term)
+            for backend in backends:
+                name = type(backend).__name__
+                queryset = backend.search(Quiz.objects.all(), tokens)
+                matches = queryset.count()
+                report(
+                    f"{name:<24} {label:<12} page ({matches} hits)",
+                    measure(lambda: list(queryset[:10]), args.repeat),
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "locked_by", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("name",)
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ["retry"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected jobs now")
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=JobStatus.RUNNING).update(
+            status=JobStatus.QUEUED, run_at=timezone.now(), attempts=0, finished_at=None
+        )
+        self.message_user(request, f"Requeued {updated} jobs.")
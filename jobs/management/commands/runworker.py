@@ -0,0 +1,91 @@
+import logging
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from jobs.queue import claim, release_stale, run_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.JOBS_CONCURRENCY,
+            help="Number of jobs run at the same time, each in its own thread.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            # Finish the jobs in hand, then exit.
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, lambda *_: self.stop.set())
+        try:
+            self.run(options)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def run(self, options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = max(options["concurrency"], 1)
+        released = release_stale()
+        if released:
+            self.stdout.write(f"Requeued {released} stale jobs.")
+        self.stdout.write(f"Worker {worker} started with {concurrency} threads.")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self.loop, f"{worker}:{index}", options["poll_interval"], options["burst"])
+                for index in range(concurrency)
+            ]
+        processed = sum(future.result() for future in futures)
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker} stopped after {processed} jobs."))
+
+    def loop(self, worker_id: str, poll_interval: float, burst: bool) -> int:
+        processed = 0
+        try:
+            while not self.stop.is_set():
+                try:
+                    jobs = claim(worker_id)
+                    if not jobs:
+                        if burst:
+                            break
+                        self.stop.wait(poll_interval)
+                        release_stale()
+                        continue
+                    for job in jobs:
+                        run_job(job)
+                        processed += 1
+                except DatabaseError:
+                    # A dropped connection or a locked database must not end the thread.
+                    # A job whose outcome could not be stored is requeued once it goes stale.
+                    logger.warning("Worker %s lost the database", worker_id, exc_info=True)
+                    connection.close()
+                    self.stop.wait(poll_interval)
+        finally:
+            connection.close()
+        return processed
@@ -0,0 +1,199 @@
+import logging
+import random
+import threading
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+_registry: Dict[str, Callable[..., Any]] = {}
+_current_job: ContextVar[Optional[Job]] = ContextVar("current_job", default=None)
+
+
+def current_job() -> Optional[Job]:
+    """The job whose task is running in this context, if any."""
+    return _current_job.get()
+
+
+def task(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Register ``func`` as runnable by workers under its dotted path and give
+    it an ``enqueue(*args, **kwargs)`` shortcut. Arguments must be JSON
+    serializable. Only registered functions are ever run from a job row.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    _registry[name] = func
+    func.enqueue = partial(enqueue, name)
+    return func
+
+
+def get_task(name: str) -> Callable[..., Any]:
+    if name not in _registry:
+        # Importing the module runs its @task decorators.
+        import_string(name)
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"{name} is not a registered task")
+
+
+def enqueue(
+    name: str,
+    *args: Any,
+    run_at=None,
+    max_attempts: Optional[int] = None,
+    **kwargs: Any,
+) -> Job:
+    """
+    Store a job. Inside a transaction the job only becomes visible to
+    workers once it commits, together with the data it works on. With
+    ``JOBS_EAGER`` a job due now runs in-process on commit; one with a
+    later ``run_at`` stays queued for a worker.
+    """
+    job = Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_EAGER and job.run_at <= timezone.now():
+        transaction.on_commit(partial(_run_eager, job.pk))
+    return job
+
+
+def _run_eager(job_id: int) -> None:
+    job = Job.objects.get(pk=job_id)
+    job.status, job.locked_at, job.locked_by = JobStatus.RUNNING, timezone.now(), "eager"
+    Job.objects.filter(pk=job_id).update(
+        status=job.status, locked_at=job.locked_at, locked_by=job.locked_by, attempts=F("attempts") + 1
+    )
+    job.attempts += 1
+    run_job(job)
+
+
+def claim(worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Move up to ``limit`` due jobs to running and return them.
+
+    On PostgreSQL the candidates are locked with SKIP LOCKED so concurrent
+    workers pick disjoint rows without waiting on each other. SQLite has no
+    row locks but serializes writers, so the conditional UPDATE alone decides
+    which worker wins a row; the loser simply gets fewer jobs back.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=JobStatus.QUEUED, run_at__lte=now).order_by("run_at", "id")
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING,
+            locked_at=now,
+            locked_by=worker_id,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        Job.objects.filter(
+            id__in=ids, status=JobStatus.RUNNING, locked_by=worker_id, locked_at=now
+        ).order_by("run_at", "id")
+    )
+
+
+def backoff(attempts: int) -> timedelta:
+    """Exponential delay before retry ``attempts + 1``, with jitter to spread retries."""
+    delay = min(settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1), settings.JOBS_BACKOFF_MAX)
+    return timedelta(seconds=delay + random.uniform(0, settings.JOBS_BACKOFF_BASE))
+
+
+def _owned(job: Job):
+    """The job's row, as long as ``job``'s worker still holds it."""
+    return Job.objects.filter(pk=job.pk, status=JobStatus.RUNNING, locked_by=job.locked_by)
+
+
+@contextmanager
+def heartbeat(job: Job):
+    """
+    Refresh the job's ``locked_at`` every ``JOBS_HEARTBEAT_INTERVAL`` seconds
+    while it runs, so ``release_stale`` only requeues jobs whose worker died.
+    """
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+                try:
+                    if not _owned(job).update(locked_at=timezone.now()):
+                        logger.warning("Job %s (%s) is no longer held by %s", job.pk, job.name, job.locked_by)
+                        return
+                except DatabaseError:
+                    logger.warning("Heartbeat of job %s failed", job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-{job.pk}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def run_job(job: Job) -> bool:
+    """
+    Run a claimed job and record the outcome; returns whether it succeeded.
+    The outcome is only stored while the job's worker still holds the row.
+    """
+    token = _current_job.set(job)
+    try:
+        with heartbeat(job):
+            get_task(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.name, job.attempts)
+        if job.attempts >= job.max_attempts:
+            _owned(job).update(status=JobStatus.FAILED, last_error=error, finished_at=timezone.now())
+        else:
+            _owned(job).update(
+                status=JobStatus.QUEUED,
+                last_error=error,
+                run_at=timezone.now() + backoff(job.attempts),
+                locked_at=None,
+                locked_by="",
+            )
+        return False
+    finally:
+        _current_job.reset(token)
+
+    if settings.JOBS_DELETE_SUCCEEDED:
+        _owned(job).delete()
+    else:
+        _owned(job).update(status=JobStatus.SUCCEEDED, finished_at=timezone.now())
+    return True
+
+
+def release_stale(timeout: Optional[int] = None) -> int:
+    """Requeue jobs whose worker sent no heartbeat for ``timeout`` seconds."""
+    timeout = settings.JOBS_LOCK_TIMEOUT if timeout is None else timeout
+    now = timezone.now()
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=now - timedelta(seconds=timeout))
+    # A job that keeps killing its worker must not be retried forever.
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=JobStatus.FAILED, last_error="Worker lost", finished_at=now
+    )
+    return stale.update(status=JobStatus.QUEUED, locked_at=None, locked_by="")
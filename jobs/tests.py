@@ -0,0 +1,155 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job, JobStatus
+from jobs.queue import claim, enqueue, release_stale, run_job, task
+
+calls = []
+
+
+@task
+def record_call(value):
+    calls.append(value)
+
+
+@task
+def always_fails():
+    raise RuntimeError("boom")
+
+
+@task
+def outlive_lock_timeout():
+    time.sleep(0.3)
+    calls.append(release_stale(timeout=0.2))
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_runs_and_deletes_succeeded_job(self):
+        record_call.enqueue(1)
+        [job] = claim("worker-1")
+
+        self.assertEqual((job.status, job.attempts, job.locked_by), (JobStatus.RUNNING, 1, "worker-1"))
+        self.assertEqual(claim("worker-2"), [])
+        self.assertTrue(run_job(job))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claims_are_disjoint_and_respect_run_at(self):
+        for value in range(3):
+            record_call.enqueue(value)
+        enqueue("jobs.tests.record_call", 9, run_at=timezone.now() + timedelta(hours=1))
+
+        first = claim("worker-1", limit=2)
+        second = claim("worker-2", limit=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+
+    @override_settings(JOBS_BACKOFF_BASE=10, JOBS_BACKOFF_MAX=15)
+    def test_failures_back_off_then_fail(self):
+        always_fails.enqueue(max_attempts=2)
+
+        [job] = claim("worker")
+        with self.assertLogs("jobs.queue", "WARNING"):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(claim("worker"), [])
+
+        Job.objects.update(run_at=timezone.now())
+        [job] = claim("worker")
+        with self.assertLogs("jobs.queue", "WARNING"):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+
+    def test_unregistered_names_are_not_run(self):
+        enqueue("django.core.management.call_command", "flush", max_attempts=1)
+        [job] = claim("worker")
+        with self.assertLogs("jobs.queue", "WARNING"):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertIn("is not a registered task", job.last_error)
+
+    def test_release_stale(self):
+        record_call.enqueue(1)
+        record_call.enqueue(2, max_attempts=1)
+        claim("lost-worker", limit=2)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(release_stale(), 1)
+        statuses = dict(Job.objects.values_list("max_attempts", "status"))
+        self.assertEqual(statuses[1], JobStatus.FAILED)
+        self.assertEqual(statuses[5], JobStatus.QUEUED)
+
+    def test_released_job_is_not_touched_by_its_previous_worker(self):
+        record_call.enqueue(1)
+        [lost] = claim("worker-1")
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        release_stale()
+        [job] = claim("worker-2")
+
+        self.assertTrue(run_job(lost))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (JobStatus.RUNNING, "worker-2"))
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_jobs_run_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_call.enqueue(7)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [7])
+
+
+class RunWorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_worker_drains_queue(self):
+        for value in range(5):
+            record_call.enqueue(value)
+
+        out = StringIO()
+        call_command("runworker", "--burst", "--concurrency", "2", stdout=out)
+
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+        self.assertFalse(Job.objects.exists())
+        self.assertIn("stopped after 5 jobs", out.getvalue())
+
+    def test_database_errors_do_not_stop_the_worker(self):
+        record_call.enqueue(1)
+        failures = [OperationalError("database is locked")]
+
+        def flaky_claim(worker_id):
+            if failures:
+                raise failures.pop()
+            return claim(worker_id)
+
+        out = StringIO()
+        with mock.patch("jobs.management.commands.runworker.claim", flaky_claim), \
+                self.assertLogs("jobs.management.commands.runworker", "WARNING"):
+            call_command("runworker", "--burst", "--poll-interval", "0", stdout=out)
+
+        self.assertEqual(calls, [1])
+        self.assertIn("stopped after 1 jobs", out.getvalue())
+
+    @override_settings(JOBS_HEARTBEAT_INTERVAL=0.05)
+    def test_heartbeat_keeps_long_jobs_from_going_stale(self):
+        outlive_lock_timeout.enqueue()
+        [job] = claim("worker")
+
+        self.assertTrue(run_job(job))
+        self.assertEqual(calls, [0])
+        self.assertFalse(Job.objects.exists())
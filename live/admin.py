@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from .models import LivePlayer, LiveSession
+
+
+@admin.register(LiveSession)
+class LiveSessionAdmin(admin.ModelAdmin):
+    list_display = ("code", "quiz", "host", "status", "created_at", "finished_at")
+    list_filter = ("status",)
+    list_select_related = ("quiz", "host")
+    search_fields = ("code", "quiz__title")
+    autocomplete_fields = ("quiz", "host")
+    readonly_fields = ("current_question", "question_started_at", "finished_at")
+
+
+@admin.register(LivePlayer)
+class LivePlayerAdmin(admin.ModelAdmin):
+    list_display = ("session", "user", "joined_at")
+    list_select_related = ("session", "user")
+    search_fields = ("session__code", "user__username")
+    raw_id_fields = ("session", "user", "attempt")
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+from urllib.parse import parse_qs
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from quiz.answer_keys import get_answer_key
+from quiz.async_views import aget_token_user
+from quiz.grading import AnswerKey, validate_answer
+
+from .ingest import get_batcher
+from .layers import get_channel_layer
+from .models import LivePlayer, LiveSession, SessionStatus
+from .sessions import (
+    LiveAnswer,
+    advance_session,
+    database_sync_to_async,
+    finish_session,
+    group_name,
+    join_session,
+    state_message,
+)
+
+# Close codes sent instead of accepting the socket.
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+CLOSE_FINISHED = 4410
+
+
+class LiveSessionConsumer:
+    """
+    One WebSocket in a live session room. The host drives the session with
+    ``{"type": "next"}`` and ``{"type": "finish"}``; players send
+    ``{"type": "answer", "question": id, "selected_options": [ids]}`` for the
+    open question. Everyone receives ``state`` on connect, then ``question``,
+    ``answer_counts`` and ``finished`` broadcasts.
+
+    Clients authenticate with an access token in the ``token`` query
+    parameter, since browsers cannot set headers on a WebSocket handshake.
+    """
+
+    def __init__(self, scope, receive, send, code: str):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self.code = code
+        self.layer = get_channel_layer()
+        self.channel: Optional[str] = None
+        self.session: Optional[LiveSession] = None
+        self.player: Optional[LivePlayer] = None
+        self.answer_key: AnswerKey = {}
+        self.state: Dict[str, Any] = {}
+        self.current_question: Optional[int] = None
+        self.answered: Set[int] = set()
+
+    @property
+    def is_host(self) -> bool:
+        return self.player is None
+
+    async def __call__(self) -> None:
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        close_code = await self.connect()
+        if close_code is not None:
+            await self._send({"type": "websocket.close", "code": close_code})
+            return
+
+        await self._send({"type": "websocket.accept"})
+        self.channel = await self.layer.new_channel()
+        group = group_name(self.session.pk)
+        await self.layer.group_add(group, self.channel)
+        try:
+            await self.deliver(self.state)
+            tasks = [asyncio.ensure_future(self.read()), asyncio.ensure_future(self.write())]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await self.layer.group_discard(group, self.channel)
+            await self.layer.remove_channel(self.channel)
+
+    async def connect(self) -> Optional[int]:
+        """Authenticate and join the session; returns a close code when refused."""
+        token = parse_qs(self.scope.get("query_string", b"").decode()).get("token")
+        if not token:
+            return CLOSE_UNAUTHORIZED
+        try:
+            user = await aget_token_user(token[0].encode())
+        except AuthenticationFailed:
+            return CLOSE_UNAUTHORIZED
+
+        return await database_sync_to_async(self.open)(user)
+
+    def open(self, user) -> Optional[int]:
+        # A single trip to the database thread, since the whole room connects at once.
+        self.session = LiveSession.objects.select_related("quiz").filter(code=self.code).first()
+        if self.session is None:
+            return CLOSE_NOT_FOUND
+        if self.session.host_id != user.pk:
+            if self.session.status == SessionStatus.FINISHED:
+                return CLOSE_FINISHED
+            self.player = join_session(self.session, user)
+        # Answers are graded against the quiz as it was when the socket joined.
+        self.answer_key = get_answer_key(self.session.quiz)
+        self.state = state_message(self.session.pk)
+        return None
+
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        await self._send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def error(self, detail: str) -> None:
+        await self.send_json({"type": "error", "detail": detail})
+
+    async def deliver(self, message: Dict[str, Any]) -> None:
+        if message["type"] in ("state", "question"):
+            question = message.get("question")
+            self.current_question = question["id"] if question else None
+        elif message["type"] == "finished":
+            self.current_question = None
+        elif message["type"] == "answer_rejected":
+            # The answer was not stored, so the player may send it again.
+            self.answered.discard(message["question"])
+        await self.send_json(message)
+
+    async def write(self) -> None:
+        while True:
+            await self.deliver(await self.layer.receive(self.channel))
+
+    async def read(self) -> None:
+        handlers = {"next": self.host_next, "finish": self.host_finish, "answer": self.answer}
+        while True:
+            message = await self.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                data = json.loads(message.get("text") or message.get("bytes") or "")
+            except ValueError:
+                await self.error("Messages must be JSON.")
+                continue
+            handler = handlers.get(data.get("type")) if isinstance(data, dict) else None
+            if handler is None:
+                await self.error("Unknown message type.")
+                continue
+            await handler(data)
+
+    async def host_next(self, data: Dict[str, Any]) -> None:
+        if not self.is_host:
+            return await self.error("Only the host can advance the session.")
+        # Store the answers to the closing question before moving on.
+        await get_batcher().flush()
+        message = await database_sync_to_async(advance_session)(self.session.pk)
+        await self.layer.group_send(group_name(self.session.pk), message)
+
+    async def host_finish(self, data: Dict[str, Any]) -> None:
+        if not self.is_host:
+            return await self.error("Only the host can finish the session.")
+        await get_batcher().flush()
+        message = await database_sync_to_async(finish_session)(self.session.pk)
+        await self.layer.group_send(group_name(self.session.pk), message)
+
+    async def answer(self, data: Dict[str, Any]) -> None:
+        if self.is_host:
+            return await self.error("The host does not answer.")
+        question_id = data.get("question")
+        if question_id is None or question_id != self.current_question:
+            return await self.error("This question is not open.")
+        if question_id in self.answered:
+            return await self.error("This question is already answered.")
+        selected = data.get("selected_options")
+        if not isinstance(selected, list) or not all(isinstance(pk, int) for pk in selected):
+            return await self.error("selected_options must be a list of option ids.")
+
+        question_key = self.answer_key.get(question_id)
+        if question_key is None:
+            return await self.error("This question is not open.")
+        selected_ids = frozenset(selected)
+        try:
+            validate_answer(question_key, selected_ids)
+        except ValueError as exc:
+            return await self.error(str(exc))
+
+        self.answered.add(question_id)
+        await get_batcher().add(
+            LiveAnswer(
+                session_id=self.session.pk,
+                attempt_id=self.player.attempt_id,
+                question_id=question_id,
+                selected_options=tuple(sorted(selected_ids)),
+                is_correct=bool(selected_ids) and selected_ids == question_key.correct_ids,
+                channel=self.channel,
+            )
+        )
+        await self.send_json({"type": "answer_accepted", "question": question_id})
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from django.conf import settings
+
+from .layers import get_channel_layer
+from .sessions import LiveAnswer, database_sync_to_async, group_name, save_answers
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerBatcher:
+    """
+    Collects the answers arriving on every socket of this worker and writes
+    them together, once ``batch_size`` answers are waiting or ``interval``
+    seconds after the first one arrived, whichever comes first. After each
+    write the new answer counts are broadcast to the rooms involved, so a
+    room gets at most one count update per flush however many players answer.
+    Answers the session moved past before they were written get
+    ``answer_rejected``.
+
+    A batch that fails to write is kept and tried again ``retries`` times,
+    ``interval`` seconds apart; after that its players get ``answer_rejected``
+    so they can answer again.
+    """
+
+    def __init__(self, batch_size: int, interval: float, retries: int = 0):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+        self.pending: List[LiveAnswer] = []
+        self._failures = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, answer: LiveAnswer) -> None:
+        self.pending.append(answer)
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        else:
+            self._flush_soon()
+
+    def _flush_soon(self) -> None:
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        # One write at a time per worker; answers arriving meanwhile form the next batch.
+        async with self._lock:
+            answers, self.pending = self.pending, []
+            if not answers:
+                return
+            try:
+                counts, late = await database_sync_to_async(save_answers)(answers)
+            except Exception:
+                self._failures += 1
+                if self._failures <= self.retries:
+                    logger.warning("Could not store %s live answers, retrying", len(answers), exc_info=True)
+                    self.pending[:0] = answers
+                    self._flush_soon()
+                    return
+                logger.exception("Gave up storing %s live answers", len(answers))
+                self._failures = 0
+                await reject(answers, "Your answer could not be saved, please send it again.")
+                return
+            self._failures = 0
+
+        await reject(late, "The question closed before your answer was saved.")
+        layer = get_channel_layer()
+        for (session_id, question_id), data in counts.items():
+            await layer.group_send(
+                group_name(session_id), {"type": "answer_counts", "question": question_id, **data}
+            )
+
+
+async def reject(answers: List[LiveAnswer], detail: str) -> None:
+    """Tell the socket behind each answer that it was not stored."""
+    layer = get_channel_layer()
+    for answer in answers:
+        if answer.channel is not None:
+            await layer.send(
+                answer.channel, {"type": "answer_rejected", "question": answer.question_id, "detail": detail}
+            )
+
+
+_batcher: Optional[AnswerBatcher] = None
+
+
+def get_batcher() -> AnswerBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = AnswerBatcher(
+            settings.LIVE_ANSWER_BATCH_SIZE, settings.LIVE_ANSWER_FLUSH_INTERVAL, settings.LIVE_ANSWER_FLUSH_RETRIES
+        )
+    return _batcher
@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Set
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+Message = Dict[str, Any]
+
+
+class BaseChannelLayer:
+    """
+    Fan-out between live session sockets. Every socket owns a channel it
+    reads from; rooms are groups of channels. A layer shared between
+    processes (e.g. backed by Redis pub/sub) is needed once more than one
+    worker serves the same session.
+    """
+
+    async def new_channel(self) -> str:
+        raise NotImplementedError
+
+    async def remove_channel(self, channel: str) -> None:
+        raise NotImplementedError
+
+    async def send(self, channel: str, message: Message) -> None:
+        raise NotImplementedError
+
+    async def receive(self, channel: str) -> Message:
+        raise NotImplementedError
+
+    async def group_add(self, group: str, channel: str) -> None:
+        raise NotImplementedError
+
+    async def group_discard(self, group: str, channel: str) -> None:
+        raise NotImplementedError
+
+    async def group_send(self, group: str, message: Message) -> None:
+        raise NotImplementedError
+
+
+class InMemoryChannelLayer(BaseChannelLayer):
+    """
+    Single-process layer for one worker and for tests. Sends never wait: a
+    channel whose reader falls ``capacity`` messages behind loses its oldest
+    message, so one stalled socket cannot hold up a broadcast to the room.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.channels: Dict[str, asyncio.Queue] = {}
+        self.groups: Dict[str, Set[str]] = defaultdict(set)
+        self.dropped = 0
+        self._names = itertools.count(1)
+
+    async def new_channel(self) -> str:
+        name = f"channel-{next(self._names)}"
+        self.channels[name] = asyncio.Queue(maxsize=self.capacity)
+        return name
+
+    async def remove_channel(self, channel: str) -> None:
+        self.channels.pop(channel, None)
+
+    def _put(self, channel: str, message: Message) -> None:
+        queue = self.channels.get(channel)
+        if queue is None:
+            return
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(message)
+
+    async def send(self, channel: str, message: Message) -> None:
+        self._put(channel, message)
+
+    async def receive(self, channel: str) -> Message:
+        return await self.channels[channel].get()
+
+    async def group_add(self, group: str, channel: str) -> None:
+        self.groups[group].add(channel)
+
+    async def group_discard(self, group: str, channel: str) -> None:
+        members = self.groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                del self.groups[group]
+
+    async def group_send(self, group: str, message: Message) -> None:
+        # Receivers only read messages, so one dict is shared by the whole room.
+        for channel in list(self.groups.get(group, ())):
+            self._put(channel, message)
+
+
+@lru_cache(maxsize=None)
+def get_channel_layer() -> BaseChannelLayer:
+    return import_string(settings.LIVE_CHANNEL_LAYER)(**settings.LIVE_CHANNEL_LAYER_OPTIONS)
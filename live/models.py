@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import models
+
+from quiz.models import Question, Quiz, QuizAttempt
+
+
+class SessionStatus(models.TextChoices):
+    LOBBY = "lobby", "Lobby"
+    RUNNING = "running", "Running"
+    FINISHED = "finished", "Finished"
+
+
+class LiveSession(models.Model):
+    """A hosted run of a quiz that players follow question by question over a WebSocket."""
+
+    code = models.CharField(max_length=12, unique=True)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="live_sessions")
+    host = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="hosted_live_sessions"
+    )
+    status = models.CharField(max_length=10, choices=SessionStatus.choices, default=SessionStatus.LOBBY)
+    current_question = models.ForeignKey(
+        Question, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    question_started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "live_session"
+        verbose_name = "Live Session"
+        verbose_name_plural = "Live Sessions"
+
+    def __str__(self):
+        return f"Live session {self.code} of Quiz {self.quiz_id}"
+
+
+class LivePlayer(models.Model):
+    """A player in a live session; their answers are stored on ``attempt`` as it runs."""
+
+    session = models.ForeignKey(LiveSession, on_delete=models.CASCADE, related_name="players")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="live_players"
+    )
+    attempt = models.OneToOneField(QuizAttempt, on_delete=models.CASCADE, related_name="live_player")
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "live_player"
+        verbose_name = "Live Player"
+        verbose_name_plural = "Live Players"
+        constraints = [
+            models.UniqueConstraint(fields=["session", "user"], name="unique_player_per_live_session"),
+        ]
+
+    def __str__(self):
+        return f"Player {self.user_id} in live session {self.session_id}"
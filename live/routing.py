@@ -0,0 +1,25 @@
+import re
+
+from .consumers import LiveSessionConsumer
+
+LIVE_SESSION_PATH = re.compile(r"/ws/live/(?P<code>[A-Z0-9]+)/")
+
+
+def websocket_router(http_application):
+    """
+    Wrap the Django ASGI application so WebSocket connections to
+    ``/ws/live/<code>/`` reach the live session consumer. Any other
+    WebSocket is refused; everything else goes to Django.
+    """
+
+    async def application(scope, receive, send):
+        if scope["type"] != "websocket":
+            return await http_application(scope, receive, send)
+        match = LIVE_SESSION_PATH.fullmatch(scope["path"])
+        if match is None:
+            await receive()
+            await send({"type": "websocket.close"})
+            return
+        await LiveSessionConsumer(scope, receive, send, match["code"])()
+
+    return application
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+from .models import LiveSession
+
+
+class LiveSessionSerializer(serializers.ModelSerializer):
+    socket_path = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LiveSession
+        fields = [
+            "code",
+            "quiz",
+            "host",
+            "status",
+            "current_question",
+            "question_started_at",
+            "created_at",
+            "finished_at",
+            "socket_path",
+        ]
+        read_only_fields = [field for field in fields if field != "quiz"]
+
+    def get_socket_path(self, obj) -> str:
+        return f"/ws/live/{obj.code}/"
+
+    def validate_quiz(self, quiz):
+        if quiz.creator_id != self.context["request"].user.pk:
+            raise serializers.ValidationError("Only the creator of a quiz can host it live.")
+        return quiz
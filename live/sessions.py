@@ -0,0 +1,262 @@
+import secrets
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from quiz.analytics import rebuild_question_analytics
+from quiz.leaderboard import rebuild_leaderboard
+from quiz.models import Question, QuizAttempt, UserAnswer
+from quiz.stats import rebuild_quiz_stats
+from users.stats import rebuild_user_stats
+
+from .models import LivePlayer, LiveSession, SessionStatus
+
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+RESULTS_LIMIT = 10
+
+
+@dataclass(frozen=True)
+class LiveAnswer:
+    session_id: int
+    attempt_id: int
+    question_id: int
+    selected_options: Tuple[int, ...]
+    is_correct: bool
+    # The socket that sent the answer, told if the answer is not stored.
+    channel: Optional[str] = None
+
+
+def database_sync_to_async(func):
+    """``sync_to_async`` that retires broken or expired connections, as a request would."""
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run)
+
+
+def group_name(session_id: int) -> str:
+    return f"live-session-{session_id}"
+
+
+def generate_code(length: int = 6) -> str:
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+
+
+def join_session(session: LiveSession, user) -> LivePlayer:
+    """Return the player of ``user`` in the session, creating it and its attempt on first join."""
+    player = LivePlayer.objects.filter(session=session, user=user).first()
+    if player is not None:
+        return player
+    try:
+        with transaction.atomic():
+            attempt = QuizAttempt.objects.create(user=user, quiz_id=session.quiz_id)
+            return LivePlayer.objects.create(session=session, user=user, attempt=attempt)
+    except IntegrityError:
+        # The same user joined through another socket at the same moment.
+        return LivePlayer.objects.get(session=session, user=user)
+
+
+def question_payload(question: Question) -> Dict[str, Any]:
+    """What players see of a question: never which options are correct."""
+    return {
+        "id": question.pk,
+        "title": question.title,
+        "answer_type": question.answer_type,
+        "order": question.order,
+        "answer_options": [
+            {"id": option.pk, "text": option.text} for option in question.answer_options.all()
+        ],
+    }
+
+
+def state_message(session_id: int) -> Dict[str, Any]:
+    """Snapshot of the session sent to a socket when it connects."""
+    session = LiveSession.objects.get(pk=session_id)
+    message: Dict[str, Any] = {"type": "state", "status": session.status, "question": None}
+    if session.current_question_id is not None:
+        question = Question.objects.prefetch_related("answer_options").get(pk=session.current_question_id)
+        message["question"] = question_payload(question)
+        message["started_at"] = session.question_started_at.isoformat()
+    elif session.status == SessionStatus.FINISHED:
+        message["results"] = session_results(session.pk)
+    return message
+
+
+def advance_session(session_id: int) -> Dict[str, Any]:
+    """Move the session to the question after the current one, or finish it after the last."""
+    session = LiveSession.objects.select_related("current_question").get(pk=session_id)
+    if session.status == SessionStatus.FINISHED:
+        return state_message(session_id)
+    questions = Question.objects.filter(quiz_id=session.quiz_id).order_by("order")
+    if session.current_question is not None:
+        questions = questions.filter(order__gt=session.current_question.order)
+    question = questions.prefetch_related("answer_options").first()
+    if question is None:
+        return finish_session(session_id)
+
+    now = timezone.now()
+    LiveSession.objects.filter(pk=session_id).update(
+        status=SessionStatus.RUNNING, current_question=question, question_started_at=now
+    )
+    return {
+        "type": "question",
+        "question": question_payload(question),
+        "started_at": now.isoformat(),
+        "players": LivePlayer.objects.filter(session_id=session_id).count(),
+    }
+
+
+def finish_session(session_id: int) -> Dict[str, Any]:
+    """
+    Close the session and complete every player's attempt from the answers
+    stored so far. The quiz statistics, leaderboard, question analytics and
+    user stats are brought up to date by background jobs.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        finished = (
+            LiveSession.objects.filter(pk=session_id)
+            .exclude(status=SessionStatus.FINISHED)
+            .update(status=SessionStatus.FINISHED, current_question=None, finished_at=now)
+        )
+        if finished:
+            quiz_id = LiveSession.objects.values_list("quiz_id", flat=True).get(pk=session_id)
+            correct = (
+                UserAnswer.objects.filter(attempt=OuterRef("pk"), is_correct=True)
+                .order_by()
+                .values("attempt")
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            attempts = QuizAttempt.objects.filter(live_player__session_id=session_id)
+            # Attempts closed some other way keep their completion and score.
+            attempts.filter(completed_at__isnull=True).update(
+                completed_at=now,
+                score=Coalesce(Subquery(correct), Value(0)),
+                max_score=Question.objects.filter(quiz_id=quiz_id).count(),
+            )
+            rebuild_quiz_stats.enqueue([quiz_id])
+            rebuild_leaderboard.enqueue(quiz_id)
+            rebuild_question_analytics.enqueue([quiz_id])
+            rebuild_user_stats.enqueue(list(attempts.values_list("user_id", flat=True)))
+    return {"type": "finished", "results": session_results(session_id)}
+
+
+def session_results(session_id: int, limit: int = RESULTS_LIMIT) -> List[Dict[str, Any]]:
+    attempts = (
+        QuizAttempt.objects.filter(live_player__session_id=session_id, completed_at__isnull=False)
+        .order_by("-score", "live_player__joined_at")
+        .values_list("user_id", "user__username", "score", "max_score")[:limit]
+    )
+    return [
+        {"rank": rank, "user": user_id, "username": username, "score": score, "max_score": max_score}
+        for rank, (user_id, username, score, max_score) in enumerate(attempts, start=1)
+    ]
+
+
+def save_answers(
+    answers: Iterable[LiveAnswer],
+) -> Tuple[Dict[Tuple[int, int], Dict[str, Any]], List[LiveAnswer]]:
+    """
+    Store a batch of live answers with one insert for the answers and one
+    for their selected options, and return the updated answer counts of
+    every (session, question) the batch touched. A player's first answer to
+    a question is final; later ones, in the batch or already stored, are
+    dropped. Answers to a question the session has moved past are not
+    stored either; they are returned alongside the counts.
+    """
+    unique: Dict[Tuple[int, int], LiveAnswer] = {}
+    for answer in answers:
+        unique.setdefault((answer.attempt_id, answer.question_id), answer)
+    if not unique:
+        return {}, []
+
+    for retry in (False, True):
+        try:
+            with transaction.atomic():
+                late = _insert_answers(unique)
+            break
+        except IntegrityError:
+            # Another worker stored one of these answers after our check; re-check once.
+            if retry:
+                raise
+    pairs = {(answer.session_id, answer.question_id) for answer in unique.values()}
+    pairs -= {(answer.session_id, answer.question_id) for answer in late}
+    return (answer_counts(pairs) if pairs else {}), late
+
+
+def _insert_answers(unique: Dict[Tuple[int, int], LiveAnswer]) -> List[LiveAnswer]:
+    # The lock makes a host advancing the session wait for this batch, or this batch see the advance.
+    open_questions = dict(
+        LiveSession.objects.select_for_update()
+        .filter(pk__in={answer.session_id for answer in unique.values()})
+        .values_list("pk", "current_question_id")
+    )
+    current = {
+        key: answer for key, answer in unique.items() if open_questions.get(answer.session_id) == answer.question_id
+    }
+    stored = set(
+        UserAnswer.objects.filter(
+            attempt_id__in={attempt_id for attempt_id, _ in current},
+            question_id__in={question_id for _, question_id in current},
+        ).values_list("attempt_id", "question_id")
+    )
+    fresh = [answer for key, answer in current.items() if key not in stored]
+    user_answers = UserAnswer.objects.bulk_create(
+        [
+            UserAnswer(attempt_id=answer.attempt_id, question_id=answer.question_id, is_correct=answer.is_correct)
+            for answer in fresh
+        ]
+    )
+    through = UserAnswer.selected_options.through
+    through.objects.bulk_create(
+        [
+            through(useranswer_id=user_answer.pk, answeroption_id=option_id)
+            for user_answer, answer in zip(user_answers, fresh)
+            for option_id in answer.selected_options
+        ]
+    )
+    return [answer for key, answer in unique.items() if key not in current]
+
+
+def answer_counts(pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Answers and picks per option so far for each (session, question), in two queries."""
+    pairs = set(pairs)
+    answered = Q()
+    for session_id, question_id in pairs:
+        answered |= Q(attempt__live_player__session_id=session_id, question_id=question_id)
+
+    counts: Dict[Tuple[int, int], Dict[str, Any]] = {
+        pair: {"answers": 0, "options": defaultdict(int)} for pair in pairs
+    }
+    totals = (
+        UserAnswer.objects.filter(answered)
+        .values_list("attempt__live_player__session_id", "question_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for session_id, question_id, count in totals:
+        counts[session_id, question_id]["answers"] = count
+
+    picks = (
+        UserAnswer.selected_options.through.objects.filter(useranswer__in=UserAnswer.objects.filter(answered))
+        .values_list("useranswer__attempt__live_player__session_id", "useranswer__question_id", "answeroption_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for session_id, question_id, option_id, count in picks:
+        counts[session_id, question_id]["options"][str(option_id)] = count
+    for data in counts.values():
+        data["options"] = dict(data["options"])
+    return counts
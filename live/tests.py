@@ -0,0 +1,270 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jobs.models import Job
+from live import ingest
+from live.layers import InMemoryChannelLayer, get_channel_layer
+from live.models import LiveSession, SessionStatus
+from live.routing import websocket_router
+from live.sessions import LiveAnswer, advance_session, finish_session, join_session, save_answers
+from quiz.answer_keys import answer_key_cache
+from quiz.deadlines import expired_attempts
+from quiz.models import Quiz, QuizAttempt, UserAnswer
+from quiz.tests import correct_answers, make_quiz
+
+User = get_user_model()
+
+
+class Socket:
+    """Drives the ASGI WebSocket protocol against the live router in-process."""
+
+    def __init__(self, path, token=None):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        scope = {
+            'type': 'websocket',
+            'path': path,
+            'query_string': f'token={token}'.encode() if token else b'',
+            'headers': [],
+        }
+        self.task = asyncio.ensure_future(websocket_router(None)(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({'type': 'websocket.connect'})
+        return await asyncio.wait_for(self.outbox.get(), 5)
+
+    async def receive_json(self):
+        message = await asyncio.wait_for(self.outbox.get(), 5)
+        return json.loads(message['text'])
+
+    async def receive_type(self, kind):
+        """Next message of type ``kind``, skipping the count updates in between."""
+        message = await self.receive_json()
+        while message['type'] != kind:
+            message = await self.receive_json()
+        return message
+
+    async def send_json(self, data):
+        await self.inbox.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def close(self):
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 5)
+
+
+class ChannelLayerTests(SimpleTestCase):
+    def test_group_send_reaches_members_and_drops_oldest_when_full(self):
+        async def scenario():
+            layer = InMemoryChannelLayer(capacity=2)
+            first, second = await layer.new_channel(), await layer.new_channel()
+            await layer.group_add('room', first)
+            await layer.group_add('room', second)
+            for number in range(3):
+                await layer.group_send('room', {'number': number})
+            await layer.group_discard('room', second)
+            await layer.group_send('room', {'number': 3})
+            return (
+                [(await layer.receive(first))['number'] for _ in range(2)],
+                [(await layer.receive(second))['number'] for _ in range(2)],
+                layer.dropped,
+            )
+
+        self.assertEqual(async_to_sync(scenario)(), ([2, 3], [1, 2], 3))
+
+
+@override_settings(LIVE_ANSWER_FLUSH_INTERVAL=0.01)
+class LiveSessionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        get_channel_layer.cache_clear()
+        ingest._batcher = None
+        self.host = User.objects.create_user(username='host', password='password')
+        self.players = [User.objects.create_user(username=f'player{i}', password='password') for i in range(2)]
+        self.quiz = make_quiz(self.host, questions=2)
+        self.session = LiveSession.objects.create(quiz=self.quiz, host=self.host, code='ABC123')
+        self.path = f'/ws/live/{self.session.code}/'
+
+    def token(self, user):
+        return str(AccessToken.for_user(user))
+
+    def test_host_drives_questions_and_answers_are_batched(self):
+        answers = correct_answers(self.quiz)
+        wrong = self.quiz.questions.get(order=1).answer_options.filter(is_correct=False).values_list('pk', flat=True)
+        wrong = list(wrong[:1])
+
+        async def scenario():
+            host = Socket(self.path, self.token(self.host))
+            players = [Socket(self.path, self.token(player)) for player in self.players]
+            for socket in [host, *players]:
+                self.assertEqual((await socket.connect())['type'], 'websocket.accept')
+                self.assertEqual((await socket.receive_json())['status'], SessionStatus.LOBBY)
+
+            await host.send_json({'type': 'next'})
+            for socket in [host, *players]:
+                message = await socket.receive_json()
+                self.assertEqual(message['question']['id'], answers[0]['question'])
+                self.assertNotIn('is_correct', message['question']['answer_options'][0])
+
+            await players[0].send_json({'type': 'answer', **answers[0]})
+            await players[1].send_json({'type': 'answer', 'question': answers[0]['question'],
+                                        'selected_options': wrong})
+            for socket in players:
+                await socket.receive_type('answer_accepted')
+
+            # Both answers land in one batch and the room gets the totals.
+            counts = await host.receive_json()
+            while counts['answers'] < 2:
+                counts = await host.receive_json()
+            self.assertEqual(counts['type'], 'answer_counts')
+            self.assertEqual(sum(counts['options'].values()), 2)
+
+            await players[0].send_json({'type': 'answer', **answers[0]})
+            self.assertEqual((await players[0].receive_type('error'))['detail'], 'This question is already answered.')
+            await players[0].send_json({'type': 'next'})
+            self.assertEqual((await players[0].receive_type('error'))['detail'],
+                             'Only the host can advance the session.')
+
+            await host.send_json({'type': 'finish'})
+            finished = await host.receive_type('finished')
+            self.assertEqual([(row['username'], row['score']) for row in finished['results']],
+                             [('player0', 1), ('player1', 0)])
+            for socket in [host, *players]:
+                await socket.close()
+
+        async_to_sync(scenario)()
+
+        self.assertEqual(UserAnswer.objects.count(), 2)
+        self.assertEqual(
+            sorted(QuizAttempt.objects.values_list('score', 'max_score')), [(0, 2), (1, 2)]
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, SessionStatus.FINISHED)
+        self.assertEqual(Job.objects.count(), 4)
+
+    @override_settings(LIVE_ANSWER_FLUSH_RETRIES=1)
+    def test_failed_batches_are_retried_then_rejected(self):
+        answer = correct_answers(self.quiz)[0]
+        outcomes = [OperationalError('database is locked')] * 3 + [save_answers]
+
+        def flaky_save_answers(answers):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome(answers)
+
+        async def scenario():
+            host = Socket(self.path, self.token(self.host))
+            player = Socket(self.path, self.token(self.players[0]))
+            for socket in [host, player]:
+                await socket.connect()
+                await socket.receive_json()
+            await host.send_json({'type': 'next'})
+            await player.receive_type('question')
+
+            # Both tries fail: the player is told and may answer again.
+            await player.send_json({'type': 'answer', **answer})
+            await player.receive_type('answer_accepted')
+            rejected = await player.receive_type('answer_rejected')
+            self.assertEqual(rejected['question'], answer['question'])
+
+            # The first try fails, the retry stores it.
+            await player.send_json({'type': 'answer', **answer})
+            await player.receive_type('answer_accepted')
+            self.assertEqual((await player.receive_type('answer_counts'))['answers'], 1)
+            for socket in [host, player]:
+                await socket.close()
+
+        with mock.patch('live.ingest.save_answers', side_effect=flaky_save_answers), \
+                self.assertLogs('live.ingest', 'WARNING') as logs:
+            async_to_sync(scenario)()
+
+        self.assertEqual([record.levelname for record in logs.records], ['WARNING', 'ERROR', 'WARNING'])
+        self.assertEqual(outcomes, [])
+        self.assertEqual(UserAnswer.objects.count(), 1)
+
+    def test_answers_to_a_closed_question_are_not_stored(self):
+        attempts = [join_session(self.session, player).attempt for player in self.players]
+        first = advance_session(self.session.pk)['question']['id']
+        late = LiveAnswer(self.session.pk, attempts[0].pk, first, (), False)
+        second = advance_session(self.session.pk)['question']['id']
+        on_time = LiveAnswer(self.session.pk, attempts[1].pk, second, (), False)
+
+        counts, rejected = save_answers([late, on_time])
+
+        self.assertEqual(rejected, [late])
+        self.assertEqual(list(counts), [(self.session.pk, second)])
+        self.assertEqual(list(UserAnswer.objects.values_list('question_id', flat=True)), [second])
+
+    def test_live_attempts_are_left_to_the_session(self):
+        Quiz.objects.filter(pk=self.quiz.pk).update(is_time_limited=True, time_limit=timedelta(minutes=5))
+        attempt = join_session(self.session, self.players[0]).attempt
+        QuizAttempt.objects.filter(pk=attempt.pk).update(started_at=timezone.now() - timedelta(minutes=10))
+
+        self.assertFalse(expired_attempts(timezone.now()).filter(pk=attempt.pk).exists())
+        client = APIClient()
+        client.force_authenticate(self.players[0])
+        response = client.post(
+            reverse('quiz:quiz-submit', kwargs={'pk': self.quiz.pk}),
+            {'attempt': attempt.pk, 'answers': correct_answers(self.quiz)},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        attempt.refresh_from_db()
+        self.assertIsNone(attempt.completed_at)
+
+    def test_finishing_keeps_attempts_already_closed(self):
+        closed, running = (join_session(self.session, player).attempt for player in self.players)
+        completed_at = timezone.now() - timedelta(minutes=1)
+        QuizAttempt.objects.filter(pk=closed.pk).update(completed_at=completed_at, score=2, max_score=2)
+
+        finish_session(self.session.pk)
+
+        closed.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((closed.completed_at, closed.score), (completed_at, 2))
+        self.assertEqual((running.score, running.max_score), (0, 2))
+        self.assertIsNotNone(running.completed_at)
+
+    def test_refused_connections(self):
+        async def scenario():
+            closes = []
+            for path, token in [
+                (self.path, None),
+                (self.path, 'not-a-token'),
+                ('/ws/live/NOPE99/', self.token(self.players[0])),
+            ]:
+                socket = Socket(path, token)
+                closes.append((await socket.connect()).get('code'))
+                await socket.task
+            return closes
+
+        self.assertEqual(async_to_sync(scenario)(), [4401, 4401, 4404])
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_create_session_requires_quiz_creator(self):
+        client = APIClient()
+        client.force_authenticate(self.players[0])
+        url = reverse('live:live-session-list')
+        response = client.post(url, {'quiz': self.quiz.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_authenticate(self.host)
+        response = client.post(url, {'quiz': self.quiz.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['socket_path'], f"/ws/live/{response.data['code']}/")
+        self.assertEqual(client.get(reverse('live:live-session-detail', args=[response.data['code']])).status_code,
+                         status.HTTP_200_OK)
@@ -0,0 +1,13 @@
+from django.urls import include, path
+from rest_framework import routers
+
+from .views import LiveSessionViewSet
+
+app_name = "live"
+
+router = routers.DefaultRouter()
+router.register(r"live-sessions", LiveSessionViewSet, basename="live-session")
+
+urlpatterns = [
+    path("api/", include(router.urls)),
+]
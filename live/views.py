@@ -0,0 +1,40 @@
+from django.db import IntegrityError, transaction
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAuthenticated
+
+from .models import LiveSession
+from .serializers import LiveSessionSerializer
+from .sessions import generate_code
+
+
+@extend_schema_view(
+    create=extend_schema(
+        summary="Open a Live Session",
+        description=(
+            "Open a live session of one of your quizzes. Players and the host then connect "
+            "to the returned socket_path over WebSocket with ?token=<access token>."
+        ),
+        tags=["Live Sessions"],
+    ),
+    retrieve=extend_schema(
+        summary="Retrieve a Live Session",
+        description="Current status and question of a live session, by its join code.",
+        tags=["Live Sessions"],
+    ),
+)
+class LiveSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = LiveSession.objects.all()
+    serializer_class = LiveSessionSerializer
+    permission_classes = (IsAuthenticated,)
+    lookup_field = "code"
+
+    def perform_create(self, serializer):
+        for attempt in range(5):
+            try:
+                with transaction.atomic():
+                    serializer.save(host=self.request.user, code=generate_code())
+                return
+            except IntegrityError:
+                if attempt == 4:
+                    raise
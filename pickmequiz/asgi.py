@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pickmequiz.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up: the live session consumer uses the ORM.
+from live.routing import websocket_router  # noqa: E402
+
+application = websocket_router(django_application)
@@ -0,0 +1,130 @@
+"""
+Read replica routing for the API.
+
+``ReplicaMiddleware`` decides per request whether its reads may go to a
+replica: only safe methods outside ``REPLICA_EXCLUDED_PATHS`` qualify, and
+not within ``REPLICA_READ_YOUR_WRITES`` seconds of the client's last write.
+``ReplicaRouter`` then sends reads to the chosen replica and every write to
+the primary. Code running outside a request (workers, commands, the live
+WebSocket consumer) always uses the primary.
+"""
+
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+WRITE_COOKIE = "recent_write"
+
+
+@dataclass
+class ReadRouting:
+    replica: str
+    # Set once the request writes: its later reads must see that write.
+    wrote: bool = False
+
+
+_routing: ContextVar[Optional[ReadRouting]] = ContextVar("read_routing", default=None)
+
+
+def write_marker_key(user_id: Any) -> str:
+    return f"recent_write:{user_id}"
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.wrote:
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data, so rows read from either may be related.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        routing = self.routing_for(request)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.process_response(request, response, routing)
+
+    async def __acall__(self, request):
+        routing = self.routing_for(request)
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.process_response(request, response, routing)
+
+    def routing_for(self, request) -> Optional[ReadRouting]:
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        if request.path.startswith(tuple(settings.REPLICA_EXCLUDED_PATHS)) or WRITE_COOKIE in request.COOKIES:
+            return None
+        user_id = self.token_user_id(request)
+        if user_id is not None and caches[settings.REPLICA_CACHE].get(write_marker_key(user_id)):
+            return None
+        return ReadRouting(random.choice(settings.DATABASE_REPLICAS))
+
+    def token_user_id(self, request) -> Optional[Any]:
+        """
+        User id of the request's bearer token, read without verifying it:
+        a forged id can only move the forger's own reads to the primary.
+        """
+        parts = request.headers.get("Authorization", "").split()
+        if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+            return None
+        try:
+            return AccessToken(parts[1], verify=False).get(jwt_settings.USER_ID_CLAIM)
+        except TokenError:
+            return None
+
+    def process_response(self, request, response, routing: Optional[ReadRouting]):
+        wrote = routing.wrote if routing is not None else request.method not in SAFE_METHODS
+        if not wrote or response.status_code >= 400:
+            return response
+        window = settings.REPLICA_READ_YOUR_WRITES
+        response.set_cookie(WRITE_COOKIE, "1", max_age=window, httponly=True, samesite="Lax")
+        # DRF stores the user it authenticated on the request as well.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            caches[settings.REPLICA_CACHE].set(write_marker_key(user.pk), True, window)
+        return response
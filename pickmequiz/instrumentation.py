@@ -0,0 +1,142 @@
+"""
+Per-request query count and timing for resolved views.
+
+``InstrumentationMiddleware`` measures each request's SQL queries, time in
+the database, time building serializer data (``serializer.data``,
+including the queries it triggers) and total time. The figures are sent
+back in a ``Server-Timing`` header and logged as one line to the
+``pickmequiz.instrumentation`` logger, at warning level when the view ran
+more queries than its budget (``INSTRUMENTATION_QUERY_BUDGETS`` by view
+name, else ``INSTRUMENTATION_QUERY_BUDGET``).
+
+With ``INSTRUMENTATION_ENABLED`` off the middleware removes itself at
+startup and no hook is installed, so it costs nothing.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db: float = 0.0
+    serialize: float = 0.0
+    serializing: bool = False
+
+
+_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db += time.perf_counter() - started
+
+
+def instrument_connection(connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+_serializer_data = BaseSerializer.data
+
+
+def _timed_serializer_data(self):
+    metrics = _metrics.get()
+    # Nested and list serializers reach here again from the outermost one.
+    if metrics is None or metrics.serializing:
+        return _serializer_data.fget(self)
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        return _serializer_data.fget(self)
+    finally:
+        metrics.serialize += time.perf_counter() - started
+        metrics.serializing = False
+
+
+def install_hooks() -> None:
+    """Time queries on every connection and ``BaseSerializer.data``; idempotent."""
+    connection_created.connect(instrument_connection, dispatch_uid="pickmequiz.instrumentation")
+    BaseSerializer.data = property(_timed_serializer_data)
+
+
+def query_budget(view_name: str) -> int:
+    return settings.INSTRUMENTATION_QUERY_BUDGETS.get(view_name, settings.INSTRUMENTATION_QUERY_BUDGET)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        install_hooks()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def start(self):
+        # Connections opened before the hooks were installed.
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+        metrics = RequestMetrics()
+        return metrics, _metrics.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics: RequestMetrics, started: float):
+        match = request.resolver_match
+        if match is None:
+            return response
+        total = (time.perf_counter() - started) * 1000
+        db, serialize = metrics.db * 1000, metrics.serialize * 1000
+        response["Server-Timing"] = (
+            f'db;dur={db:.1f};desc="{metrics.queries} queries", serialize;dur={serialize:.1f}, total;dur={total:.1f}'
+        )
+
+        budget = query_budget(match.view_name)
+        line = (
+            f"view={match.view_name} method={request.method} status={response.status_code} "
+            f"queries={metrics.queries} budget={budget} db_ms={db:.1f} serialize_ms={serialize:.1f} "
+            f"total_ms={total:.1f}"
+        )
+        logger.log(logging.WARNING if metrics.queries > budget else logging.INFO, line)
+        return response
@@ -51,15 +51,19 @@ INSTALLED_APPS = [
     "drf_spectacular",
     "users",
     "quiz",
+    "jobs",
+    "live",
 ]
 
 MIDDLEWARE = [
+    "pickmequiz.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "pickmequiz.db_routers.ReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -87,24 +91,96 @@ WSGI_APPLICATION = "pickmequiz.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# DATABASE_ENGINE=postgresql switches to the POSTGRES_* settings below; SQLite is for
+# development and tests.
+#
+# Connection reuse per worker model:
+# - WSGI (processes x threads): every thread keeps its own connection for
+#   DB_CONN_MAX_AGE seconds, checked before reuse with DB_CONN_HEALTH_CHECKS, so the
+#   server holds up to processes x threads connections. Size max_connections for that.
+# - ASGI (pickmequiz.asgi): sync ORM calls run on executor threads rather than the
+#   request's thread, so persistent connections are not reliably retired by the
+#   request cycle and Django advises against them. Set DB_POOL=1 instead (psycopg 3
+#   with the pool extra, psycopg[binary,pool]), which returns connections to a
+#   per-process pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE.
+#   The pool replaces persistent connections, so DB_CONN_MAX_AGE is ignored with it.
+# Put PgBouncer in front when processes x pool size outgrows max_connections.
+DATABASE_ENGINE = env.str("DATABASE_ENGINE", "sqlite3")
+
+if DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": env.str("POSTGRES_DB"),
+            "USER": env.str("POSTGRES_USER"),
+            "PASSWORD": env.str("POSTGRES_PASSWORD"),
+            "HOST": env.str("POSTGRES_HOST"),
+            "PORT": env.int("POSTGRES_PORT", 5432),
+            "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", 60),
+            "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", True),
+            "OPTIONS": {
+                "connect_timeout": env.int("DB_CONNECT_TIMEOUT", 5),
+            },
+        }
+    }
+    if env.bool("DB_POOL", False):
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": env.int("DB_POOL_MIN_SIZE", 2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", 10),
+            "timeout": env.float("DB_POOL_TIMEOUT", 10.0),
+        }
+    replica_hosts = env.list("POSTGRES_REPLICA_HOSTS", [])
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            # A file rather than memory, so threads in tests (job workers) wait for
+            # each other's locks like they do in production instead of failing.
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+            # Take the write lock when a transaction begins: a deferred transaction that
+            # reads and then writes (such as a job claim) fails at once on a lock held by
+            # another connection instead of waiting for it.
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        }
+    }
+    # A copy of db.sqlite3 standing in for a replica, to try the routing locally.
+    replica_hosts = []
+    if env.str("SQLITE_REPLICA", None):
+        DATABASES["replica"] = {**DATABASES["default"], "NAME": env.str("SQLITE_REPLICA")}
+
+# Read-only API requests are served from the replicas (pickmequiz.db_routers); writes,
+# the admin and reads shortly after a client's own write stay on the primary.
+for number, host in enumerate(replica_hosts, start=1):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["pickmequiz.db_routers.ReplicaRouter"]
+# Seconds after a write during which the writer's reads go to the primary, to cover
+# replication lag. Tracked with a cookie and, for authenticated users, a cache marker.
+REPLICA_READ_YOUR_WRITES = env.int("REPLICA_READ_YOUR_WRITES", 10)
+REPLICA_CACHE = env.str("REPLICA_CACHE", "default")
+REPLICA_EXCLUDED_PATHS = ["/admin/"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": env.str(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": env.str("CACHE_LOCATION", "pickmequiz"),
     }
 }
 
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': env.str('POSTGRES_DB'),
-#         'USER': env.str('POSTGRES_USER'),
-#         'PASSWORD': env.str('POSTGRES_PASSWORD'),
-#         'HOST': env.str('POSTGRES_HOST'),
-#         'PORT': env.int('POSTGRES_PORT'),
-#     }
-# }
-
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,11 +231,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # Reverse proxies in front of the app. Throttles key clients by the address this many
+    # hops from the right of X-Forwarded-For; with 0 the header is ignored, since clients
+    # can set it to anything.
+    "NUM_PROXIES": env.int("NUM_PROXIES", 0),
 }
 
 # SIMPLE JWT
@@ -178,6 +258,105 @@ SIMPLE_JWT = {
     "JWT_AUTH_COOKIE_SAMESITE": "Lax",
 }
 
+# AUTH THROTTLING
+
+# Login, registration and token refresh requests allowed per window ("n/s|min|hour|day").
+# Over the limit they are refused before any password hashing; None disables a limit.
+AUTH_THROTTLE_RATES = {
+    "login_ip": env.str("AUTH_THROTTLE_LOGIN_IP", "30/min"),
+    "login_username": env.str("AUTH_THROTTLE_LOGIN_USERNAME", "5/min"),
+    "register_ip": env.str("AUTH_THROTTLE_REGISTER_IP", "10/hour"),
+    "refresh_ip": env.str("AUTH_THROTTLE_REFRESH_IP", "60/min"),
+}
+# Cache alias holding the request history; use a shared cache when running several nodes.
+AUTH_THROTTLE_CACHE = env.str("AUTH_THROTTLE_CACHE", "default")
+# Users of authenticated requests are cached this many seconds; saving a user drops its entry.
+AUTH_USER_CACHE = env.str("AUTH_USER_CACHE", "default")
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", 60)
+# Refresh tokens are only looked up in the blacklist when a per-process Bloom filter of
+# blacklisted jtis might contain them. Its generation counter lives in this cache alias:
+# with a per-process cache, other processes see new blacklist entries after MAX_AGE seconds.
+AUTH_BLACKLIST_FILTER = env.bool("AUTH_BLACKLIST_FILTER", True)
+AUTH_BLACKLIST_CACHE = env.str("AUTH_BLACKLIST_CACHE", "default")
+AUTH_BLACKLIST_FILTER_MAX_AGE = env.int("AUTH_BLACKLIST_FILTER_MAX_AGE", 300)
+AUTH_BLACKLIST_FILTER_CAPACITY = env.int("AUTH_BLACKLIST_FILTER_CAPACITY", 10000)
+AUTH_BLACKLIST_FILTER_ERROR_RATE = env.float("AUTH_BLACKLIST_FILTER_ERROR_RATE", 0.01)
+# Expired outstanding tokens are deleted this many per transaction by prune_tokens.
+AUTH_TOKEN_PRUNE_BATCH_SIZE = env.int("AUTH_TOKEN_PRUNE_BATCH_SIZE", 1000)
+AUTH_TOKEN_PRUNE_INTERVAL = env.int("AUTH_TOKEN_PRUNE_INTERVAL", 3600)
+
+
+# QUIZ
+
+QUIZ_ANSWER_KEY_CACHE_SIZE = env.int("QUIZ_ANSWER_KEY_CACHE_SIZE", 1024)
+QUIZ_LEADERBOARD_CACHE = env.str("QUIZ_LEADERBOARD_CACHE", "default")
+QUIZ_LEADERBOARD_CACHE_TIMEOUT = env.int("QUIZ_LEADERBOARD_CACHE_TIMEOUT", 300)
+QUIZ_LEADERBOARD_MAX_LIMIT = 100
+QUIZ_IMPORT_BATCH_SIZE = env.int("QUIZ_IMPORT_BATCH_SIZE", 500)
+QUIZ_DETAIL_CACHE = env.str("QUIZ_DETAIL_CACHE", "default")
+QUIZ_DETAIL_CACHE_TIMEOUT = env.int("QUIZ_DETAIL_CACHE_TIMEOUT", 3600)
+# Dotted path to a quiz.search.SearchBackend; picked from the database vendor when unset.
+QUIZ_SEARCH_BACKEND = env.str("QUIZ_SEARCH_BACKEND", None)
+# Serve quiz list, detail and submit from the native async views (quiz.async_views).
+# Only worth it under ASGI: under WSGI every async view runs in its own event loop.
+QUIZ_ASYNC_VIEWS = env.bool("QUIZ_ASYNC_VIEWS", False)
+# Resized copies of uploaded avatars and question photos: name -> longest side in pixels.
+QUIZ_IMAGE_VARIANTS = {"thumbnail": 160, "medium": 800}
+QUIZ_IMAGE_QUALITY = env.int("QUIZ_IMAGE_QUALITY", 80)
+# Seconds a time-limited attempt may be submitted past its limit, for network delays.
+QUIZ_ATTEMPT_GRACE = env.int("QUIZ_ATTEMPT_GRACE", 5)
+# Open attempts of quizzes without a time limit are expired after this many seconds.
+QUIZ_ATTEMPT_ABANDON_AFTER = env.int("QUIZ_ATTEMPT_ABANDON_AFTER", 86400)
+QUIZ_ATTEMPT_EXPIRY_BATCH_SIZE = env.int("QUIZ_ATTEMPT_EXPIRY_BATCH_SIZE", 500)
+QUIZ_ATTEMPT_EXPIRY_INTERVAL = env.int("QUIZ_ATTEMPT_EXPIRY_INTERVAL", 60)
+
+
+# JOBS
+
+# Run jobs in-process right after the enqueuing transaction commits, with no worker.
+JOBS_EAGER = env.bool("JOBS_EAGER", False)
+JOBS_CONCURRENCY = env.int("JOBS_CONCURRENCY", 2)
+JOBS_POLL_INTERVAL = env.float("JOBS_POLL_INTERVAL", 1.0)
+JOBS_MAX_ATTEMPTS = env.int("JOBS_MAX_ATTEMPTS", 5)
+# Retry n waits min(base * 2**(n-1), max) seconds plus up to base seconds of jitter.
+JOBS_BACKOFF_BASE = env.int("JOBS_BACKOFF_BASE", 10)
+JOBS_BACKOFF_MAX = env.int("JOBS_BACKOFF_MAX", 3600)
+# Workers refresh the lock of the jobs they run every JOBS_HEARTBEAT_INTERVAL seconds;
+# running jobs without a heartbeat for JOBS_LOCK_TIMEOUT seconds are assumed lost and requeued.
+JOBS_HEARTBEAT_INTERVAL = env.float("JOBS_HEARTBEAT_INTERVAL", 60.0)
+JOBS_LOCK_TIMEOUT = env.int("JOBS_LOCK_TIMEOUT", 900)
+JOBS_DELETE_SUCCEEDED = env.bool("JOBS_DELETE_SUCCEEDED", True)
+
+
+# LIVE
+
+# WebSocket live sessions are served by pickmequiz.asgi only.
+# The in-memory layer only reaches sockets of the same worker process.
+LIVE_CHANNEL_LAYER = env.str("LIVE_CHANNEL_LAYER", "live.layers.InMemoryChannelLayer")
+LIVE_CHANNEL_LAYER_OPTIONS = {"capacity": env.int("LIVE_CHANNEL_CAPACITY", 100)}
+# Answers are written in batches of up to this size, at most this many seconds late.
+LIVE_ANSWER_BATCH_SIZE = env.int("LIVE_ANSWER_BATCH_SIZE", 500)
+LIVE_ANSWER_FLUSH_INTERVAL = env.float("LIVE_ANSWER_FLUSH_INTERVAL", 0.25)
+# A batch that fails to write is retried this many times before its players are told.
+LIVE_ANSWER_FLUSH_RETRIES = env.int("LIVE_ANSWER_FLUSH_RETRIES", 3)
+
+
+# INSTRUMENTATION
+
+# Query count, DB, serializer and total time of every resolved view, sent in a
+# Server-Timing header and logged by the pickmequiz.instrumentation logger (INFO, or
+# WARNING above the view's query budget). Off, the middleware is not loaded at all.
+INSTRUMENTATION_ENABLED = env.bool("INSTRUMENTATION_ENABLED", False)
+INSTRUMENTATION_QUERY_BUDGET = env.int("INSTRUMENTATION_QUERY_BUDGET", 20)
+# Tighter budgets for the hot endpoints, by URL name.
+INSTRUMENTATION_QUERY_BUDGETS = {
+    "quiz:quiz-list": 5,
+    "quiz:quiz-detail": 6,
+    "quiz:quiz-leaderboard": 6,
+    "quiz:quiz-submit": 20,
+    "users:profile": 4,
+}
+
 
 # CORS
 
@@ -1,5 +1,37 @@
 from django.contrib import admin
+from django.db.models import Prefetch
+from django.forms.models import BaseInlineFormSet
 from .models import Quiz, Question, AnswerOption, QuizAttempt, UserAnswer
+from .signals import touch_quiz
+from .stats import rebuild_quiz_stats
+
+
+class SelectedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """
+    Related filter that only lists the selected object instead of the whole
+    related table. Pick a value through search or a filtered URL; the sidebar
+    then offers a way back to "All".
+    """
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        return field.get_choices(include_blank=False, limit_choices_to={'pk__in': self.lookup_val})
+
+    def has_output(self):
+        return bool(self.lookup_val)
+
+
+class CappedInlineFormSet(BaseInlineFormSet):
+    """Render only the first ``max_rows`` rows of a read-only inline."""
+
+    max_rows = 50
+
+    def get_queryset(self):
+        if not hasattr(self, '_capped_queryset'):
+            self._capped_queryset = super().get_queryset()[:self.max_rows]
+        return self._capped_queryset
+
 
 class AnswerOptionInline(admin.TabularInline):
     model = AnswerOption
@@ -16,7 +48,9 @@ class QuestionInline(admin.TabularInline):
 class QuizAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'creator', 'created_at', 'is_time_limited')
     list_filter = ('is_time_limited', 'category', 'created_at')
+    list_select_related = ('creator',)
     search_fields = ('title', 'description')
+    autocomplete_fields = ('creator',)
     inlines = [QuestionInline]
 
     def save_model(self, request, obj, form, change):
@@ -27,15 +61,28 @@ class QuizAdmin(admin.ModelAdmin):
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('title', 'quiz', 'answer_type', 'order')
-    list_filter = ('quiz', 'answer_type')
-    search_fields = ('title',)
+    list_filter = (('quiz', SelectedRelatedFieldListFilter), 'answer_type')
+    list_select_related = ('quiz',)
+    search_fields = ('title', 'quiz__title')
+    autocomplete_fields = ('quiz',)
     inlines = [AnswerOptionInline]
 
 
     ordering = ('quiz', 'order')
 
+    def get_queryset(self, request):
+        # The change page title renders "Question N for Quiz <title>".
+        return super().get_queryset(request).select_related('quiz')
+
+    def delete_queryset(self, request, queryset):
+        quiz_ids = set(queryset.values_list('quiz_id', flat=True))
+        super().delete_queryset(request, queryset)
+        touch_quiz(pk__in=quiz_ids)
+        rebuild_quiz_stats.enqueue(sorted(quiz_ids))
+
 class UserAnswerInline(admin.TabularInline):
     model = UserAnswer
+    formset = CappedInlineFormSet
     readonly_fields = ('question', 'selected_options', 'answered_at')
     can_delete = False
     extra = 0
@@ -43,9 +90,28 @@ class UserAnswerInline(admin.TabularInline):
     def has_add_permission(self, request, obj):
         return False
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related('question__quiz')
+            .prefetch_related(
+                Prefetch(
+                    'selected_options',
+                    queryset=AnswerOption.objects.select_related('question__quiz'),
+                )
+            )
+        )
+
 
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ('user', 'quiz', 'started_at', 'completed_at')
-    list_filter = ('quiz', 'started_at')
-    inlines = [UserAnswerInline]
\ No newline at end of file
+    list_filter = (('quiz', SelectedRelatedFieldListFilter), 'started_at')
+    list_select_related = ('user', 'quiz')
+    search_fields = ('user__username', 'quiz__title')
+    autocomplete_fields = ('user', 'quiz')
+    inlines = [UserAnswerInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'quiz')
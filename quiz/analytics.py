@@ -0,0 +1,128 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Prefetch, Q, Value, When
+
+from jobs.queue import task
+
+from .models import AnswerOption, AnswerOptionStats, Question, QuestionStats, UserAnswer
+
+
+def record_answers(graded_answers) -> None:
+    """
+    Fold one completed attempt into the per-question and per-option rollups
+    with a fixed number of statements, whatever the number of answers.
+    """
+    question_ids = [answer.question_id for answer in graded_answers]
+    correct_ids = [answer.question_id for answer in graded_answers if answer.is_correct]
+    picked_ids = [option_id for answer in graded_answers for option_id in answer.selected_options]
+    if not question_ids:
+        return
+
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=pk) for pk in question_ids], ignore_conflicts=True
+    )
+    QuestionStats.objects.filter(pk__in=question_ids).update(
+        answer_count=F("answer_count") + 1,
+        correct_count=F("correct_count")
+        + Case(When(pk__in=correct_ids, then=Value(1)), default=Value(0)),
+    )
+    if picked_ids:
+        AnswerOptionStats.objects.bulk_create(
+            [AnswerOptionStats(option_id=pk) for pk in picked_ids], ignore_conflicts=True
+        )
+        AnswerOptionStats.objects.filter(pk__in=picked_ids).update(pick_count=F("pick_count") + 1)
+
+
+@task
+def rebuild_question_analytics(quiz_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the rollups with one GROUP BY pass over answers and one over picks."""
+    answers = UserAnswer.objects.filter(attempt__completed_at__isnull=False)
+    picks = UserAnswer.selected_options.through.objects.filter(
+        useranswer__attempt__completed_at__isnull=False
+    )
+    question_stats = QuestionStats.objects.all()
+    option_stats = AnswerOptionStats.objects.all()
+    if quiz_ids is not None:
+        quiz_ids = list(quiz_ids)
+        answers = answers.filter(question__quiz_id__in=quiz_ids)
+        picks = picks.filter(answeroption__question__quiz_id__in=quiz_ids)
+        question_stats = question_stats.filter(question__quiz_id__in=quiz_ids)
+        option_stats = option_stats.filter(option__question__quiz_id__in=quiz_ids)
+
+    question_rows = answers.values("question_id").annotate(
+        answers=Count("id"), correct=Count("id", filter=Q(is_correct=True))
+    )
+    pick_rows = picks.values("answeroption_id").annotate(picks=Count("id"))
+
+    with transaction.atomic():
+        question_stats.delete()
+        option_stats.delete()
+        created = QuestionStats.objects.bulk_create(
+            [
+                QuestionStats(
+                    question_id=row["question_id"],
+                    answer_count=row["answers"],
+                    correct_count=row["correct"],
+                )
+                for row in question_rows.iterator()
+            ],
+            batch_size=1000,
+        )
+        AnswerOptionStats.objects.bulk_create(
+            [
+                AnswerOptionStats(option_id=row["answeroption_id"], pick_count=row["picks"])
+                for row in pick_rows.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def _rate(count: int, total: int) -> Optional[float]:
+    return count / total if total else None
+
+
+def quiz_analytics(quiz) -> List[Dict[str, Any]]:
+    """Read the rollups of every question of a quiz in two queries."""
+    questions = (
+        Question.objects.filter(quiz=quiz)
+        .select_related("stats")
+        .prefetch_related(
+            Prefetch(
+                "answer_options",
+                queryset=AnswerOption.objects.select_related("stats").order_by("pk"),
+            )
+        )
+    )
+
+    result = []
+    for question in questions:
+        stats = getattr(question, "stats", None)
+        answer_count = stats.answer_count if stats else 0
+        correct_count = stats.correct_count if stats else 0
+        options = []
+        for option in question.answer_options.all():
+            option_stats = getattr(option, "stats", None)
+            pick_count = option_stats.pick_count if option_stats else 0
+            options.append(
+                {
+                    "id": option.pk,
+                    "text": option.text,
+                    "is_correct": option.is_correct,
+                    "pick_count": pick_count,
+                    "pick_rate": _rate(pick_count, answer_count),
+                }
+            )
+        result.append(
+            {
+                "id": question.pk,
+                "title": question.title,
+                "order": question.order,
+                "answer_count": answer_count,
+                "correct_count": correct_count,
+                "correct_rate": _rate(correct_count, answer_count),
+                "answer_options": options,
+            }
+        )
+    return result
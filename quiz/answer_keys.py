@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+from .grading import AnswerKey, abuild_answer_key, build_answer_key
+
+
+class AnswerKeyCache:
+    """
+    Process-local LRU cache of quiz answer keys.
+
+    Entries are versioned by ``Quiz.last_modified``: a lookup with a newer
+    timestamp than the cached one is a miss and replaces the stale key.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, Tuple[datetime, AnswerKey]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, quiz_id: int, last_modified: datetime) -> AnswerKey:
+        answer_key = self._lookup(quiz_id, last_modified)
+        if answer_key is None:
+            answer_key = build_answer_key(quiz_id)
+            self._store(quiz_id, last_modified, answer_key)
+        return answer_key
+
+    async def aget(self, quiz_id: int, last_modified: datetime) -> AnswerKey:
+        answer_key = self._lookup(quiz_id, last_modified)
+        if answer_key is None:
+            answer_key = await abuild_answer_key(quiz_id)
+            self._store(quiz_id, last_modified, answer_key)
+        return answer_key
+
+    def _lookup(self, quiz_id: int, last_modified: datetime) -> Optional[AnswerKey]:
+        with self._lock:
+            entry = self._entries.get(quiz_id)
+            if entry is not None and entry[0] == last_modified:
+                self._entries.move_to_end(quiz_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def _store(self, quiz_id: int, last_modified: datetime, answer_key: AnswerKey) -> None:
+        with self._lock:
+            current = self._entries.get(quiz_id)
+            if current is None or current[0] <= last_modified:
+                self._entries[quiz_id] = (last_modified, answer_key)
+                self._entries.move_to_end(quiz_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, quiz_id: int) -> None:
+        with self._lock:
+            self._entries.pop(quiz_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+answer_key_cache = AnswerKeyCache(settings.QUIZ_ANSWER_KEY_CACHE_SIZE)
+
+
+def get_answer_key(quiz) -> AnswerKey:
+    return answer_key_cache.get(quiz.pk, quiz.last_modified)
+
+
+async def aget_answer_key(quiz) -> AnswerKey:
+    return await answer_key_cache.aget(quiz.pk, quiz.last_modified)
@@ -0,0 +1,179 @@
+"""
+Native async versions of the hottest quiz endpoints, mounted instead of the
+DRF viewset routes when ``QUIZ_ASYNC_VIEWS`` is on (serve with ASGI then).
+
+They answer the common JSON requests with the async ORM and async cache API
+and produce the same payloads as ``QuizViewSet``. Everything else (writes
+other than submit, the browsable API, search, page-number pagination,
+anonymous requests) is handed to the viewset unchanged.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import aprefetch_related_objects
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from users.authentication import CachedJWTAuthentication
+
+from .answer_keys import aget_answer_key
+from .deadlines import open_attempt
+from .grading import record_attempt
+from .models import Quiz
+from .pagination import KeysetPagination
+from .serializers import AttemptResultSerializer, AttemptSubmitSerializer
+from .views import (
+    QuizViewSet,
+    detail_cache_key,
+    detail_validators,
+    set_detail_headers,
+)
+
+_jwt = CachedJWTAuthentication()
+_renderer = JSONRenderer()
+
+sync_list = QuizViewSet.as_view({"get": "list", "post": "create"})
+sync_detail = QuizViewSet.as_view(
+    {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+)
+sync_submit = QuizViewSet.as_view({"post": "submit"}, detail=True)
+
+
+async def aauthenticate(request: HttpRequest) -> Optional[Any]:
+    """``JWTAuthentication.authenticate`` with the user loaded through the async ORM."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt.get_raw_token(header)
+    if raw_token is None:
+        return None
+    return await aget_token_user(raw_token)
+
+
+async def aget_token_user(raw_token: bytes) -> Any:
+    """Validate a raw access token and load its active user through the user cache and async ORM."""
+    return await _jwt.aget_user(_jwt.get_validated_token(raw_token))
+
+
+def _json(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+    return HttpResponse(
+        _renderer.render(data), status=status, headers=headers, content_type="application/json"
+    )
+
+
+def _error(request: HttpRequest, exc: APIException) -> HttpResponse:
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        exc.auth_header = _jwt.authenticate_header(request)
+    response = exception_handler(exc, {})
+    headers = {name: value for name, value in response.items() if name.lower() != "content-type"}
+    return _json(response.data, response.status_code, headers)
+
+
+def _needs_sync(request: HttpRequest) -> bool:
+    # Content negotiation beyond plain JSON stays with DRF.
+    return "text/html" in request.headers.get("Accept", "") or "format" in request.GET
+
+
+def _viewset(request: HttpRequest, user, action: str, **kwargs) -> QuizViewSet:
+    drf_request = Request(request)
+    drf_request.user = user
+    return QuizViewSet(request=drf_request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+
+
+@csrf_exempt
+async def quiz_list(request: HttpRequest, **kwargs) -> HttpResponse:
+    if request.method != "GET" or _needs_sync(request) or {"search", "page"} & request.GET.keys():
+        return await sync_to_async(sync_list)(request, **kwargs)
+    try:
+        user = await aauthenticate(request)
+        if user is None:
+            return await sync_to_async(sync_list)(request, **kwargs)
+
+        view = _viewset(request, user, "list")
+        queryset = view.filter_queryset(view._list_queryset())
+        paginator = KeysetPagination()
+        rows = [quiz async for quiz in paginator.page_queryset(queryset, view.request, view)]
+        paginator.set_page(rows)
+    except APIException as exc:
+        return _error(request, exc)
+
+    data = view.get_serializer(paginator.page, many=True).data
+    return _json(paginator.get_paginated_response(data).data)
+
+
+@csrf_exempt
+async def quiz_detail(request: HttpRequest, pk: int, **kwargs) -> HttpResponse:
+    if request.method not in ("GET", "HEAD") or _needs_sync(request):
+        return await sync_to_async(sync_detail)(request, pk=pk, **kwargs)
+    try:
+        user = await aauthenticate(request)
+        if user is None:
+            return await sync_to_async(sync_detail)(request, pk=pk, **kwargs)
+
+        view = _viewset(request, user, "retrieve", pk=pk)
+        # The creator is needed by the object permission check.
+        quiz = await Quiz.objects.select_related("creator").filter(pk=pk).afirst()
+        if quiz is None:
+            raise NotFound("No Quiz matches the given query.")
+        view.check_permissions(view.request)
+        view.check_object_permissions(view.request, quiz)
+    except APIException as exc:
+        return _error(request, exc)
+
+    etag, last_modified = detail_validators(quiz)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cache = caches[settings.QUIZ_DETAIL_CACHE]
+        key = detail_cache_key(quiz, request.get_host())
+        content = await cache.aget(key)
+        if content is None:
+            await aprefetch_related_objects([quiz], "questions__answer_options")
+            content = _renderer.render(view.get_serializer(quiz).data)
+            await cache.aset(key, content, settings.QUIZ_DETAIL_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type="application/json")
+    return set_detail_headers(response, etag, last_modified)
+
+
+@csrf_exempt
+async def quiz_submit(request: HttpRequest, pk: int, **kwargs) -> HttpResponse:
+    if request.method != "POST" or _needs_sync(request) or request.content_type != "application/json":
+        return await sync_to_async(sync_submit)(request, pk=pk, **kwargs)
+    try:
+        user = await aauthenticate(request)
+        if user is None:
+            raise NotAuthenticated()
+        quiz = await Quiz.objects.filter(pk=pk).afirst()
+        if quiz is None:
+            raise NotFound("No Quiz matches the given query.")
+        answer_key = await aget_answer_key(quiz)
+
+        try:
+            data = json.loads(request.body)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+        serializer = AttemptSubmitSerializer(data=data, context={"answer_key": answer_key})
+        serializer.is_valid(raise_exception=True)
+        attempt = await sync_to_async(open_attempt)(quiz, user, serializer.validated_data.get("attempt"))
+
+        # The async ORM has no transactions: the write runs as one sync call.
+        attempt = await sync_to_async(record_attempt)(
+            quiz, user, answer_key, serializer.validated_data["answers"], attempt=attempt
+        )
+    except APIException as exc:
+        return _error(request, exc)
+    return _json(AttemptResultSerializer(attempt).data, status=201)
@@ -0,0 +1,151 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from jobs.models import Job, JobStatus
+from jobs.queue import current_job, task
+from users.stats import record_quizzes_passed
+
+from .leaderboard import record_scores
+from .models import Question, Quiz, QuizAttempt, UserAnswer
+from .stats import record_attempts_completed, score_percent_expression
+
+
+class AttemptClosed(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This attempt is already closed."
+    default_code = "attempt_closed"
+
+
+def attempt_deadline(quiz: Quiz, started_at: datetime) -> Optional[datetime]:
+    if not quiz.is_time_limited or not quiz.time_limit:
+        return None
+    return started_at + quiz.time_limit
+
+
+def open_attempt(quiz: Quiz, user, attempt_id: Optional[int], now: Optional[datetime] = None) -> Optional[QuizAttempt]:
+    """
+    The started attempt a submission completes, checked with one primary key
+    lookup before any grading: it must be the user's, still open and within
+    the time limit plus ``QUIZ_ATTEMPT_GRACE``. Time-limited quizzes can only
+    be submitted through a started attempt. Attempts of live session players
+    are completed by their session, never here.
+    """
+    if attempt_id is None:
+        if attempt_deadline(quiz, timezone.now()) is not None:
+            raise ValidationError({"attempt": ["This quiz is time limited: start an attempt first."]})
+        return None
+
+    attempt = QuizAttempt.objects.filter(pk=attempt_id, quiz=quiz, user=user, live_player__isnull=True).first()
+    if attempt is None:
+        raise NotFound("No open attempt matches the given id.")
+    if attempt.completed_at is not None:
+        raise AttemptClosed()
+    deadline = attempt_deadline(quiz, attempt.started_at)
+    now = now or timezone.now()
+    if deadline is not None and now > deadline + timedelta(seconds=settings.QUIZ_ATTEMPT_GRACE):
+        raise AttemptClosed("The time limit of this attempt has passed.")
+    return attempt
+
+
+def expired_attempts(now: datetime) -> QuerySet:
+    """
+    Open attempts past their time limit plus the grace period, or older than
+    ``QUIZ_ATTEMPT_ABANDON_AFTER``. The leading range on (completed_at,
+    started_at) keeps the scan to open attempts older than the grace period.
+    Live session attempts are left to ``live.sessions.finish_session``.
+    """
+    grace = timedelta(seconds=settings.QUIZ_ATTEMPT_GRACE)
+    return (
+        QuizAttempt.objects.filter(completed_at__isnull=True, started_at__lt=now - grace, live_player__isnull=True)
+        .annotate(deadline=ExpressionWrapper(F("started_at") + F("quiz__time_limit"), output_field=DateTimeField()))
+        .filter(
+            Q(quiz__is_time_limited=True, deadline__lt=now - grace)
+            | Q(started_at__lt=now - timedelta(seconds=settings.QUIZ_ATTEMPT_ABANDON_AFTER))
+        )
+    )
+
+
+@task
+def expire_attempts(batch_size: Optional[int] = None, reschedule: bool = False) -> int:
+    """
+    Complete and grade every expired open attempt, ``batch_size`` attempts
+    per transaction. With ``reschedule`` the job enqueues its next run
+    ``QUIZ_ATTEMPT_EXPIRY_INTERVAL`` seconds later.
+    """
+    batch_size = batch_size or settings.QUIZ_ATTEMPT_EXPIRY_BATCH_SIZE
+    now = timezone.now()
+    expired = 0
+    while True:
+        ids = list(expired_attempts(now).order_by("started_at").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        expired += _expire_batch(ids, now)
+
+    if reschedule:
+        schedule_expire_attempts(batch_size)
+    return expired
+
+
+def schedule_expire_attempts(batch_size: Optional[int] = None) -> Optional[Job]:
+    """Enqueue the next recurring ``expire_attempts`` run, unless another one is queued or running."""
+    name = f"{expire_attempts.__module__}.{expire_attempts.__qualname__}"
+    pending = Job.objects.filter(name=name, status__in=(JobStatus.QUEUED, JobStatus.RUNNING))
+    job = current_job()
+    if job is not None:
+        # The run rescheduling itself.
+        pending = pending.exclude(pk=job.pk)
+    if pending.exists():
+        return None
+    run_at = timezone.now() + timedelta(seconds=settings.QUIZ_ATTEMPT_EXPIRY_INTERVAL)
+    return expire_attempts.enqueue(batch_size=batch_size, reschedule=True, run_at=run_at)
+
+
+def _expire_batch(ids: List[int], now: datetime) -> int:
+    """
+    Grade a batch from the answers stored so far with one UPDATE, then fold
+    it into the statistics, leaderboard and user stats in bulk.
+    """
+    correct = (
+        UserAnswer.objects.filter(attempt=OuterRef("pk"), is_correct=True)
+        .order_by()
+        .values("attempt")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    questions = (
+        Question.objects.filter(quiz=OuterRef("quiz"))
+        .order_by()
+        .values("quiz")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    with transaction.atomic():
+        # Attempts submitted since the ids were read keep their submission.
+        QuizAttempt.objects.filter(pk__in=ids, completed_at__isnull=True).update(
+            completed_at=now,
+            score=Coalesce(Subquery(correct), Value(0)),
+            max_score=Coalesce(Subquery(questions), Value(0)),
+        )
+        rows = list(
+            QuizAttempt.objects.filter(pk__in=ids, completed_at=now)
+            .annotate(percent=score_percent_expression())
+            .values_list("quiz_id", "user_id", "percent")
+        )
+
+        totals = defaultdict(lambda: [0, 0.0])
+        for quiz_id, _, percent in rows:
+            totals[quiz_id][0] += 1
+            totals[quiz_id][1] += percent
+        for quiz_id, (count, percent_sum) in totals.items():
+            record_attempts_completed(quiz_id, count, percent_sum)
+        record_quizzes_passed(record_scores((quiz_id, user_id, percent, now) for quiz_id, user_id, percent in rows))
+    return len(rows)
@@ -0,0 +1,166 @@
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.db.models import Prefetch, QuerySet
+
+from .models import AnswerOption, Quiz, QuizAttempt, UserAnswer
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    columns: List[str]
+    queryset: Callable[[], QuerySet]
+    watermark: str
+    row: Callable[[Any], List[Any]]
+
+
+def _answer_queryset() -> QuerySet:
+    return UserAnswer.objects.prefetch_related(
+        Prefetch("selected_options", queryset=AnswerOption.objects.only("id"))
+    )
+
+
+DATASETS: Dict[str, Dataset] = {
+    "quizzes": Dataset(
+        columns=[
+            "id",
+            "title",
+            "description",
+            "category",
+            "is_time_limited",
+            "time_limit",
+            "created_at",
+            "creator_id",
+            "last_modified",
+        ],
+        queryset=Quiz.objects.all,
+        watermark="last_modified",
+        row=lambda quiz: [
+            quiz.pk,
+            quiz.title,
+            quiz.description,
+            quiz.category,
+            quiz.is_time_limited,
+            quiz.time_limit,
+            quiz.created_at,
+            quiz.creator_id,
+            quiz.last_modified,
+        ],
+    ),
+    "attempts": Dataset(
+        columns=["id", "user_id", "quiz_id", "started_at", "completed_at", "score", "max_score"],
+        queryset=QuizAttempt.objects.all,
+        watermark="completed_at",
+        row=lambda attempt: [
+            attempt.pk,
+            attempt.user_id,
+            attempt.quiz_id,
+            attempt.started_at,
+            attempt.completed_at,
+            attempt.score,
+            attempt.max_score,
+        ],
+    ),
+    "answers": Dataset(
+        columns=["id", "attempt_id", "question_id", "is_correct", "answered_at", "selected_options"],
+        queryset=_answer_queryset,
+        watermark="attempt__completed_at",
+        row=lambda answer: [
+            answer.pk,
+            answer.attempt_id,
+            answer.question_id,
+            answer.is_correct,
+            answer.answered_at,
+            sorted(option.pk for option in answer.selected_options.all()),
+        ],
+    ),
+}
+
+
+def export_rows(
+    dataset: Dataset,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = 2000,
+) -> Iterator[List[Any]]:
+    """
+    Stream rows of a dataset in ``chunk_size`` batches. ``since``/``until``
+    select the half-open watermark window ``(since, until]`` so consecutive
+    incremental exports neither overlap nor leave gaps.
+    """
+    queryset = dataset.queryset()
+    if since is not None:
+        queryset = queryset.filter(**{f"{dataset.watermark}__gt": since})
+    if until is not None:
+        queryset = queryset.filter(**{f"{dataset.watermark}__lte": until})
+    for instance in queryset.order_by("pk").iterator(chunk_size=chunk_size):
+        yield dataset.row(instance)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return value
+
+
+def ndjson_lines(columns: List[str], rows: Iterable[List[Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns: List[str], rows: Iterable[List[Any]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            [" ".join(map(str, value)) if isinstance(value, list) else _plain(value) for value in row]
+        )
+
+
+def encode(lines: Iterable[str], compress: bool = False, buffer_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Encode lines to UTF-8, coalescing them into ``buffer_size`` chunks, optionally gzipped."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer: List[bytes] = []
+    buffered = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= buffer_size:
+            chunk = b"".join(buffer)
+            buffer, buffered = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_stream(
+    name: str,
+    output: str = "ndjson",
+    compress: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = 2000,
+) -> Iterator[bytes]:
+    dataset = DATASETS[name]
+    rows = export_rows(dataset, since=since, until=until, chunk_size=chunk_size)
+    lines = csv_lines(dataset.columns, rows) if output == "csv" else ndjson_lines(dataset.columns, rows)
+    return encode(lines, compress=compress)
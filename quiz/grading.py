@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from users.stats import record_quiz_passed
+
+from .analytics import record_answers
+from .deadlines import AttemptClosed
+from .leaderboard import record_score
+from .models import Question, QuestionType, QuizAttempt, UserAnswer
+from .stats import record_attempt_completed
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    answer_type: str
+    option_ids: FrozenSet[int]
+    correct_ids: FrozenSet[int]
+
+
+@dataclass(frozen=True)
+class GradedAnswer:
+    question_id: int
+    selected_options: List[int]
+    is_correct: bool
+
+
+AnswerKey = Dict[int, QuestionKey]
+
+
+def _answer_key_rows(quiz_id: int):
+    return Question.objects.filter(quiz_id=quiz_id).values_list(
+        "id", "answer_type", "answer_options__id", "answer_options__is_correct"
+    )
+
+
+def _assemble_answer_key(rows) -> AnswerKey:
+    answer_types: Dict[int, str] = {}
+    option_ids: Dict[int, set] = {}
+    correct_ids: Dict[int, set] = {}
+    for question_id, answer_type, option_id, is_correct in rows:
+        answer_types[question_id] = answer_type
+        option_ids.setdefault(question_id, set())
+        correct_ids.setdefault(question_id, set())
+        if option_id is None:
+            continue
+        option_ids[question_id].add(option_id)
+        if is_correct:
+            correct_ids[question_id].add(option_id)
+
+    return {
+        question_id: QuestionKey(
+            answer_type=answer_type,
+            option_ids=frozenset(option_ids[question_id]),
+            correct_ids=frozenset(correct_ids[question_id]),
+        )
+        for question_id, answer_type in answer_types.items()
+    }
+
+
+def build_answer_key(quiz_id: int) -> AnswerKey:
+    """Load every question of a quiz with its option ids in a single query."""
+    return _assemble_answer_key(_answer_key_rows(quiz_id))
+
+
+async def abuild_answer_key(quiz_id: int) -> AnswerKey:
+    return _assemble_answer_key([row async for row in _answer_key_rows(quiz_id)])
+
+
+def validate_answer(question_key: QuestionKey, selected: FrozenSet[int]) -> None:
+    if not selected <= question_key.option_ids:
+        raise ValueError("Selected options do not belong to the question.")
+    if question_key.answer_type == QuestionType.SINGLE and len(selected) > 1:
+        raise ValueError("Single choice question accepts only one option.")
+
+
+def grade_answers(answer_key: AnswerKey, answers: List[Dict[str, Any]]) -> List[GradedAnswer]:
+    """Compare submitted option sets against the answer key without touching the database."""
+    graded = []
+    for answer in answers:
+        question_id = answer["question"]
+        selected = frozenset(answer["selected_options"])
+        graded.append(
+            GradedAnswer(
+                question_id=question_id,
+                selected_options=sorted(selected),
+                is_correct=bool(selected) and selected == answer_key[question_id].correct_ids,
+            )
+        )
+    return graded
+
+
+def record_attempt(
+    quiz, user, answer_key: AnswerKey, answers: List[Dict[str, Any]], attempt: Optional[QuizAttempt] = None
+) -> QuizAttempt:
+    """
+    Grade a submission and persist the attempt with three inserts:
+    the attempt, all user answers and all selected option links.
+    Quiz statistics, the leaderboard and the question analytics are updated
+    with a constant number of extra statements.
+
+    A started ``attempt`` is completed in place instead, unless it was closed
+    in the meantime (e.g. by the expiry sweep), which raises ``AttemptClosed``.
+    """
+    graded = grade_answers(answer_key, answers)
+    now = timezone.now()
+    score = sum(answer.is_correct for answer in graded)
+    new_attempt = attempt is None
+
+    with transaction.atomic():
+        if new_attempt:
+            attempt = QuizAttempt.objects.create(
+                user=user, quiz=quiz, completed_at=now, score=score, max_score=len(answer_key)
+            )
+        else:
+            completed = QuizAttempt.objects.filter(pk=attempt.pk, completed_at__isnull=True).update(
+                completed_at=now, score=score, max_score=len(answer_key)
+            )
+            if not completed:
+                raise AttemptClosed()
+            attempt.completed_at, attempt.score, attempt.max_score = now, score, len(answer_key)
+        user_answers = UserAnswer.objects.bulk_create(
+            [
+                UserAnswer(
+                    attempt=attempt,
+                    question_id=answer.question_id,
+                    is_correct=answer.is_correct,
+                )
+                for answer in graded
+            ]
+        )
+        through = UserAnswer.selected_options.through
+        through.objects.bulk_create(
+            [
+                through(useranswer_id=user_answer.pk, answeroption_id=option_id)
+                for user_answer, answer in zip(user_answers, graded)
+                for option_id in answer.selected_options
+            ]
+        )
+        record_attempt_completed(quiz.pk, attempt.score_percent, new_attempt=new_attempt)
+        if record_score(quiz.pk, user.pk, attempt.score_percent, now):
+            record_quiz_passed(user.pk)
+        record_answers(graded)
+
+    attempt.graded_answers = graded
+    return attempt
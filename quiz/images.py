@@ -0,0 +1,123 @@
+import logging
+import posixpath
+from io import BytesIO
+from typing import Any, Dict, Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from jobs.queue import task
+
+logger = logging.getLogger(__name__)
+
+# Sent with the model class as sender and ``pk`` once new variants are stored.
+variants_ready = Signal()
+
+IMAGE_FORMATS = {
+    "webp": {"format": "WEBP", "method": 6},
+    "jpeg": {"format": "JPEG", "optimize": True, "progressive": True},
+}
+
+
+def variants_field(field_name: str) -> str:
+    return f"{field_name}_variants"
+
+
+def render_variants(name: str, storage) -> Dict[str, Any]:
+    """
+    Write every configured size of the image ``name`` in every format next to
+    it under ``variants/`` and return ``{"source": name, size: {format: path}}``.
+    """
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    stem = posixpath.splitext(name)[0]
+
+    variants: Dict[str, Any] = {"source": name}
+    for label, max_side in settings.QUIZ_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        for extension, options in IMAGE_FORMATS.items():
+            frame = resized
+            if options["format"] == "JPEG" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            elif frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA")
+            buffer = BytesIO()
+            frame.save(buffer, quality=settings.QUIZ_IMAGE_QUALITY, **options)
+            path = storage.save(f"variants/{stem}_{label}.{extension}", ContentFile(buffer.getvalue()))
+            variants.setdefault(label, {})[extension] = path
+    return variants
+
+
+def _delete_variants(variants: Dict[str, Any], storage) -> None:
+    for label, paths in variants.items():
+        if label != "source":
+            for path in paths.values():
+                storage.delete(path)
+
+
+@task
+def process_image(model_label: str, pk: Any, field_name: str) -> None:
+    """Bring the stored variants of one image field in line with its current file."""
+    model = apps.get_model(model_label)
+    target = variants_field(field_name)
+    instance = model.objects.filter(pk=pk).only(field_name, target).first()
+    if instance is None:
+        return
+    image = getattr(instance, field_name)
+    previous = getattr(instance, target) or {}
+    if (image.name or None) == previous.get("source"):
+        return
+
+    variants: Dict[str, Any] = {}
+    if image:
+        try:
+            variants = render_variants(image.name, image.storage)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+            logger.warning("Cannot build variants of %s: %s", image.name, exc)
+            variants = {"source": image.name}
+
+    # Only store the result if nobody replaced the file in the meantime.
+    if image:
+        unchanged = Q(**{field_name: image.name})
+    else:
+        unchanged = Q(**{field_name: ""}) | Q(**{f"{field_name}__isnull": True})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{target: variants})
+    if updated:
+        _delete_variants(previous, image.storage)
+        variants_ready.send(sender=model, pk=pk)
+    else:
+        _delete_variants(variants, image.storage)
+
+
+def schedule_variants(instances: Iterable[Any], field_name: str) -> None:
+    """
+    Queue a variant job for every instance whose image differs from the one
+    its variants were built from. Workers see the job once the upload commits.
+    """
+    target = variants_field(field_name)
+    for instance in instances:
+        image = getattr(instance, field_name)
+        variants = getattr(instance, target) or {}
+        if (image.name or None) != variants.get("source"):
+            process_image.enqueue(instance._meta.label, instance.pk, field_name)
+
+
+def variant_urls(variants: Optional[Dict[str, Any]], request=None) -> Dict[str, Dict[str, str]]:
+    """Map the stored variant paths to URLs, absolute when a request is available."""
+    urls: Dict[str, Dict[str, str]] = {}
+    for label, paths in (variants or {}).items():
+        if label == "source":
+            continue
+        urls[label] = {}
+        for extension, path in paths.items():
+            url = default_storage.url(path)
+            urls[label][extension] = request.build_absolute_uri(url) if request else url
+    return urls
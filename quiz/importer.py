@@ -0,0 +1,125 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from .models import AnswerOption, Question, Quiz, QuizStats
+from .serializers import QuizImportSerializer
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int, errors: Any) -> None:
+        self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"imported": self.imported, "failed": len(self.errors), "errors": self.errors}
+
+
+def validate_record(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """Validate one NDJSON line in memory; raises ``ValueError`` with the errors."""
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError({"non_field_errors": [f"Invalid JSON: {exc}"]})
+
+    serializer = QuizImportSerializer(data=data)
+    if not serializer.is_valid():
+        raise ValueError(serializer.errors)
+
+    validated = dict(serializer.validated_data)
+    questions = validated.pop("questions")
+    try:
+        Quiz(**validated).clean()
+    except ValidationError as exc:
+        raise ValueError({"non_field_errors": exc.messages})
+    return {"quiz": validated, "questions": questions}
+
+
+def insert_quizzes(records: List[Dict[str, Any]], creator) -> List[Quiz]:
+    """
+    Insert validated quizzes with one ``bulk_create`` per table, however
+    many quizzes, questions and answer options the batch holds.
+    """
+    quizzes = Quiz.objects.bulk_create(
+        [Quiz(creator=creator, **record["quiz"]) for record in records]
+    )
+
+    questions: List[Tuple[Question, List[Dict[str, Any]]]] = []
+    for quiz, record in zip(quizzes, records):
+        for order, question_data in enumerate(record["questions"], start=1):
+            question_data = dict(question_data)
+            question_data.pop("id", None)
+            options = question_data.pop("answer_options")
+            questions.append((Question(quiz=quiz, order=order, **question_data), options))
+
+    Question.objects.bulk_create([question for question, _ in questions])
+    AnswerOption.objects.bulk_create(
+        [
+            AnswerOption(
+                question=question,
+                text=option["text"],
+                is_correct=option.get("is_correct", False),
+            )
+            for question, options in questions
+            for option in options
+        ]
+    )
+    QuizStats.objects.bulk_create(
+        [
+            QuizStats(quiz=quiz, question_count=len(record["questions"]))
+            for quiz, record in zip(quizzes, records)
+        ]
+    )
+    return quizzes
+
+
+def _flush(batch: List[Tuple[int, Dict[str, Any]]], creator, report: ImportReport) -> None:
+    if not batch:
+        return
+    try:
+        with transaction.atomic():
+            insert_quizzes([record for _, record in batch], creator)
+        report.imported += len(batch)
+        return
+    except DatabaseError:
+        pass
+
+    # Something in the batch was rejected by the database: retry record by
+    # record so only the offending lines are reported.
+    for line, record in batch:
+        try:
+            with transaction.atomic():
+                insert_quizzes([record], creator)
+            report.imported += 1
+        except DatabaseError as exc:
+            report.add_error(line, {"non_field_errors": [str(exc)]})
+
+
+def import_quizzes(lines: Iterable[Union[str, bytes]], creator, batch_size: int = 500) -> ImportReport:
+    """
+    Import quizzes from NDJSON lines, one quiz per line in the shape accepted
+    by the quiz create endpoint. Invalid lines are reported and skipped.
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    for line_number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            batch.append((line_number, validate_record(raw)))
+        except ValueError as exc:
+            report.add_error(line_number, exc.args[0])
+            continue
+        if len(batch) >= batch_size:
+            _flush(batch, creator, report)
+            batch = []
+
+    _flush(batch, creator, report)
+    return report
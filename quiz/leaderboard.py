@@ -0,0 +1,193 @@
+import time
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from jobs.queue import task
+
+from .models import LeaderboardEntry, QuizAttempt
+from .stats import score_percent_expression
+
+
+def get_leaderboard_cache():
+    return caches[settings.QUIZ_LEADERBOARD_CACHE]
+
+
+def _version_key(quiz_id: int) -> str:
+    return f"quiz-leaderboard:{quiz_id}:version"
+
+
+def _get_version(cache, quiz_id: int) -> int:
+    version = cache.get(_version_key(quiz_id))
+    if version is None:
+        cache.add(_version_key(quiz_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(quiz_id))
+    return version
+
+
+def invalidate_leaderboard(quiz_id: int) -> None:
+    """
+    Move the quiz to a fresh cache version. Versions are timestamps rather
+    than counters so an evicted version key can never resurrect old entries.
+    """
+    get_leaderboard_cache().set(_version_key(quiz_id), time.time_ns(), timeout=None)
+
+
+def record_score(quiz_id: int, user_id: int, score: float, achieved_at: datetime) -> bool:
+    """
+    Keep the user's best score for the quiz. Returns True when this is the
+    user's first completed attempt of the quiz.
+    """
+    improved = LeaderboardEntry.objects.filter(
+        quiz_id=quiz_id, user_id=user_id, best_score__lt=score
+    ).update(best_score=score, achieved_at=achieved_at)
+    created = False
+    if not improved:
+        _, created = LeaderboardEntry.objects.get_or_create(
+            quiz_id=quiz_id,
+            user_id=user_id,
+            defaults={"best_score": score, "achieved_at": achieved_at},
+        )
+    if improved or created:
+        transaction.on_commit(lambda: invalidate_leaderboard(quiz_id))
+    return created
+
+
+def record_scores(scores: Iterable[Tuple[int, int, float, datetime]]) -> List[int]:
+    """
+    ``record_score`` for many (quiz, user, score, achieved_at) rows at once:
+    one read of the current entries, one insert and a read back of the
+    inserted rows, and one bulk update. Returns the user id of every entry
+    this call inserted, once per quiz the user entered.
+    """
+    best: Dict[Tuple[int, int], Tuple[float, datetime]] = {}
+    for quiz_id, user_id, score, achieved_at in scores:
+        if (quiz_id, user_id) not in best or score > best[quiz_id, user_id][0]:
+            best[quiz_id, user_id] = (score, achieved_at)
+    if not best:
+        return []
+
+    existing = {
+        (entry.quiz_id, entry.user_id): entry
+        for entry in LeaderboardEntry.objects.filter(
+            quiz_id__in={quiz_id for quiz_id, _ in best}, user_id__in={user_id for _, user_id in best}
+        )
+    }
+    created, improved = [], []
+    for (quiz_id, user_id), (score, achieved_at) in best.items():
+        entry = existing.get((quiz_id, user_id))
+        if entry is None:
+            created.append(
+                LeaderboardEntry(quiz_id=quiz_id, user_id=user_id, best_score=score, achieved_at=achieved_at)
+            )
+        elif score > entry.best_score:
+            entry.best_score, entry.achieved_at = score, achieved_at
+            improved.append(entry)
+    if created:
+        # A concurrent first submission may have added an entry since the read: the
+        # insert skips it, and only the rows read back unchanged count as new.
+        LeaderboardEntry.objects.bulk_create(created, ignore_conflicts=True)
+        ours = {(entry.quiz_id, entry.user_id): entry for entry in created}
+        created = []
+        for entry in LeaderboardEntry.objects.filter(
+            quiz_id__in={quiz_id for quiz_id, _ in ours}, user_id__in={user_id for _, user_id in ours}
+        ):
+            mine = ours.get((entry.quiz_id, entry.user_id))
+            if mine is None:
+                continue
+            if (entry.best_score, entry.achieved_at) == (mine.best_score, mine.achieved_at):
+                created.append(entry)
+            elif mine.best_score > entry.best_score:
+                entry.best_score, entry.achieved_at = mine.best_score, mine.achieved_at
+                improved.append(entry)
+    LeaderboardEntry.objects.bulk_update(improved, ["best_score", "achieved_at"])
+
+    for quiz_id in {entry.quiz_id for entry in created + improved}:
+        transaction.on_commit(partial(invalidate_leaderboard, quiz_id))
+    return [entry.user_id for entry in created]
+
+
+def _entry_data(entry: LeaderboardEntry, rank: int) -> Dict[str, Any]:
+    return {
+        "rank": rank,
+        "user": entry.user_id,
+        "username": entry.user.username,
+        "score": entry.best_score,
+        "achieved_at": entry.achieved_at,
+    }
+
+
+def get_top_scores(quiz_id: int, limit: int) -> List[Dict[str, Any]]:
+    cache = get_leaderboard_cache()
+    key = f"quiz-leaderboard:{quiz_id}:{_get_version(cache, quiz_id)}:top:{limit}"
+    top = cache.get(key)
+    if top is None:
+        entries = (
+            LeaderboardEntry.objects.filter(quiz_id=quiz_id)
+            .select_related("user")
+            .only("user_id", "user__username", "best_score", "achieved_at")
+            .order_by("-best_score", "achieved_at")[:limit]
+        )
+        top = [_entry_data(entry, rank) for rank, entry in enumerate(entries, start=1)]
+        cache.set(key, top, settings.QUIZ_LEADERBOARD_CACHE_TIMEOUT)
+    return top
+
+
+def get_user_rank(quiz_id: int, user) -> Optional[Dict[str, Any]]:
+    cache = get_leaderboard_cache()
+    key = f"quiz-leaderboard:{quiz_id}:{_get_version(cache, quiz_id)}:user:{user.pk}"
+    data = cache.get(key)
+    if data is None:
+        entry = (
+            LeaderboardEntry.objects.filter(quiz_id=quiz_id, user_id=user.pk)
+            .select_related("user")
+            .first()
+        )
+        if entry is None:
+            data = {}
+        else:
+            ahead = LeaderboardEntry.objects.filter(
+                Q(best_score__gt=entry.best_score)
+                | Q(best_score=entry.best_score, achieved_at__lt=entry.achieved_at),
+                quiz_id=quiz_id,
+            ).count()
+            data = _entry_data(entry, ahead + 1)
+        cache.set(key, data, settings.QUIZ_LEADERBOARD_CACHE_TIMEOUT)
+    return data or None
+
+
+@task
+def rebuild_leaderboard(quiz_id: int) -> int:
+    """Recreate the ranking table of a quiz from its completed attempts."""
+    attempts = (
+        QuizAttempt.objects.filter(quiz_id=quiz_id, completed_at__isnull=False)
+        .annotate(percent=score_percent_expression())
+        .order_by("completed_at")
+        .values_list("user_id", "percent", "completed_at")
+    )
+    best = {}
+    for user_id, percent, completed_at in attempts.iterator():
+        if user_id not in best or percent > best[user_id][0]:
+            best[user_id] = (percent, completed_at)
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id).delete()
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(
+                    quiz_id=quiz_id,
+                    user_id=user_id,
+                    best_score=score,
+                    achieved_at=achieved_at,
+                )
+                for user_id, (score, achieved_at) in best.items()
+            ],
+            batch_size=1000,
+        )
+        transaction.on_commit(lambda: invalidate_leaderboard(quiz_id))
+    return len(best)
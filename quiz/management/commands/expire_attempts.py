@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiz.deadlines import expire_attempts, schedule_expire_attempts
+
+
+class Command(BaseCommand):
+    help = "Complete and grade open attempts past their time limit or abandoned, or schedule a recurring job that does."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.QUIZ_ATTEMPT_EXPIRY_BATCH_SIZE)
+        parser.add_argument(
+            "--schedule",
+            action="store_true",
+            help="Enqueue an expire_attempts job that reschedules itself every QUIZ_ATTEMPT_EXPIRY_INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            job = schedule_expire_attempts(options["batch_size"])
+            if job is None:
+                self.stdout.write("An expire_attempts job is already queued.")
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Scheduled expire_attempts for {job.run_at:%Y-%m-%d %H:%M:%S}.")
+                )
+            return
+        expired = expire_attempts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} attempts."))
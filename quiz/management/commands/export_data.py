@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from quiz.exporting import DATASETS, EXPORT_FORMATS, export_stream
+
+
+def watermark(value):
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f"Invalid ISO 8601 datetime: {value!r}")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a dataset to a file as NDJSON or CSV. The upper watermark is "
+        "printed at the end; pass it as --since to the next run for a delta export. "
+        "Without --since or --until the export is full and includes open attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--output", default="-", help="Destination file, - for stdout.")
+        parser.add_argument("--format", dest="output_format", choices=EXPORT_FORMATS, default="ndjson")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--since", type=watermark, help="Exclusive lower watermark.")
+        parser.add_argument("--until", type=watermark, help="Inclusive upper watermark (default: now).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        until = options["until"] or timezone.now()
+        incremental = options["since"] is not None or options["until"] is not None
+        chunks = export_stream(
+            options["dataset"],
+            output=options["output_format"],
+            compress=options["gzip"],
+            since=options["since"],
+            until=until if incremental else None,
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["output"] == "-":
+            target = sys.stdout.buffer
+            for chunk in chunks:
+                target.write(chunk)
+            target.flush()
+        else:
+            with open(options["output"], "wb") as target:
+                for chunk in chunks:
+                    target.write(chunk)
+
+        self.stderr.write(f"Exported {options['dataset']} up to {until.isoformat()}")
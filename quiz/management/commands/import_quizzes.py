@@ -0,0 +1,35 @@
+import json
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.importer import import_quizzes
+
+
+class Command(BaseCommand):
+    help = "Bulk import quizzes from an NDJSON file (one quiz per line)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file to import, or - for stdin.")
+        parser.add_argument("--creator", required=True, help="Username owning the imported quizzes.")
+        parser.add_argument("--batch-size", type=int, default=settings.QUIZ_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            creator = get_user_model().objects.get(username=options["creator"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['creator']!r} does not exist.")
+
+        if options["path"] == "-":
+            report = import_quizzes(sys.stdin, creator, batch_size=options["batch_size"])
+        else:
+            with open(options["path"], encoding="utf-8") as lines:
+                report = import_quizzes(lines, creator, batch_size=options["batch_size"])
+
+        for error in report.errors:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {report.imported} quizzes, {len(report.errors)} failed.")
+        )
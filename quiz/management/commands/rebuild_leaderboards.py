@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quiz.leaderboard import rebuild_leaderboard
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Recreate per-quiz leaderboard tables from completed attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "quiz_ids", nargs="*", type=int, help="Limit the rebuild to these quizzes."
+        )
+
+    def handle(self, *args, **options):
+        quiz_ids = options["quiz_ids"] or Quiz.objects.values_list("pk", flat=True).iterator()
+        quizzes = entries = 0
+        for quiz_id in quiz_ids:
+            entries += rebuild_leaderboard(quiz_id)
+            quizzes += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {quizzes} leaderboards with {entries} entries.")
+        )
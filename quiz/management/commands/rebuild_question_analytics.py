@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from quiz.analytics import rebuild_question_analytics
+
+
+class Command(BaseCommand):
+    help = "Recompute per-question and per-option answer rollups from user answers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "quiz_ids", nargs="*", type=int, help="Limit the rebuild to these quizzes."
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_question_analytics(options["quiz_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics for {rebuilt} questions."))
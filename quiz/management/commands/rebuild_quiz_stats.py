@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from quiz.stats import rebuild_quiz_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized quiz statistics from questions and attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "quiz_ids", nargs="*", type=int, help="Limit the rebuild to these quizzes."
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_quiz_stats(
+            quiz_ids=options["quiz_ids"] or None, batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {rebuilt} quizzes."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from quiz.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the quiz full-text index and its sync triggers, then reindex "
+        "every quiz. Run after a migration that rebuilds the quiz table on SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        backend = get_search_backend(connection)
+        backend.install(connection)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt search index with {type(backend).__name__}.")
+        )
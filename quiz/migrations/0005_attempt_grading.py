@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0004_alter_question_answer_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizattempt",
+            name="max_score",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="quizattempt",
+            name="score",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="useranswer",
+            name="is_correct",
+            field=models.BooleanField(default=False),
+        ),
+    ]
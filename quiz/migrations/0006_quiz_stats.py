@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_quiz_stats(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    QuizStats = apps.get_model("quiz", "QuizStats")
+
+    quizzes = Quiz.objects.annotate(
+        total_questions=Count("questions", distinct=True),
+        total_attempts=Count("quiz_attempts", distinct=True),
+        total_completed=Count(
+            "quiz_attempts",
+            filter=Q(quiz_attempts__completed_at__isnull=False),
+            distinct=True,
+        ),
+    ).values_list("pk", "total_questions", "total_attempts", "total_completed")
+
+    QuizStats.objects.bulk_create(
+        [
+            QuizStats(
+                quiz_id=quiz_id,
+                question_count=questions,
+                attempt_count=attempts,
+                completed_count=completed,
+                completion_rate=completed / attempts if attempts else 0.0,
+            )
+            for quiz_id, questions, attempts, completed in quizzes.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0005_attempt_grading"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuizStats",
+            fields=[
+                (
+                    "quiz",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="quiz.quiz",
+                    ),
+                ),
+                ("question_count", models.PositiveIntegerField(default=0)),
+                ("attempt_count", models.PositiveIntegerField(default=0)),
+                ("completed_count", models.PositiveIntegerField(default=0)),
+                ("score_percent_sum", models.FloatField(default=0)),
+                ("completion_rate", models.FloatField(default=0)),
+                ("average_score", models.FloatField(default=0)),
+            ],
+            options={
+                "verbose_name": "Quiz Statistics",
+                "verbose_name_plural": "Quiz Statistics",
+                "db_table": "quiz_stats",
+                "indexes": [
+                    models.Index(
+                        fields=["attempt_count"], name="quiz_stats_attempts_idx"
+                    ),
+                    models.Index(
+                        fields=["average_score"], name="quiz_stats_avg_score_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_quiz_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0006_quiz_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("best_score", models.FloatField()),
+                ("achieved_at", models.DateTimeField()),
+                (
+                    "quiz",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to="quiz.quiz",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Leaderboard Entry",
+                "verbose_name_plural": "Leaderboard Entries",
+                "db_table": "leaderboard_entry",
+                "indexes": [
+                    models.Index(
+                        fields=["quiz", "-best_score", "achieved_at"],
+                        name="leaderboard_ranking_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("quiz", "user"),
+                        name="unique_leaderboard_entry_per_user",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import migrations
+
+# The index as it stood when this migration was written; quiz.search may
+# change later without changing what this migration does.
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS quiz_search USING fts5(
+        title, description, content='quiz', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_search_ai AFTER INSERT ON quiz BEGIN
+        INSERT INTO quiz_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_search_ad AFTER DELETE ON quiz BEGIN
+        INSERT INTO quiz_search(quiz_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_search_au AFTER UPDATE OF title, description ON quiz BEGIN
+        INSERT INTO quiz_search(quiz_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO quiz_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO quiz_search(quiz_search) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS quiz_search_ai",
+    "DROP TRIGGER IF EXISTS quiz_search_ad",
+    "DROP TRIGGER IF EXISTS quiz_search_au",
+    "DROP TABLE IF EXISTS quiz_search",
+]
+
+POSTGRESQL_INSTALL = [
+    """
+    ALTER TABLE quiz ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS quiz_search_vector_idx ON quiz USING GIN (search_vector)",
+]
+POSTGRESQL_UNINSTALL = [
+    "DROP INDEX IF EXISTS quiz_search_vector_idx",
+    "ALTER TABLE quiz DROP COLUMN IF EXISTS search_vector",
+]
+
+STATEMENTS = {
+    "sqlite": (SQLITE_INSTALL, SQLITE_UNINSTALL),
+    "postgresql": (POSTGRESQL_INSTALL, POSTGRESQL_UNINSTALL),
+}
+
+
+def run(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is not None:
+        for statement in statements[index]:
+            schema_editor.execute(statement, params=None)
+
+
+def install_search_index(apps, schema_editor):
+    run(schema_editor, 0)
+
+
+def uninstall_search_index(apps, schema_editor):
+    run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0007_leaderboard_entry"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0008_quiz_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quiz",
+            index=models.Index(fields=["-created_at", "-id"], name="quiz_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="quiz",
+            index=models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="quiz_category_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_question_analytics(apps, schema_editor):
+    UserAnswer = apps.get_model("quiz", "UserAnswer")
+    QuestionStats = apps.get_model("quiz", "QuestionStats")
+    AnswerOptionStats = apps.get_model("quiz", "AnswerOptionStats")
+    through = UserAnswer.selected_options.through
+
+    questions = (
+        UserAnswer.objects.filter(attempt__completed_at__isnull=False)
+        .values("question_id")
+        .annotate(answers=Count("id"), correct=Count("id", filter=Q(is_correct=True)))
+    )
+    QuestionStats.objects.bulk_create(
+        [
+            QuestionStats(
+                question_id=row["question_id"],
+                answer_count=row["answers"],
+                correct_count=row["correct"],
+            )
+            for row in questions.iterator()
+        ],
+        batch_size=1000,
+    )
+
+    picks = (
+        through.objects.filter(useranswer__attempt__completed_at__isnull=False)
+        .values("answeroption_id")
+        .annotate(picks=Count("id"))
+    )
+    AnswerOptionStats.objects.bulk_create(
+        [
+            AnswerOptionStats(option_id=row["answeroption_id"], pick_count=row["picks"])
+            for row in picks.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0009_quiz_list_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerOptionStats",
+            fields=[
+                (
+                    "option",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="quiz.answeroption",
+                    ),
+                ),
+                ("pick_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Answer Option Statistics",
+                "verbose_name_plural": "Answer Option Statistics",
+                "db_table": "answer_option_stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="QuestionStats",
+            fields=[
+                (
+                    "question",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="quiz.question",
+                    ),
+                ),
+                ("answer_count", models.PositiveIntegerField(default=0)),
+                ("correct_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Question Statistics",
+                "verbose_name_plural": "Question Statistics",
+                "db_table": "question_stats",
+            },
+        ),
+        migrations.RunPython(populate_question_analytics, migrations.RunPython.noop),
+    ]
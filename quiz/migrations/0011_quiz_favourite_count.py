@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:32
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_favourite_count(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    QuizStats = apps.get_model("quiz", "QuizStats")
+    favourites = (
+        User.favourite_tests.through.objects.values("quiz_id")
+        .annotate(total=Count("id"))
+        .values_list("quiz_id", "total")
+    )
+    for quiz_id, total in favourites.iterator():
+        QuizStats.objects.filter(pk=quiz_id).update(favourite_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0010_question_analytics"),
+        ("users", "0002_user_about_user_favourite_tests"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizstats",
+            name="favourite_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="quizstats",
+            index=models.Index(
+                fields=["favourite_count"], name="quiz_stats_favourites_idx"
+            ),
+        ),
+        migrations.RunPython(populate_favourite_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0011_quiz_favourite_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="question_photo_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
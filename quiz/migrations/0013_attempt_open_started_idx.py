@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0012_question_photo_variants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quizattempt",
+            index=models.Index(
+                fields=["completed_at", "started_at"], name="attempt_open_started_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0013_attempt_open_started_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuizSearchIndex",
+            fields=[
+                (
+                    "quiz",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="quiz.quiz",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "quiz_search",
+                "managed": False,
+            },
+        ),
+    ]
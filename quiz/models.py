@@ -33,6 +33,13 @@ class Quiz(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Quiz"
         verbose_name_plural = "Quizzes"
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="quiz_created_idx"),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="quiz_category_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -46,6 +53,52 @@ class Quiz(models.Model):
         super().save(*args, **kwargs)
 
 
+class QuizSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table ``quiz_search`` (see ``quiz.search``), mapped so
+    searches can join it. Migration 0008 creates it, on SQLite only.
+    """
+
+    quiz = models.OneToOneField(
+        Quiz,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_index",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "quiz_search"
+
+
+class QuizStats(models.Model):
+    quiz = models.OneToOneField(
+        Quiz, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    question_count = models.PositiveIntegerField(default=0)
+    attempt_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    score_percent_sum = models.FloatField(default=0)
+    completion_rate = models.FloatField(default=0)
+    average_score = models.FloatField(default=0)
+    favourite_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "quiz_stats"
+        verbose_name = "Quiz Statistics"
+        verbose_name_plural = "Quiz Statistics"
+        indexes = [
+            models.Index(fields=["attempt_count"], name="quiz_stats_attempts_idx"),
+            models.Index(fields=["average_score"], name="quiz_stats_avg_score_idx"),
+            models.Index(fields=["favourite_count"], name="quiz_stats_favourites_idx"),
+        ]
+
+    def __str__(self):
+        return f"Statistics for Quiz {self.quiz_id}"
+
+
 class QuestionType(models.TextChoices):
     SINGLE = "single", "Single Choice"
     MULTIPLE = "multiple", "Multiple Choice"
@@ -61,6 +114,7 @@ class Question(models.Model):
     question_photo = models.ImageField(
         upload_to="question_photos/", null=True, blank=True
     )
+    question_photo_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         db_table = "question"
@@ -94,6 +148,37 @@ class AnswerOption(models.Model):
         return f"Answer Option for Question {self.question.order} in Quiz {self.question.quiz.title}"
 
 
+class QuestionStats(models.Model):
+    question = models.OneToOneField(
+        Question, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    answer_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "question_stats"
+        verbose_name = "Question Statistics"
+        verbose_name_plural = "Question Statistics"
+
+    def __str__(self):
+        return f"Statistics for Question {self.question_id}"
+
+
+class AnswerOptionStats(models.Model):
+    option = models.OneToOneField(
+        AnswerOption, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    pick_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "answer_option_stats"
+        verbose_name = "Answer Option Statistics"
+        verbose_name_plural = "Answer Option Statistics"
+
+    def __str__(self):
+        return f"Statistics for Answer Option {self.option_id}"
+
+
 class QuizAttempt(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="quiz_attempts"
@@ -103,15 +188,60 @@ class QuizAttempt(models.Model):
     )
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    score = models.PositiveIntegerField(null=True, blank=True)
+    max_score = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         db_table = "quiz_attempt"
         verbose_name = "Quiz Attempt"
         verbose_name_plural = "Quiz Attempts"
+        indexes = [
+            # Open attempts (completed_at IS NULL) by age, for the expiry sweep.
+            models.Index(fields=["completed_at", "started_at"], name="attempt_open_started_idx"),
+        ]
 
     def __str__(self):
         return f"Attempt by {self.user.username} for Quiz {self.quiz.title}"
 
+    @property
+    def score_percent(self) -> float:
+        if not self.max_score:
+            return 0.0
+        return 100.0 * (self.score or 0) / self.max_score
+
+
+class LeaderboardEntry(models.Model):
+    quiz = models.ForeignKey(
+        Quiz, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries",
+    )
+    best_score = models.FloatField()
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "leaderboard_entry"
+        verbose_name = "Leaderboard Entry"
+        verbose_name_plural = "Leaderboard Entries"
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "user"], name="unique_leaderboard_entry_per_user"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["quiz", "-best_score", "achieved_at"],
+                name="leaderboard_ranking_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Best score of user {self.user_id} in Quiz {self.quiz_id}"
+
 
 class UserAnswer(models.Model):
     attempt = models.ForeignKey(
@@ -121,6 +251,7 @@ class UserAnswer(models.Model):
         Question, on_delete=models.CASCADE, related_name="user_answers"
     )
     selected_options = models.ManyToManyField(AnswerOption, related_name="user_answers")
+    is_correct = models.BooleanField(default=False)
     answered_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -0,0 +1,199 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on ``(ordering field, id)``.
+
+    Unlike DRF's CursorPagination the cursor carries the id tie-breaker, so
+    every page is a single index range scan with no OFFSET and no COUNT,
+    however deep the client scrolls.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.REST_FRAMEWORK["PAGE_SIZE"]
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return ordering[0]
+        return self.default_ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        The query for one page plus one lookahead row. Split from
+        ``paginate_queryset`` so async views can fetch it with the async ORM
+        and hand the rows to ``set_page``.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+
+        cursor = self.decode_cursor(request, self.get_field(queryset))
+        self.cursor = cursor
+        reverse = cursor is not None and cursor["reverse"]
+        # Walking backwards flips the scan direction; rows are put back in
+        # display order below.
+        scan_descending = descending != reverse
+        sign = "-" if scan_descending else ""
+        queryset = queryset.order_by(f"{sign}{self.field}", f"{sign}id")
+
+        if cursor is not None:
+            op = "lt" if scan_descending else "gt"
+            value, pk = cursor["value"], cursor["id"]
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}e": value}),
+                Q(**{f"{self.field}__{op}": value}) | Q(**{f"id__{op}": pk}),
+            )
+
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        cursor = self.cursor
+        reverse = cursor is not None and cursor["reverse"]
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_field(self, queryset):
+        """The model field or annotation the page is ordered by."""
+        annotation = queryset.query.annotations.get(self.field)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(self.field)
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            if data["o"] != self.ordering or data["v"] is None:
+                raise ValueError
+            # Cursors come from the client: the value must parse as the ordering field's type.
+            value = field.to_python(data["v"])
+            return {"value": value, "id": int(data["id"]), "reverse": bool(data["r"])}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data = {"o": self.ordering, "v": value, "id": instance.pk, "r": reverse}
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class QuizListPagination(BasePagination):
+    """
+    Keyset pagination for the quiz list.
+
+    Staff can opt into page numbers with ``?page=`` for admin tooling, and
+    relevance-ranked search results use page numbers too since their order
+    has no stable key to seek on.
+    """
+
+    page_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        use_pages = "search" in request.query_params or (
+            self.page_query_param in request.query_params and request.user.is_staff
+        )
+        self.paginator = PageNumberPagination() if use_pages else KeysetPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return KeysetPagination().get_schema_operation_parameters(view)
@@ -0,0 +1,189 @@
+import re
+from typing import List
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(term: str) -> List[str]:
+    return TOKEN_RE.findall(term.lower())[:16]
+
+
+class SearchBackend:
+    """
+    Full-text search over quiz titles and descriptions.
+
+    ``search`` returns the queryset restricted to matching quizzes, annotated
+    with ``search_rank`` (higher is more relevant) and ordered by it. Every
+    token is matched as a prefix so results follow the user while typing.
+    """
+
+    def install(self, connection) -> None:
+        """Create the index structures and keep them in sync with ``quiz``."""
+
+    def uninstall(self, connection) -> None:
+        pass
+
+    def rebuild(self, connection) -> None:
+        pass
+
+    def search(self, queryset: QuerySet, tokens: List[str]) -> QuerySet:
+        raise NotImplementedError
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """FTS5 external-content table maintained by triggers on ``quiz``."""
+
+    statements = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS quiz_search USING fts5(
+            title, description, content='quiz', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS quiz_search_ai AFTER INSERT ON quiz BEGIN
+            INSERT INTO quiz_search(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS quiz_search_ad AFTER DELETE ON quiz BEGIN
+            INSERT INTO quiz_search(quiz_search, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS quiz_search_au AFTER UPDATE OF title, description ON quiz BEGIN
+            INSERT INTO quiz_search(quiz_search, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO quiz_search(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ]
+
+    def install(self, connection) -> None:
+        with connection.cursor() as cursor:
+            for statement in self.statements:
+                cursor.execute(statement)
+        self.rebuild(connection)
+
+    def uninstall(self, connection) -> None:
+        with connection.cursor() as cursor:
+            for trigger in ("quiz_search_ai", "quiz_search_ad", "quiz_search_au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute("DROP TABLE IF EXISTS quiz_search")
+
+    def rebuild(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO quiz_search(quiz_search) VALUES ('rebuild')")
+
+    def search(self, queryset: QuerySet, tokens: List[str]) -> QuerySet:
+        match = " ".join(f'"{token}"*' for token in tokens)
+        # A join rather than a correlated subquery: the FTS index is probed
+        # once and bm25() is computed from the same scan.
+        return (
+            queryset.filter(search_index__isnull=False)
+            .filter(RawSQL("quiz_search MATCH %s", [match], output_field=BooleanField()))
+            .annotate(search_rank=RawSQL("-bm25(quiz_search, 10.0, 1.0)", [], output_field=FloatField()))
+            .order_by("-search_rank", "-created_at")
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Generated ``tsvector`` column on ``quiz`` with a GIN index."""
+
+    config = "simple"
+
+    def install(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                ALTER TABLE quiz ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{self.config}', coalesce(title, '')), 'A')
+                    || setweight(to_tsvector('{self.config}', coalesce(description, '')), 'B')
+                ) STORED
+                """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS quiz_search_vector_idx ON quiz USING GIN (search_vector)"
+            )
+
+    def uninstall(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS quiz_search_vector_idx")
+            cursor.execute("ALTER TABLE quiz DROP COLUMN IF EXISTS search_vector")
+
+    def search(self, queryset: QuerySet, tokens: List[str]) -> QuerySet:
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        return (
+            queryset.annotate(
+                search_rank=RawSQL(
+                    f"ts_rank(quiz.search_vector, to_tsquery('{self.config}', %s))",
+                    [tsquery],
+                    output_field=FloatField(),
+                )
+            )
+            .filter(
+                RawSQL(
+                    f"quiz.search_vector @@ to_tsquery('{self.config}', %s)",
+                    [tsquery],
+                    output_field=BooleanField(),
+                )
+            )
+            .order_by("-search_rank", "-created_at")
+        )
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Unindexed fallback for databases without a full-text backend."""
+
+    def search(self, queryset: QuerySet, tokens: List[str]) -> QuerySet:
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTS5SearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection=None) -> SearchBackend:
+    connection = connection or connections["default"]
+    backend_path = getattr(settings, "QUIZ_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return VENDOR_BACKENDS.get(connection.vendor, ContainsSearchBackend)()
+
+
+class QuizSearchFilter(BaseFilterBackend):
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = tokenize(request.query_params.get(self.search_param, ""))
+        if not tokens:
+            return queryset
+        return get_search_backend(connections[queryset.db]).search(queryset, tokens)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search over title and description, ranked by relevance.",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -1,13 +1,19 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from django.db import transaction
 from rest_framework import serializers
 
-from .models import AnswerOption, Question, Quiz
+from .deadlines import attempt_deadline
+from .grading import validate_answer
+from .images import schedule_variants, variant_urls
+from .models import AnswerOption, Question, QuestionType, Quiz, QuizAttempt
+from .stats import record_questions_changed
 
 
 class AnswerOptionSerializer(serializers.ModelSerializer):
 
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = AnswerOption
         fields = ["id", "text", "is_correct"]
@@ -15,8 +21,12 @@ class AnswerOptionSerializer(serializers.ModelSerializer):
 
 class QuestionSerializer(serializers.ModelSerializer):
 
+    id = serializers.IntegerField(required=False)
+
     answer_options = AnswerOptionSerializer(many=True)
 
+    question_photo_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Question
         fields = [
@@ -24,9 +34,13 @@ class QuestionSerializer(serializers.ModelSerializer):
             "title",
             "answer_type",
             "question_photo",
+            "question_photo_variants",
             "answer_options",
         ]
 
+    def get_question_photo_variants(self, obj) -> Dict[str, Dict[str, str]]:
+        return variant_urls(obj.question_photo_variants, self.context.get("request"))
+
     def validate_answer_options(self, value):
         if not value:
             raise serializers.ValidationError(
@@ -68,17 +82,206 @@ class QuizDetailSerializer(serializers.ModelSerializer):
 
         with transaction.atomic():
             quiz = Quiz.objects.create(**validated_data)
+            questions = []
             for index, question_data in enumerate(questions_data, start=1):
+                question_data.pop("id", None)
                 options_data = question_data.pop("answer_options")
-                question = Question.objects.create(quiz=quiz, **question_data, order=index)
-                answer_options_objs = [
-                    AnswerOption(question=question, **option_data)
-                    for option_data in options_data
-                ]
-                AnswerOption.objects.bulk_create(answer_options_objs)
+                questions.append((Question(quiz=quiz, **question_data, order=index), options_data))
+            Question.objects.bulk_create([question for question, _ in questions])
+            answer_options_objs = [
+                AnswerOption(
+                    question=question,
+                    text=option_data["text"],
+                    is_correct=option_data.get("is_correct", False),
+                )
+                for question, options_data in questions
+                for option_data in options_data
+            ]
+            AnswerOption.objects.bulk_create(answer_options_objs)
+            record_questions_changed(quiz.pk, len(questions))
+            schedule_variants([question for question, _ in questions], "question_photo")
         return quiz
 
+    def update(self, instance: Quiz, validated_data: Dict[str, Any]) -> Quiz:
+
+        questions_data = validated_data.pop("questions", None)
+
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if questions_data is not None:
+                self._sync_questions(instance, questions_data)
+        return instance
+
+    def _sync_questions(self, quiz: Quiz, questions_data) -> None:
+        """
+        Diff the submitted questions against the stored ones by id and apply
+        the result with one bulk statement per table and kind of change, so
+        untouched rows (and the user answers pointing at them) survive.
+
+        Fields left out of a stored question or option (as a PATCH may) keep
+        their stored values; without ``answer_options`` the question's options
+        are left as they are. New questions and options must be complete.
+        """
+        existing = {question.pk: question for question in Question.objects.filter(quiz=quiz)}
+        existing_options: Dict[int, Dict[int, AnswerOption]] = {}
+        for option in AnswerOption.objects.filter(question__quiz=quiz):
+            existing_options.setdefault(option.question_id, {})[option.pk] = option
+
+        errors = []
+        seen_ids = set()
+        required = serializers.Field.default_error_messages["required"]
+        for question_data in questions_data:
+            question_id = question_data.get("id")
+            if question_id is None:
+                errors.append({
+                    field: [required]
+                    for field in ("title", "answer_options")
+                    if field not in question_data
+                })
+                continue
+            if question_id not in existing:
+                errors.append({"id": [f"Question {question_id} does not belong to this quiz."]})
+                continue
+            if question_id in seen_ids:
+                errors.append({"id": [f"Question {question_id} is listed more than once."]})
+                continue
+            seen_ids.add(question_id)
+            options = existing_options.get(question_id, {})
+            options_data = question_data.get("answer_options", [])
+            option_ids = [option["id"] for option in options_data if "id" in option]
+            unknown = [option_id for option_id in option_ids if option_id not in options]
+            repeated = sorted({option_id for option_id in option_ids if option_ids.count(option_id) > 1})
+            messages = []
+            if unknown:
+                messages.append(f"Answer options {unknown} do not belong to this question.")
+            if repeated:
+                messages.append(f"Answer options {repeated} are listed more than once.")
+            if any("text" not in option for option in options_data if option.get("id") not in options):
+                messages.append("New answer options need a text.")
+            errors.append({"answer_options": messages} if messages else {})
+        if any(errors):
+            raise serializers.ValidationError({"questions": errors})
+
+        kept_ids = {data["id"] for data in questions_data if data.get("id") is not None}
+        removed_ids = [pk for pk in existing if pk not in kept_ids]
+        if removed_ids:
+            Question.objects.filter(pk__in=removed_ids).delete()
+
+        # Orders are unique per quiz: park moved questions on negative orders
+        # first so the final renumbering never collides mid-update.
+        moved = []
+        for index, data in enumerate(questions_data, start=1):
+            question = existing.get(data.get("id"))
+            if question is not None and question.order != index:
+                question.order = -index
+                moved.append(question)
+        if moved:
+            Question.objects.bulk_update(moved, ["order"])
+
+        changed, created, photo_changed = [], [], []
+        options_changed, options_created, options_removed = [], [], []
+        for index, data in enumerate(questions_data, start=1):
+            question = existing.get(data.get("id"))
+            if question is None:
+                question = Question(
+                    quiz=quiz,
+                    title=data["title"],
+                    answer_type=data.get("answer_type", QuestionType.SINGLE),
+                    order=index,
+                    question_photo=data.get("question_photo"),
+                )
+                created.append((question, data["answer_options"]))
+                continue
+
+            # bulk_update would not write uploaded files to storage, so photo
+            # changes are saved one question at a time below.
+            if "question_photo" in data and (data["question_photo"] or question.question_photo):
+                photo_changed.append((question, data["question_photo"]))
+
+            new_values = {"order": index, "title": data.get("title", question.title)}
+            if "answer_type" in data:
+                new_values["answer_type"] = data["answer_type"]
+            if any(getattr(question, attr) != value for attr, value in new_values.items()):
+                for attr, value in new_values.items():
+                    setattr(question, attr, value)
+                changed.append(question)
+
+            if "answer_options" not in data:
+                continue
+            current_options = existing_options.get(question.pk, {})
+            submitted_ids = set()
+            for option_data in data["answer_options"]:
+                option = current_options.get(option_data.get("id"))
+                if option is None:
+                    options_created.append(
+                        AnswerOption(
+                            question=question,
+                            text=option_data["text"],
+                            is_correct=option_data.get("is_correct", False),
+                        )
+                    )
+                    continue
+                submitted_ids.add(option.pk)
+                text = option_data.get("text", option.text)
+                is_correct = option_data.get("is_correct", option.is_correct)
+                if option.text != text or option.is_correct != is_correct:
+                    option.text, option.is_correct = text, is_correct
+                    options_changed.append(option)
+            options_removed.extend(pk for pk in current_options if pk not in submitted_ids)
+
+        if changed:
+            Question.objects.bulk_update(changed, ["title", "answer_type", "order"])
+        if created:
+            Question.objects.bulk_create([question for question, _ in created])
+            options_created.extend(
+                AnswerOption(
+                    question=question,
+                    text=option["text"],
+                    is_correct=option.get("is_correct", False),
+                )
+                for question, options in created
+                for option in options
+            )
+        if options_removed:
+            AnswerOption.objects.filter(pk__in=options_removed).delete()
+        if options_changed:
+            AnswerOption.objects.bulk_update(options_changed, ["text", "is_correct"])
+        if options_created:
+            AnswerOption.objects.bulk_create(options_created)
+        for question, photo in photo_changed:
+            question.question_photo = photo
+            question.save(update_fields=["question_photo"])
+
+        record_questions_changed(quiz.pk, len(created) - len(removed_ids))
+        schedule_variants([question for question, _ in created], "question_photo")
+
+
+class QuizImportSerializer(QuizDetailSerializer):
+    """Validates one quiz of a bulk import; the creator is set by the importer."""
+
+    creator = None
+
+    class Meta(QuizDetailSerializer.Meta):
+        fields = [
+            "title",
+            "description",
+            "category",
+            "is_time_limited",
+            "time_limit",
+            "questions",
+        ]
+
+
 class QuizListSerializer(serializers.ModelSerializer):
+    question_count = serializers.IntegerField(source="stats.question_count", read_only=True)
+    attempt_count = serializers.IntegerField(source="stats.attempt_count", read_only=True)
+    completion_rate = serializers.FloatField(source="stats.completion_rate", read_only=True)
+    average_score = serializers.FloatField(source="stats.average_score", read_only=True)
+    favourite_count = serializers.IntegerField(source="stats.favourite_count", read_only=True)
+    is_favourite = serializers.BooleanField(read_only=True, default=False)
+
     class Meta:
         model = Quiz
         fields = [
@@ -89,7 +292,110 @@ class QuizListSerializer(serializers.ModelSerializer):
             "time_limit",
             "created_at",
             "creator",
+            "question_count",
+            "attempt_count",
+            "completion_rate",
+            "average_score",
+            "favourite_count",
+            "is_favourite",
         ]
         read_only_fields = ["id", "created_at"]
 
 
+class AnswerSubmitSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    selected_options = serializers.ListField(child=serializers.IntegerField())
+
+
+class AttemptSubmitSerializer(serializers.Serializer):
+    attempt = serializers.IntegerField(
+        required=False, help_text="Id of the started attempt; required for time limited quizzes."
+    )
+    answers = AnswerSubmitSerializer(many=True, allow_empty=False)
+
+    def validate_answers(self, value):
+        answer_key = self.context["answer_key"]
+        seen = set()
+        for answer in value:
+            question_id = answer["question"]
+            if question_id not in answer_key:
+                raise serializers.ValidationError(
+                    f"Question {question_id} does not belong to this quiz."
+                )
+            if question_id in seen:
+                raise serializers.ValidationError(
+                    f"Question {question_id} is answered more than once."
+                )
+            seen.add(question_id)
+            try:
+                validate_answer(answer_key[question_id], frozenset(answer["selected_options"]))
+            except ValueError as exc:
+                raise serializers.ValidationError(f"Question {question_id}: {exc}")
+        return value
+
+
+class GradedAnswerSerializer(serializers.Serializer):
+    question = serializers.IntegerField(source="question_id")
+    selected_options = serializers.ListField(child=serializers.IntegerField())
+    is_correct = serializers.BooleanField()
+
+
+class AttemptResultSerializer(serializers.ModelSerializer):
+    answers = GradedAnswerSerializer(many=True, source="graded_answers", read_only=True)
+
+    class Meta:
+        model = QuizAttempt
+        fields = [
+            "id",
+            "quiz",
+            "score",
+            "max_score",
+            "started_at",
+            "completed_at",
+            "answers",
+        ]
+        read_only_fields = fields
+
+
+class AttemptStartSerializer(serializers.ModelSerializer):
+    deadline = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizAttempt
+        fields = ["id", "quiz", "started_at", "deadline"]
+        read_only_fields = fields
+
+    def get_deadline(self, obj) -> Optional[str]:
+        deadline = attempt_deadline(obj.quiz, obj.started_at)
+        return serializers.DateTimeField().to_representation(deadline) if deadline else None
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    rank = serializers.IntegerField()
+    user = serializers.IntegerField()
+    username = serializers.CharField()
+    score = serializers.FloatField()
+    achieved_at = serializers.DateTimeField()
+
+
+class LeaderboardSerializer(serializers.Serializer):
+    top = LeaderboardEntrySerializer(many=True)
+    me = LeaderboardEntrySerializer(allow_null=True)
+
+
+class OptionAnalyticsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    text = serializers.CharField()
+    is_correct = serializers.BooleanField()
+    pick_count = serializers.IntegerField()
+    pick_rate = serializers.FloatField(allow_null=True)
+
+
+class QuestionAnalyticsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    order = serializers.IntegerField()
+    answer_count = serializers.IntegerField()
+    correct_count = serializers.IntegerField()
+    correct_rate = serializers.FloatField(allow_null=True)
+    answer_options = OptionAnalyticsSerializer(many=True)
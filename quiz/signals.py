@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.stats import record_quiz_deleted
+
+from .images import schedule_variants, variants_ready
+from .models import AnswerOption, Question, Quiz, QuizStats
+from .stats import ensure_stats, record_favourites_changed, record_questions_changed
+
+
+def touch_quiz(**lookup) -> None:
+    """Bump ``last_modified`` so caches versioned on it drop stale entries."""
+    Quiz.objects.filter(**lookup).update(last_modified=timezone.now())
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, created, **kwargs):
+    if created:
+        ensure_stats([instance.pk])
+
+
+@receiver(pre_delete, sender=Quiz)
+def quiz_deleting(sender, instance, **kwargs):
+    # The cascade takes the attempts that counted the quiz as passed.
+    record_quiz_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    touch_quiz(pk=instance.quiz_id)
+    if created:
+        record_questions_changed(instance.quiz_id, 1)
+    schedule_variants([instance], "question_photo")
+
+
+@receiver(variants_ready, sender=Question)
+def question_variants_ready(sender, pk, **kwargs):
+    touch_quiz(questions=pk)
+
+
+# Cascades from a quiz need no bookkeeping, and queryset deletes are done by
+# code that updates the quiz once for the whole batch (see
+# QuizDetailSerializer._sync_questions and QuestionAdmin.delete_queryset).
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Quiz, QuerySet)):
+        return
+    touch_quiz(pk=instance.quiz_id)
+    record_questions_changed(instance.quiz_id, -1)
+
+
+@receiver(post_save, sender=AnswerOption)
+def answer_option_saved(sender, instance, **kwargs):
+    touch_quiz(questions=instance.question_id)
+
+
+@receiver(post_delete, sender=AnswerOption)
+def answer_option_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Quiz, Question, QuerySet)):
+        return
+    touch_quiz(questions=instance.question_id)
+
+
+@receiver(m2m_changed, sender=Quiz.favoured_by.through)
+def favourites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``reverse`` is set when the change goes through ``quiz.favoured_by``,
+    # so ``instance`` is a quiz and ``pk_set`` holds user ids.
+    if action in ("pre_remove", "pre_clear"):
+        # Django passes the requested ids, not the existing links, to the
+        # remove signals: resolve them before the rows go away.
+        links = sender.objects.filter(**{"quiz_id" if reverse else "user_id": instance.pk})
+        if pk_set is not None:
+            links = links.filter(**{"user_id__in" if reverse else "quiz_id__in": pk_set})
+        instance._removed_favourites = list(links.values_list("quiz_id", flat=True))
+    elif action == "post_add" and pk_set:
+        record_favourites_changed([instance.pk] * len(pk_set) if reverse else pk_set, 1)
+    elif action in ("post_remove", "post_clear"):
+        record_favourites_changed(instance.__dict__.pop("_removed_favourites", []), -1)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    # The cascade removes the user's favourites without m2m_changed.
+    QuizStats.objects.filter(quiz__favoured_by=instance).update(
+        favourite_count=Greatest(F("favourite_count") - 1, Value(0))
+    )
@@ -0,0 +1,155 @@
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Greatest
+
+from jobs.queue import task
+
+from .models import Question, Quiz, QuizAttempt, QuizStats
+
+
+def _completion_rate(completed, attempts):
+    return Cast(completed, FloatField()) / Greatest(attempts, Value(1))
+
+
+def ensure_stats(quiz_ids: Iterable[int]) -> None:
+    QuizStats.objects.bulk_create(
+        [QuizStats(quiz_id=quiz_id) for quiz_id in quiz_ids], ignore_conflicts=True
+    )
+
+
+def record_questions_changed(quiz_id: int, delta: int) -> None:
+    if delta:
+        QuizStats.objects.filter(pk=quiz_id).update(
+            question_count=Greatest(F("question_count") + delta, Value(0))
+        )
+
+
+def record_favourites_changed(quiz_ids: Iterable[int], delta: int) -> None:
+    """Apply ``delta`` once per occurrence of a quiz id, one UPDATE per distinct multiplicity."""
+    by_count = defaultdict(list)
+    for quiz_id, count in Counter(quiz_ids).items():
+        by_count[count].append(quiz_id)
+    for count, ids in by_count.items():
+        QuizStats.objects.filter(pk__in=ids).update(
+            favourite_count=Greatest(F("favourite_count") + count * delta, Value(0))
+        )
+
+
+def record_attempt_started(quiz_id: int) -> None:
+    QuizStats.objects.filter(pk=quiz_id).update(
+        attempt_count=F("attempt_count") + 1,
+        completion_rate=_completion_rate(F("completed_count"), F("attempt_count") + 1),
+    )
+
+
+def record_attempt_completed(quiz_id: int, score_percent: float, new_attempt: bool = False) -> None:
+    """
+    Fold one completed attempt into the quiz statistics with a single UPDATE.
+
+    ``new_attempt`` is set when the attempt was created and completed in the
+    same request, so it has not been counted by ``record_attempt_started``.
+    """
+    record_attempts_completed(quiz_id, 1, score_percent, started=1 if new_attempt else 0)
+
+
+def record_attempts_completed(quiz_id: int, count: int, percent_sum: float, started: int = 0) -> None:
+    """Fold ``count`` completed attempts, ``started`` of them not counted yet, with a single UPDATE."""
+    QuizStats.objects.filter(pk=quiz_id).update(
+        attempt_count=F("attempt_count") + started,
+        completed_count=F("completed_count") + count,
+        score_percent_sum=F("score_percent_sum") + percent_sum,
+        completion_rate=_completion_rate(F("completed_count") + count, F("attempt_count") + started),
+        average_score=(F("score_percent_sum") + percent_sum) / (F("completed_count") + count),
+    )
+
+
+def score_percent_expression():
+    return Case(
+        When(
+            max_score__gt=0,
+            then=Cast(F("score"), FloatField()) * 100.0 / F("max_score"),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+@task
+def rebuild_quiz_stats(quiz_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> int:
+    """Recompute statistics from the source tables, one GROUP BY per table and batch."""
+    quizzes = Quiz.objects.order_by("pk").values_list("pk", flat=True)
+    if quiz_ids is not None:
+        quizzes = quizzes.filter(pk__in=list(quiz_ids))
+
+    rebuilt = 0
+    batch = []
+    for quiz_id in quizzes.iterator(chunk_size=batch_size):
+        batch.append(quiz_id)
+        if len(batch) >= batch_size:
+            rebuilt += _rebuild_batch(batch)
+            batch = []
+    if batch:
+        rebuilt += _rebuild_batch(batch)
+    return rebuilt
+
+
+def _rebuild_batch(quiz_ids) -> int:
+    question_counts = dict(
+        Question.objects.filter(quiz_id__in=quiz_ids)
+        .values("quiz_id")
+        .annotate(total=Count("id"))
+        .values_list("quiz_id", "total")
+    )
+    attempt_rows = (
+        QuizAttempt.objects.filter(quiz_id__in=quiz_ids)
+        .values("quiz_id")
+        .annotate(
+            attempts=Count("id"),
+            completed=Count("id", filter=Q(completed_at__isnull=False)),
+            percent_sum=Sum(score_percent_expression(), filter=Q(completed_at__isnull=False)),
+        )
+    )
+    attempts = {row["quiz_id"]: row for row in attempt_rows}
+    favourite_counts = dict(
+        Quiz.favoured_by.through.objects.filter(quiz_id__in=quiz_ids)
+        .values("quiz_id")
+        .annotate(total=Count("id"))
+        .values_list("quiz_id", "total")
+    )
+
+    stats = []
+    for quiz_id in quiz_ids:
+        row = attempts.get(quiz_id, {})
+        attempt_count = row.get("attempts", 0)
+        completed_count = row.get("completed", 0)
+        percent_sum = row.get("percent_sum") or 0.0
+        stats.append(
+            QuizStats(
+                quiz_id=quiz_id,
+                question_count=question_counts.get(quiz_id, 0),
+                attempt_count=attempt_count,
+                completed_count=completed_count,
+                score_percent_sum=percent_sum,
+                completion_rate=completed_count / attempt_count if attempt_count else 0.0,
+                average_score=percent_sum / completed_count if completed_count else 0.0,
+                favourite_count=favourite_counts.get(quiz_id, 0),
+            )
+        )
+
+    QuizStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["quiz"],
+        update_fields=[
+            "question_count",
+            "attempt_count",
+            "completed_count",
+            "score_percent_sum",
+            "completion_rate",
+            "average_score",
+            "favourite_count",
+        ],
+    )
+    return len(stats)
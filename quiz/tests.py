@@ -1,14 +1,53 @@
+import base64
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
-from quiz.models import Quiz
+from jobs.models import Job, JobStatus
+from jobs.queue import claim, run_job
+from quiz import async_views
+from quiz.answer_keys import AnswerKeyCache, answer_key_cache, get_answer_key
+from quiz.deadlines import expired_attempts, schedule_expire_attempts
+from quiz.grading import record_attempt
+from quiz.leaderboard import record_scores
+from quiz.models import (
+    AnswerOption,
+    LeaderboardEntry,
+    Question,
+    Quiz,
+    QuizAttempt,
+    QuizStats,
+    UserAnswer,
+)
 from rest_framework_simplejwt.tokens import RefreshToken
+from users.authentication import user_cache
+from users.models import UserStats
+from PIL import Image
 
 User = get_user_model()
 
 class QuizCRUDTests(APITestCase):
     def setUp(self):
+        cache.clear()
 
         self.author = User.objects.create_user(username='author', password='password')
         self.other_user = User.objects.create_user(username='other', password='password')
@@ -114,4 +153,1145 @@ class QuizCRUDTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-        self.assertIn("questions", response.data)
\ No newline at end of file
+        self.assertIn("questions", response.data)
+
+
+def make_quiz(creator, questions=2, **kwargs):
+    quiz = Quiz.objects.create(title="Quiz", description="Desc", creator=creator, **kwargs)
+    for order in range(1, questions + 1):
+        answer_type = "multiple" if order % 2 == 0 else "single"
+        question = Question.objects.create(
+            quiz=quiz, title=f"Q{order}", answer_type=answer_type, order=order
+        )
+        AnswerOption.objects.bulk_create([
+            AnswerOption(question=question, text="A", is_correct=True),
+            AnswerOption(question=question, text="B", is_correct=answer_type == "multiple"),
+            AnswerOption(question=question, text="C", is_correct=False),
+        ])
+    return quiz
+
+
+def correct_answers(quiz):
+    return [
+        {
+            "question": question.pk,
+            "selected_options": [o.pk for o in question.answer_options.all() if o.is_correct],
+        }
+        for question in quiz.questions.prefetch_related("answer_options")
+    ]
+
+
+class AttemptSubmitTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.player = User.objects.create_user(username='player', password='password')
+        answer_key_cache.clear()
+        refresh = RefreshToken.for_user(self.player)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def submit(self, quiz, answers):
+        url = reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk})
+        return self.client.post(url, {"answers": answers}, format='json')
+
+    def test_submit_grades_answers(self):
+        quiz = make_quiz(self.author)
+        answers = correct_answers(quiz)
+        wrong = answers[1]["selected_options"][:1]
+        answers[1]["selected_options"] = wrong
+
+        response = self.submit(quiz, answers)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["score"], 1)
+        self.assertEqual(response.data["max_score"], 2)
+        self.assertEqual([a["is_correct"] for a in response.data["answers"]], [True, False])
+
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual(attempt.user, self.player)
+        self.assertIsNotNone(attempt.completed_at)
+        answer = UserAnswer.objects.get(attempt=attempt, question_id=answers[1]["question"])
+        self.assertFalse(answer.is_correct)
+        self.assertEqual([o.pk for o in answer.selected_options.all()], wrong)
+
+    def test_submit_rejects_foreign_option(self):
+        quiz = make_quiz(self.author)
+        other = make_quiz(self.author)
+        answers = correct_answers(quiz)
+        answers[0]["selected_options"] = correct_answers(other)[0]["selected_options"]
+
+        response = self.submit(quiz, answers)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_submit_query_count_is_constant(self):
+        small = make_quiz(self.author, questions=2)
+        large = make_quiz(self.author, questions=20)
+        user_cache.get(self.player.pk)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.submit(small, correct_answers(small))
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.submit(large, correct_answers(large))
+
+        self.assertEqual(response.data["score"], 20)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+
+class AttemptDeadlineTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.player = User.objects.create_user(username='player', password='password')
+        answer_key_cache.clear()
+        refresh = RefreshToken.for_user(self.player)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.quiz = make_quiz(self.author, is_time_limited=True, time_limit=timedelta(minutes=5))
+
+    def start(self, quiz):
+        return self.client.post(reverse('quiz:quiz-start', kwargs={'pk': quiz.pk}))
+
+    def submit(self, quiz, payload):
+        return self.client.post(reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk}), payload, format='json')
+
+    def age(self, attempt_id, **delta):
+        QuizAttempt.objects.filter(pk=attempt_id).update(started_at=timezone.now() - timedelta(**delta))
+
+    def test_started_attempt_is_completed_in_place(self):
+        started = self.start(self.quiz)
+        self.assertEqual(started.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(started.data['deadline'])
+
+        response = self.submit(self.quiz, {'attempt': started.data['id'], 'answers': correct_answers(self.quiz)})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['id'], response.data['score']), (started.data['id'], 2))
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempt_count, stats.completed_count), (1, 1))
+
+    def test_time_limited_quiz_needs_a_started_attempt(self):
+        response = self.submit(self.quiz, {'answers': correct_answers(self.quiz)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('attempt', response.data)
+
+    def test_late_submission_is_rejected_and_swept(self):
+        attempt_id = self.start(self.quiz).data['id']
+        self.age(attempt_id, minutes=6)
+
+        payload = {'attempt': attempt_id, 'answers': correct_answers(self.quiz)}
+        get_answer_key(Quiz.objects.get(pk=self.quiz.pk))
+        with self.assertNumQueries(2):
+            # The quiz and the attempt (the user is cached): nothing is graded or written.
+            response = self.submit(self.quiz, payload)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(UserAnswer.objects.exists())
+
+        out = StringIO()
+        call_command('expire_attempts', stdout=out)
+        self.assertIn('Expired 1 attempts', out.getvalue())
+
+        attempt = QuizAttempt.objects.get(pk=attempt_id)
+        self.assertEqual((attempt.score, attempt.max_score), (0, 2))
+        self.assertIsNotNone(attempt.completed_at)
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempt_count, stats.completed_count, stats.average_score), (1, 1, 0.0))
+        self.assertTrue(LeaderboardEntry.objects.filter(quiz=self.quiz, user=self.player).exists())
+        self.assertEqual(UserStats.objects.get(user=self.player).passed_quiz_count, 1)
+        # Submitting a swept attempt is refused as well.
+        response = self.submit(self.quiz, {'attempt': attempt_id, 'answers': correct_answers(self.quiz)})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    @override_settings(QUIZ_ATTEMPT_ABANDON_AFTER=3600)
+    def test_sweep_selects_only_expired_open_attempts(self):
+        untimed = make_quiz(self.author)
+        running = self.start(self.quiz).data['id']
+        late = self.start(self.quiz).data['id']
+        abandoned = self.start(untimed).data['id']
+        recent = self.start(untimed).data['id']
+        self.age(running, minutes=4)
+        self.age(late, minutes=10)
+        self.age(abandoned, hours=2)
+        self.age(recent, minutes=30)
+
+        now = timezone.now()
+        self.assertEqual(sorted(expired_attempts(now).values_list('pk', flat=True)), [late, abandoned])
+        self.assertIn('attempt_open_started_idx', expired_attempts(now).explain())
+
+        call_command('expire_attempts', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(
+            sorted(QuizAttempt.objects.filter(completed_at__isnull=True).values_list('pk', flat=True)),
+            [running, recent],
+        )
+
+    @override_settings(JOBS_EAGER=True)
+    def test_scheduled_sweep_runs_once_and_reschedules_itself(self):
+        attempt_id = self.start(self.quiz).data['id']
+        self.age(attempt_id, minutes=6)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('expire_attempts', schedule=True, stdout=StringIO())
+            call_command('expire_attempts', schedule=True, stdout=StringIO())
+        [job] = Job.objects.filter(name='quiz.deadlines.expire_attempts')
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIsNone(QuizAttempt.objects.get(pk=attempt_id).completed_at)
+
+        Job.objects.update(run_at=timezone.now())
+        [job] = claim('worker')
+        self.assertIsNone(schedule_expire_attempts())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(run_job(job))
+        self.assertIsNotNone(QuizAttempt.objects.get(pk=attempt_id).completed_at)
+        [next_run] = Job.objects.filter(name='quiz.deadlines.expire_attempts').exclude(pk=job.pk)
+        self.assertEqual(next_run.status, JobStatus.QUEUED)
+
+
+class AnswerKeyCacheTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password')
+        answer_key_cache.clear()
+
+    def test_hit_and_miss_counters(self):
+        quiz = make_quiz(self.author)
+
+        get_answer_key(quiz)
+        with self.assertNumQueries(0):
+            answer_key = get_answer_key(quiz)
+
+        self.assertEqual(len(answer_key), 2)
+        stats = answer_key_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_question_edit_invalidates_key(self):
+        quiz = make_quiz(self.author)
+        get_answer_key(quiz)
+
+        option = AnswerOption.objects.filter(question__quiz=quiz, is_correct=False).first()
+        option.is_correct = True
+        option.save()
+        quiz.refresh_from_db()
+
+        answer_key = get_answer_key(quiz)
+        self.assertIn(option.pk, answer_key[option.question_id].correct_ids)
+        self.assertEqual(answer_key_cache.stats()["misses"], 2)
+
+    def test_lru_eviction(self):
+        cache = AnswerKeyCache(maxsize=1)
+        first, second = make_quiz(self.author), make_quiz(self.author)
+
+        cache.get(first.pk, first.last_modified)
+        cache.get(second.pk, second.last_modified)
+        cache.get(first.pk, first.last_modified)
+
+        stats = cache.stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["misses"], 3)
+
+
+class QuizStatsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        answer_key_cache.clear()
+
+    def test_stats_follow_questions_and_attempts(self):
+        quiz = make_quiz(self.author, questions=2)
+        answers = correct_answers(quiz)
+        url = reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk})
+        self.client.post(url, {"answers": answers}, format='json')
+        self.client.post(url, {"answers": answers[:1]}, format='json')
+        Question.objects.filter(quiz=quiz).last().delete()
+
+        stats = QuizStats.objects.get(quiz=quiz)
+        self.assertEqual(stats.question_count, 1)
+        self.assertEqual(stats.attempt_count, 2)
+        self.assertEqual(stats.completed_count, 2)
+        self.assertEqual(stats.completion_rate, 1.0)
+        self.assertAlmostEqual(stats.average_score, 75.0)
+
+    def test_list_sorts_by_stats(self):
+        busy = make_quiz(self.author, questions=1)
+        make_quiz(self.author, questions=3)
+        QuizStats.objects.filter(quiz=busy).update(attempt_count=5)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url_list(), {"ordering": "-attempt_count"})
+
+        results = response.data["results"]
+        self.assertEqual(results[0]["id"], busy.pk)
+        self.assertEqual(results[0]["attempt_count"], 5)
+        self.assertEqual(results[1]["question_count"], 3)
+
+    def test_rebuild_command_repairs_drift(self):
+        quiz = make_quiz(self.author, questions=2)
+        self.client.post(
+            reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk}),
+            {"answers": correct_answers(quiz)},
+            format='json',
+        )
+        QuizStats.objects.filter(quiz=quiz).update(
+            question_count=0, attempt_count=9, average_score=1
+        )
+
+        call_command("rebuild_quiz_stats", stdout=StringIO())
+
+        stats = QuizStats.objects.get(quiz=quiz)
+        self.assertEqual((stats.question_count, stats.attempt_count), (2, 1))
+        self.assertAlmostEqual(stats.average_score, 100.0)
+
+    def url_list(self):
+        return reverse('quiz:quiz-list')
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.quiz = make_quiz(self.author, questions=2)
+        self.url = reverse('quiz:quiz-leaderboard', kwargs={'pk': self.quiz.pk})
+
+    def play(self, username, correct):
+        user = User.objects.create_user(username=username, password='password')
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        answers = correct_answers(self.quiz)[:correct]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('quiz:quiz-submit', kwargs={'pk': self.quiz.pk}),
+                {"answers": answers},
+                format='json',
+            )
+        return user
+
+    def test_top_scores_and_own_rank(self):
+        self.play("first", 2)
+        self.play("third", 0)
+        self.play("second", 1)
+
+        response = self.client.get(self.url, {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e["username"] for e in response.data["top"]], ["first", "second"])
+        self.assertEqual(response.data["top"][0]["score"], 100.0)
+        self.assertEqual(response.data["me"]["rank"], 2)
+        self.assertEqual(response.data["me"]["username"], "second")
+
+    def test_bulk_record_counts_only_entries_it_inserted(self):
+        racer, newcomer = (User.objects.create_user(username=name, password='password') for name in ('racer', 'new'))
+        now = timezone.now()
+        insert = LeaderboardEntry.objects.bulk_create
+
+        def racing_insert(entries, **kwargs):
+            # A submission commits the racer's first entry between the read and the insert.
+            LeaderboardEntry.objects.create(quiz=self.quiz, user=racer, best_score=50.0, achieved_at=now)
+            return insert(entries, **kwargs)
+
+        with mock.patch.object(LeaderboardEntry.objects, 'bulk_create', racing_insert):
+            new_users = record_scores([(self.quiz.pk, racer.pk, 80.0, now), (self.quiz.pk, newcomer.pk, 40.0, now)])
+
+        self.assertEqual(new_users, [newcomer.pk])
+        self.assertEqual(LeaderboardEntry.objects.get(user=racer).best_score, 80.0)
+
+    def test_cached_reads_do_not_touch_ranking_table(self):
+        self.play("player", 1)
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data["me"]["rank"], 1)
+        self.assertFalse(any("leaderboard_entry" in q["sql"] for q in queries.captured_queries))
+
+    def test_improved_score_invalidates_cache(self):
+        user = self.play("player", 1)
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('quiz:quiz-submit', kwargs={'pk': self.quiz.pk}),
+                {"answers": correct_answers(self.quiz)},
+                format='json',
+            )
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["me"]["score"], 100.0)
+        self.assertEqual(LeaderboardEntry.objects.get(user=user).best_score, 100.0)
+
+    def test_rebuild_command(self):
+        self.play("player", 1)
+        LeaderboardEntry.objects.all().delete()
+
+        call_command("rebuild_leaderboards", stdout=StringIO())
+
+        self.assertEqual(LeaderboardEntry.objects.get().best_score, 50.0)
+
+
+class QuizSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def search(self, term):
+        response = self.client.get(reverse('quiz:quiz-list'), {"search": term})
+        return [quiz["title"] for quiz in response.data["results"]]
+
+    def test_ranks_title_matches_first(self):
+        Quiz.objects.create(title="Capitals", description="Europe and astronomy trivia", creator=self.author)
+        Quiz.objects.create(title="Astronomy basics", description="Planets", creator=self.author)
+        Quiz.objects.create(title="Cooking", description="Kitchen", creator=self.author)
+
+        self.assertEqual(self.search("astro"), ["Astronomy basics", "Capitals"])
+
+    def test_index_follows_updates_and_deletes(self):
+        quiz = Quiz.objects.create(title="Volcanoes", description="Lava", creator=self.author)
+        self.assertEqual(self.search("volcano"), ["Volcanoes"])
+
+        quiz.title = "Glaciers"
+        quiz.save()
+        self.assertEqual(self.search("volcano"), [])
+        self.assertEqual(self.search("glacier lava"), ["Glaciers"])
+
+        quiz.delete()
+        self.assertEqual(self.search("glacier"), [])
+
+
+class QuizListPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        for index in range(25):
+            Quiz.objects.create(
+                title=f"Quiz {index}",
+                description="Desc",
+                creator=self.author,
+                category="science" if index % 2 else "history",
+            )
+        # Identical timestamps force the id tie-breaker to do its job.
+        Quiz.objects.filter(title__in=["Quiz 3", "Quiz 5", "Quiz 7"]).update(
+            created_at=Quiz.objects.get(title="Quiz 3").created_at
+        )
+
+    def walk(self, url, params=None):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            seen.extend(quiz["id"] for quiz in response.data["results"])
+            if not response.data["next"]:
+                return seen, response
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_walks_every_quiz_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            seen, _ = self.walk(reverse('quiz:quiz-list'), {"category": "science"})
+
+        expected = list(
+            Quiz.objects.filter(category="science").order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertFalse(any("COUNT(" in q["sql"] for q in queries.captured_queries))
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('quiz:quiz-list'))
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(
+            [q["id"] for q in back.data["results"]],
+            [q["id"] for q in first.data["results"]],
+        )
+
+    def test_cursor_follows_requested_ordering(self):
+        seen, _ = self.walk(reverse('quiz:quiz-list'), {"ordering": "title", "page_size": 4})
+
+        expected = list(Quiz.objects.order_by("title", "id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_forged_cursor_values_are_rejected(self):
+        for ordering, value in [("-created_at", "garbage"), ("-question_count", "x"), ("title", None)]:
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({"o": ordering, "v": value, "id": 1, "r": False}).encode()
+            ).decode()
+            response = self.client.get(reverse('quiz:quiz-list'), {"ordering": ordering, "cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, ordering)
+
+    def test_page_numbers_are_staff_opt_in(self):
+        response = self.client.get(reverse('quiz:quiz-list'), {"page": 2})
+        self.assertNotIn("count", response.data)
+
+        self.author.is_staff = True
+        self.author.save()
+        response = self.client.get(reverse('quiz:quiz-list'), {"page": 2})
+        self.assertEqual(response.data["count"], 25)
+
+
+class QuizDetailCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.quiz = make_quiz(self.author)
+        self.url = reverse('quiz:quiz-detail', kwargs={'pk': self.quiz.pk})
+
+    def question_queries(self, queries):
+        return [q for q in queries.captured_queries if '"question"' in q["sql"]]
+
+    def test_if_none_match_skips_question_tables(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.question_queries(queries), [])
+
+    def test_rendered_payload_is_cached(self):
+        first = self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(second.json()["questions"]), 2)
+        self.assertEqual(self.question_queries(queries), [])
+
+    def test_question_edit_changes_etag_and_payload(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        question = self.quiz.questions.first()
+        question.title = "Edited"
+        question.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["questions"][0]["title"], "Edited")
+
+    def test_edit_in_the_same_second_is_not_hidden_by_if_modified_since(self):
+        saved = timezone.now().replace(microsecond=100000)
+        Quiz.objects.filter(pk=self.quiz.pk).update(last_modified=saved)
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        Quiz.objects.filter(pk=self.quiz.pk).update(title="Edited", last_modified=saved.replace(microsecond=200000))
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Edited")
+
+
+class QuizImportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('quiz:quiz-bulk-import')
+
+    def record(self, title, questions=2):
+        return json.dumps({
+            "title": title,
+            "description": "Imported",
+            "category": "science",
+            "questions": [
+                {
+                    "title": f"{title} Q{index}",
+                    "answer_options": [
+                        {"text": "Yes", "is_correct": True},
+                        {"text": "No", "is_correct": False},
+                    ],
+                }
+                for index in range(questions)
+            ],
+        })
+
+    def post(self, lines, **params):
+        url = self.url
+        if params:
+            url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
+        return self.client.post(url, "\n".join(lines), content_type="application/x-ndjson")
+
+    def test_import_reports_bad_lines_and_keeps_the_rest(self):
+        lines = [
+            self.record("First"),
+            "{not json",
+            json.dumps({"title": "No options", "description": "x", "questions": [{"title": "Q"}]}),
+            json.dumps({"title": "Timed", "description": "x", "is_time_limited": True, "questions": []}),
+            self.record("Second", questions=3),
+        ]
+
+        response = self.post(lines)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [2, 3, 4])
+        quiz = Quiz.objects.get(title="Second")
+        self.assertEqual(quiz.creator, self.author)
+        self.assertEqual(quiz.category, "science")
+        self.assertEqual(list(quiz.questions.values_list("order", flat=True)), [1, 2, 3])
+        self.assertEqual(AnswerOption.objects.filter(question__quiz=quiz).count(), 6)
+        self.assertEqual(quiz.stats.question_count, 3)
+
+    def test_queries_do_not_grow_with_batch_contents(self):
+        user_cache.get(self.author.pk)
+        with CaptureQueriesContext(connection) as few:
+            self.post([self.record(f"A{i}") for i in range(2)])
+        with CaptureQueriesContext(connection) as many:
+            self.post([self.record(f"B{i}", questions=5) for i in range(30)])
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Quiz.objects.count(), 32)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as handle:
+            handle.write("\n".join([self.record("One"), self.record("Two"), "[]"]))
+        self.addCleanup(os.unlink, handle.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_quizzes", handle.name, creator="author", batch_size=1, stdout=out, stderr=err)
+
+        self.assertIn("Imported 2 quizzes, 1 failed.", out.getvalue())
+        self.assertEqual(json.loads(err.getvalue())["line"], 3)
+        self.assertEqual(Quiz.objects.filter(creator=self.author).count(), 2)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', is_staff=True)
+        refresh = RefreshToken.for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.quiz = make_quiz(self.admin)
+        self.client.post(
+            reverse('quiz:quiz-submit', kwargs={'pk': self.quiz.pk}),
+            {"answers": correct_answers(self.quiz)},
+            format='json',
+        )
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse('quiz:export', kwargs={'dataset': dataset}), params)
+        content = b"".join(response.streaming_content)
+        return response, content
+
+    def test_ndjson_answers_include_selected_options(self):
+        response, content = self.export("answers")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 2)
+        expected = correct_answers(self.quiz)[1]["selected_options"]
+        self.assertEqual(rows[1]["selected_options"], sorted(expected))
+
+    def test_gzipped_csv(self):
+        response, content = self.export("attempts", output="csv", gzip="1")
+
+        rows = list(csv.reader(gzip.decompress(content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ["id", "user_id", "quiz_id"])
+        self.assertEqual(rows[1][5:], ["2", "2"])
+
+    def test_watermarks_select_deltas(self):
+        response, _ = self.export("quizzes")
+        until = response["X-Export-Until"]
+
+        _, content = self.export("quizzes", since=until)
+        self.assertEqual(content, b"")
+
+        Quiz.objects.filter(pk=self.quiz.pk).update(last_modified=timezone.now())
+        _, content = self.export("quizzes", since=until)
+        self.assertEqual(json.loads(content)["id"], self.quiz.pk)
+
+    def test_full_export_includes_open_attempts(self):
+        QuizAttempt.objects.create(user=self.admin, quiz=self.quiz)
+
+        _, content = self.export("attempts")
+        self.assertEqual([json.loads(line)["completed_at"] is None for line in content.splitlines()], [False, True])
+
+        _, content = self.export("attempts", since="2000-01-01T00:00:00Z")
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_invalid_watermark_is_a_bad_request(self):
+        url = reverse('quiz:export', kwargs={'dataset': 'quizzes'})
+        response = self.client.get(url, {"since": "2024-13-45T00:00:00"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+    def test_export_is_staff_only(self):
+        refresh = RefreshToken.for_user(User.objects.create_user(username='player', password='password'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        response = self.client.get(reverse('quiz:export', kwargs={'dataset': 'answers'}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quizzes.ndjson")
+            call_command("export_data", "quizzes", output=path, stderr=StringIO())
+            with open(path) as handle:
+                self.assertEqual(json.loads(handle.read())["title"], "Quiz")
+
+
+class QuizNestedUpdateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def payload(self, quiz):
+        data = self.client.get(reverse('quiz:quiz-detail', kwargs={'pk': quiz.pk})).json()
+        return {key: data[key] for key in ("title", "description", "is_time_limited", "questions")}
+
+    def put(self, quiz, data):
+        return self.client.put(reverse('quiz:quiz-detail', kwargs={'pk': quiz.pk}), data, format='json')
+
+    def test_diff_update_reorders_edits_adds_and_removes(self):
+        quiz = make_quiz(self.author, questions=3)
+        self.client.post(
+            reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk}),
+            {"answers": correct_answers(quiz)},
+            format='json',
+        )
+        data = self.payload(quiz)
+        first, second, third = data["questions"]
+        second["title"] = "Second edited"
+        second["answer_options"][0]["text"] = "Renamed"
+        del second["answer_options"][2]
+        second["answer_options"].append({"text": "New option", "is_correct": False})
+        data["questions"] = [third, second, {"title": "Brand new", "answer_options": [{"text": "X"}]}]
+
+        response = self.put(quiz, data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        questions = list(quiz.questions.order_by("order"))
+        self.assertEqual([q.title for q in questions], ["Q3", "Second edited", "Brand new"])
+        self.assertEqual([q.pk for q in questions[:2]], [third["id"], second["id"]])
+        self.assertEqual(
+            list(questions[1].answer_options.order_by("pk").values_list("text", flat=True)),
+            ["Renamed", "B", "New option"],
+        )
+        self.assertFalse(Question.objects.filter(pk=first["id"]).exists())
+        self.assertEqual(UserAnswer.objects.filter(question_id__in=[second["id"], third["id"]]).count(), 2)
+        self.assertEqual(QuizStats.objects.get(quiz=quiz).question_count, 3)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small = make_quiz(self.author, questions=2)
+        large = make_quiz(self.author, questions=20)
+        small_data, large_data = self.payload(small), self.payload(large)
+        for data in (small_data, large_data):
+            data["questions"].reverse()
+            for question in data["questions"]:
+                question["title"] += " edited"
+                question["answer_options"][0]["text"] += " edited"
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.put(small, small_data)
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.put(large, large_data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertLess(len(large_queries), 20)
+
+    def test_rejects_questions_from_another_quiz(self):
+        quiz = make_quiz(self.author)
+        other = make_quiz(self.author)
+        data = self.payload(quiz)
+        data["questions"][0]["id"] = other.questions.first().pk
+
+        response = self.put(quiz, data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("questions", response.data)
+
+    def patch(self, quiz, data):
+        return self.client.patch(reverse('quiz:quiz-detail', kwargs={'pk': quiz.pk}), data, format='json')
+
+    def test_partial_question_payloads_keep_stored_values(self):
+        quiz = make_quiz(self.author)
+        first, second = quiz.questions.order_by("order")
+        correct = first.answer_options.get(is_correct=True)
+
+        response = self.patch(quiz, {"questions": [
+            {"id": first.pk, "answer_options": [{"id": correct.pk, "text": "Renamed"}]},
+            {"id": second.pk, "title": "Second edited"},
+        ]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        correct.refresh_from_db()
+        self.assertEqual(first.title, "Q1")
+        self.assertEqual((correct.text, correct.is_correct), ("Renamed", True))
+        self.assertEqual(first.answer_options.count(), 1)
+        self.assertEqual(Question.objects.get(pk=second.pk).title, "Second edited")
+        self.assertEqual(second.answer_options.count(), 3)
+
+    def test_partial_payload_of_a_new_question_is_rejected(self):
+        quiz = make_quiz(self.author)
+        questions = [{"id": question.pk} for question in quiz.questions.order_by("order")]
+
+        response = self.patch(quiz, {"questions": [*questions, {"title": "New"}]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("answer_options", response.data["questions"][2])
+        self.assertEqual(quiz.questions.count(), 2)
+
+    def test_rejects_repeated_ids(self):
+        quiz = make_quiz(self.author)
+        data = self.payload(quiz)
+        first, second = data["questions"]
+        data["questions"] = [first, first, second]
+        self.assertEqual(self.put(quiz, data).status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = self.payload(quiz)
+        options = data["questions"][0]["answer_options"]
+        options.append(dict(options[0]))
+        response = self.put(quiz, data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("answer_options", response.data["questions"][0])
+        self.assertEqual(list(quiz.questions.order_by("order").values_list("order", flat=True)), [1, 2])
+
+
+class QuestionAnalyticsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.quiz = make_quiz(self.author, questions=2)
+        self.url = reverse('quiz:quiz-analytics', kwargs={'pk': self.quiz.pk})
+        answers = correct_answers(self.quiz)
+        wrong = [dict(answers[0], selected_options=[answers[0]["selected_options"][0] + 1]), answers[1]]
+        for index, submission in enumerate([answers, wrong, wrong]):
+            player = User.objects.create_user(username=f'player{index}', password='password')
+            self.login(player)
+            self.client.post(
+                reverse('quiz:quiz-submit', kwargs={'pk': self.quiz.pk}),
+                {"answers": submission},
+                format='json',
+            )
+        self.login(self.author)
+
+    def login(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_rollups_served_from_stats_tables(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('"user_answer' in q["sql"] for q in queries.captured_queries))
+        first, second = response.data
+        self.assertEqual((first["answer_count"], first["correct_count"]), (3, 1))
+        self.assertAlmostEqual(first["correct_rate"], 1 / 3)
+        self.assertEqual([o["pick_count"] for o in first["answer_options"]], [1, 2, 0])
+        self.assertEqual(second["correct_rate"], 1.0)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        before = self.client.get(self.url).data
+
+        call_command("rebuild_question_analytics", stdout=StringIO())
+
+        self.assertEqual(self.client.get(self.url).data, before)
+
+    def test_analytics_are_creator_only(self):
+        self.login(User.objects.get(username='player0'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FavouriteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.player = User.objects.create_user(username='player', password='password')
+        self.quizzes = [make_quiz(self.author) for _ in range(3)]
+        refresh = RefreshToken.for_user(self.player)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def favourite_url(self, quiz):
+        return reverse('quiz:quiz-favourite', kwargs={'pk': quiz.pk})
+
+    def favourite_count(self, quiz):
+        return QuizStats.objects.get(pk=quiz.pk).favourite_count
+
+    def test_add_and_remove_maintain_counter(self):
+        quiz = self.quizzes[0]
+        self.assertEqual(self.client.post(self.favourite_url(quiz)).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(self.favourite_url(quiz)).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.favourite_count(quiz), 1)
+
+        self.assertEqual(self.client.delete(self.favourite_url(quiz)).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.delete(self.favourite_url(quiz)).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.favourite_count(quiz), 0)
+
+    def test_counter_follows_set_clear_and_user_delete(self):
+        other = User.objects.create_user(username='other', password='password')
+        self.player.favourite_tests.set(self.quizzes[:2])
+        other.favourite_tests.add(self.quizzes[0])
+        self.assertEqual([self.favourite_count(q) for q in self.quizzes], [2, 1, 0])
+
+        self.player.favourite_tests.set(self.quizzes[1:])
+        self.quizzes[1].favoured_by.clear()
+        self.assertEqual([self.favourite_count(q) for q in self.quizzes], [1, 0, 1])
+
+        other.delete()
+        self.assertEqual([self.favourite_count(q) for q in self.quizzes], [0, 0, 1])
+
+        QuizStats.objects.update(favourite_count=7)
+        call_command('rebuild_quiz_stats', stdout=StringIO())
+        self.assertEqual([self.favourite_count(q) for q in self.quizzes], [0, 0, 1])
+
+    def test_list_flags_favourites_in_constant_queries(self):
+        self.player.favourite_tests.add(self.quizzes[1])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('quiz:quiz-list'))
+
+        self.assertEqual(len(queries.captured_queries), 2)
+        flags = {row["id"]: (row["is_favourite"], row["favourite_count"]) for row in response.data["results"]}
+        self.assertEqual(flags[self.quizzes[1].pk], (True, 1))
+        self.assertEqual(flags[self.quizzes[0].pk], (False, 0))
+
+    def test_my_favourites_is_paginated(self):
+        self.player.favourite_tests.set(self.quizzes)
+        url = reverse('quiz:quiz-favourites')
+
+        first = self.client.get(url, {"page_size": 2})
+        self.assertEqual(len(first.data["results"]), 2)
+        self.assertTrue(all(row["is_favourite"] for row in first.data["results"]))
+        second = self.client.get(first.data["next"])
+        self.assertEqual(len(second.data["results"]), 1)
+        self.assertIsNone(second.data["next"])
+
+
+class AdminQueryTests(APITestCase):
+    def setUp(self):
+        answer_key_cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='password')
+        self.author = User.objects.create_user(username='author', password='password')
+        self.client.force_login(self.admin)
+
+    def add_attempts(self, count):
+        attempts = []
+        for _ in range(count):
+            player = User.objects.create_user(username=f'player{User.objects.count()}')
+            quiz = make_quiz(self.author, questions=3)
+            key = get_answer_key(quiz)
+            attempts.append(record_attempt(quiz, player, key, correct_answers(quiz)))
+        return attempts
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries.captured_queries)
+
+    def test_changelists_are_bounded(self):
+        urls = [
+            reverse('admin:quiz_quizattempt_changelist'),
+            reverse('admin:quiz_question_changelist'),
+            reverse('admin:quiz_quiz_changelist'),
+            reverse('admin:users_user_changelist'),
+        ]
+        self.add_attempts(2)
+        before = [self.count_queries(url) for url in urls]
+        self.add_attempts(6)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_attempt_change_page_is_bounded(self):
+        small = self.add_attempts(1)[0]
+        url = lambda attempt: reverse('admin:quiz_quizattempt_change', args=[attempt.pk])  # noqa: E731
+        self.count_queries(url(small))  # warm the content type cache
+        before = self.count_queries(url(small))
+
+        quiz = make_quiz(self.author, questions=12)
+        large = record_attempt(quiz, self.author, get_answer_key(quiz), correct_answers(quiz))
+        self.assertEqual(self.count_queries(url(large)), before)
+
+    def test_quiz_filter_lists_only_selected_quiz(self):
+        attempts = self.add_attempts(3)
+        url = reverse('admin:quiz_quizattempt_changelist')
+        response = self.client.get(url, {'quiz__id__exact': attempts[0].quiz_id})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        quiz_filter = response.context['cl'].filter_specs[0]
+        self.assertEqual([pk for pk, _ in quiz_filter.lookup_choices], [attempts[0].quiz_id])
+
+
+def make_image(size=(2400, 1600), mode='RGB', fmt='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, color='red').save(buffer, format=fmt)
+    return ContentFile(buffer.getvalue(), name=f'photo.{fmt.lower()}')
+
+
+class ImageVariantTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, JOBS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.quiz = make_quiz(self.author, questions=1)
+        self.question = self.quiz.questions.get()
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.question_photo = image
+            self.question.save()
+        self.question.refresh_from_db()
+        return self.question.question_photo_variants
+
+    def test_variants_are_resized_webp_and_jpeg(self):
+        variants = self.upload(make_image(mode='RGBA'))
+
+        self.assertEqual(variants['source'], self.question.question_photo.name)
+        for label, max_side in (('thumbnail', 160), ('medium', 800)):
+            for extension, image_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with default_storage.open(variants[label][extension]) as stored:
+                    image = Image.open(stored)
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(max(image.size), max_side)
+
+    def test_detail_exposes_variant_urls_and_is_invalidated(self):
+        url = reverse('quiz:quiz-detail', kwargs={'pk': self.quiz.pk})
+        self.assertEqual(self.client.get(url).json()['questions'][0]['question_photo_variants'], {})
+
+        variants = self.upload(make_image())
+
+        question = self.client.get(url).json()['questions'][0]
+        self.assertEqual(set(question['question_photo_variants']), {'thumbnail', 'medium'})
+        self.assertTrue(
+            question['question_photo_variants']['medium']['webp'].endswith(variants['medium']['webp'])
+        )
+
+    def test_replacing_or_clearing_photo_drops_old_variants(self):
+        first = self.upload(make_image())
+        second = self.upload(make_image(size=(300, 200), fmt='JPEG'))
+        self.assertFalse(default_storage.exists(first['thumbnail']['webp']))
+        self.assertTrue(default_storage.exists(second['thumbnail']['webp']))
+
+        self.assertEqual(self.upload(None), {})
+        self.assertFalse(default_storage.exists(second['thumbnail']['webp']))
+
+    def test_unreadable_upload_is_not_retried(self):
+        with self.assertLogs('quiz.images', 'WARNING'):
+            variants = self.upload(ContentFile(b'not an image', name='broken.png'))
+        self.assertEqual(variants, {'source': self.question.question_photo.name})
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        self.player = User.objects.create_user(username='player', password='password')
+        self.quizzes = [make_quiz(self.author, questions=3) for _ in range(3)]
+        self.player.favourite_tests.add(self.quizzes[0])
+        self.factory = AsyncRequestFactory()
+
+    def headers(self, user):
+        return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def both(self, view, method, url, user, data=None, **kwargs):
+        """Run a request through the DRF route and the async view."""
+        headers = self.headers(user) if user else {}
+        sync = getattr(self.client, method)(url, data, format='json', headers=headers)
+        if method == 'post':
+            request = self.factory.post(url, json.dumps(data), content_type='application/json', headers=headers)
+        else:
+            request = self.factory.get(url, data, headers=headers)
+        return sync, async_to_sync(view)(request, **kwargs)
+
+    def test_list_matches_viewset(self):
+        url = reverse('quiz:quiz-list')
+        sync, native = self.both(async_views.quiz_list, 'get', url, self.player, {'page_size': 2})
+
+        self.assertEqual(native.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(native.content), sync.json())
+        self.assertEqual(len(sync.json()['results']), 2)
+
+    def test_detail_matches_viewset_and_honours_validators(self):
+        quiz = self.quizzes[1]
+        url = reverse('quiz:quiz-detail', kwargs={'pk': quiz.pk})
+        sync, native = self.both(async_views.quiz_detail, 'get', url, self.author, pk=quiz.pk)
+
+        self.assertEqual(json.loads(native.content), sync.json())
+        self.assertEqual(native['ETag'], sync['ETag'])
+        request = self.factory.get(url, headers={**self.headers(self.author), 'If-None-Match': native['ETag']})
+        self.assertEqual(async_to_sync(async_views.quiz_detail)(request, pk=quiz.pk).status_code, 304)
+
+        sync, native = self.both(async_views.quiz_detail, 'get', url, self.player, pk=quiz.pk)
+        self.assertEqual(native.status_code, sync.status_code)
+
+    def test_submit_grades_like_viewset(self):
+        quiz = self.quizzes[2]
+        url = reverse('quiz:quiz-submit', kwargs={'pk': quiz.pk})
+        answers = {'answers': correct_answers(quiz)}
+        request = self.factory.post(url, json.dumps(answers), content_type='application/json',
+                                    headers=self.headers(self.player))
+        with self.captureOnCommitCallbacks(execute=True):
+            native = async_to_sync(async_views.quiz_submit)(request, pk=quiz.pk)
+
+        self.assertEqual(native.status_code, status.HTTP_201_CREATED)
+        result = json.loads(native.content)
+        self.assertEqual((result['score'], result['max_score']), (3, 3))
+        self.assertEqual(QuizAttempt.objects.filter(quiz=quiz, user=self.player).count(), 1)
+
+        bad = {'answers': [{'question': 0, 'selected_options': []}]}
+        sync, native = self.both(async_views.quiz_submit, 'post', url, self.player, bad, pk=quiz.pk)
+        self.assertEqual(native.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(native.content), sync.json())
+
+        sync, native = self.both(async_views.quiz_submit, 'post', url, None, answers, pk=quiz.pk)
+        self.assertEqual((native.status_code, native['WWW-Authenticate']), (401, sync['WWW-Authenticate']))
+
+    def test_unsupported_requests_fall_back_to_viewset(self):
+        request = self.factory.get(
+            reverse('quiz:quiz-list'), {'search': 'quiz'}, headers=self.headers(self.player)
+        )
+        response = async_to_sync(async_views.quiz_list)(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('count', response.data)
+
+
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='password')
+        refresh = RefreshToken.for_user(self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        make_quiz(self.author)
+        self.url = reverse('quiz:quiz-list')
+
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(self.url))
+
+    @override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_QUERY_BUDGETS={'quiz:quiz-list': 0})
+    def test_server_timing_and_query_budget_warning(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('pickmequiz.instrumentation', 'WARNING') as logs:
+                response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response['Server-Timing'],
+            rf'^db;dur=[\d.]+;desc="{len(queries)} queries", serialize;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        self.assertIn(f'view=quiz:quiz-list method=GET status=200 queries={len(queries)} budget=0', logs.output[0])
+
+        # Within budget the line is logged at INFO level.
+        with override_settings(INSTRUMENTATION_QUERY_BUDGETS={}), \
+                self.assertLogs('pickmequiz.instrumentation', 'INFO') as logs:
+            self.client.get(self.url)
+        self.assertTrue(logs.output[0].startswith('INFO:'))
@@ -1,13 +1,28 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import QuizViewSet
+from . import async_views
+from .views import CacheStatsAPIView, ExportAPIView, QuizViewSet
 
 app_name = "quiz"
 
 router = routers.DefaultRouter()
 router.register(r"quizzes", QuizViewSet, basename="quiz")
 
+# Native async handlers for the hot quiz routes; they shadow the router's
+# patterns and fall back to the viewset for anything they don't serve.
+async_urlpatterns = [
+    path("api/quizzes/", async_views.quiz_list, name="quiz-list"),
+    path("api/quizzes/<int:pk>/", async_views.quiz_detail, name="quiz-detail"),
+    path("api/quizzes/<int:pk>/submit/", async_views.quiz_submit, name="quiz-submit"),
+]
+
 urlpatterns = [
     path("api/", include(router.urls)),
+    path("api/cache-stats", CacheStatsAPIView.as_view(), name="cache-stats"),
+    path("api/export/<str:dataset>", ExportAPIView.as_view(), name="export"),
 ]
+
+if settings.QUIZ_ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
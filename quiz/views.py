@@ -1,13 +1,79 @@
-from django.db.models import QuerySet
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, QuerySet, Value, prefetch_related_objects
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view
-from rest_framework import viewsets
-from rest_framework.filters import SearchFilter
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    OpenApiTypes,
+    extend_schema,
+    extend_schema_view,
+)
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import (
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.authentication import user_cache
+from users.blacklist import blacklist_filter
 
-from .models import Quiz
+from .analytics import quiz_analytics
+from .answer_keys import answer_key_cache, get_answer_key
+from .deadlines import open_attempt
+from .exporting import DATASETS, EXPORT_FORMATS, export_stream
+from .grading import record_attempt
+from .importer import import_quizzes
+from .leaderboard import get_top_scores, get_user_rank
+from .models import Quiz, QuizAttempt
+from .pagination import QuizListPagination
+from .parsers import NDJSONParser
 from .permissions import IsCreator
-from .serializers import QuizListSerializer, QuizDetailSerializer
+from .search import QuizSearchFilter
+from .stats import record_attempt_started
+from .serializers import (
+    AttemptResultSerializer,
+    AttemptStartSerializer,
+    AttemptSubmitSerializer,
+    LeaderboardSerializer,
+    QuestionAnalyticsSerializer,
+    QuizDetailSerializer,
+    QuizListSerializer,
+)
+
+
+def detail_validators(quiz: Quiz):
+    """
+    ETag and Last-Modified (epoch seconds) of a quiz detail response.
+    Conditional requests are answered from the ETag alone: Last-Modified has
+    whole-second precision, so an If-Modified-Since check would answer 304
+    for an edit made in the same second as the client's copy.
+    """
+    etag = quote_etag(f"quiz-{quiz.pk}-{quiz.last_modified.timestamp()}")
+    return etag, int(quiz.last_modified.timestamp())
+
+
+def detail_cache_key(quiz: Quiz, host: str) -> str:
+    return f"quiz-detail:{quiz.pk}:{quiz.last_modified.timestamp()}:{host}"
+
+
+def set_detail_headers(response: HttpResponse, etag: str, last_modified: int) -> HttpResponse:
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @extend_schema_view(
@@ -46,13 +112,22 @@ class QuizViewSet(viewsets.ModelViewSet):
     serializer_class = QuizListSerializer
     detail_serializer_class = QuizDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsCreator]
+    pagination_class = QuizListPagination
 
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, QuizSearchFilter, OrderingFilter]
     filterset_fields = ["category"]
-    search_fields = ["title", "description"]
+    ordering_fields = [
+        "created_at",
+        "title",
+        "question_count",
+        "attempt_count",
+        "completion_rate",
+        "average_score",
+        "favourite_count",
+    ]
 
     def get_serializer_class(self):
-        if self.action != "list":
+        if self.action not in ("list", "favourites"):
             if hasattr(self, "detail_serializer_class"):
                 return self.detail_serializer_class
 
@@ -63,8 +138,307 @@ class QuizViewSet(viewsets.ModelViewSet):
 
         if self.request.user.is_authenticated:
             if self.action == "list":
-                queryset = Quiz.objects.all().select_related("creator")
+                return self._list_queryset()
+            if self.action == "favourites":
+                return self._list_queryset(favourites_only=True)
+            if self.action in (
+                "retrieve",
+                "update",
+                "partial_update",
+                "submit",
+                "leaderboard",
+                "analytics",
+                "favourite",
+            ):
                 return queryset
             queryset = Quiz.objects.prefetch_related("questions__answer_options").all()
             return queryset
         return queryset.none()
+
+    def _list_queryset(self, favourites_only: bool = False) -> QuerySet:
+        queryset = Quiz.objects.select_related("stats").annotate(
+            question_count=F("stats__question_count"),
+            attempt_count=F("stats__attempt_count"),
+            completion_rate=F("stats__completion_rate"),
+            average_score=F("stats__average_score"),
+            favourite_count=F("stats__favourite_count"),
+        )
+        if favourites_only:
+            return queryset.filter(favoured_by=self.request.user).annotate(is_favourite=Value(True))
+        # One EXISTS per row of the page instead of a lookup per serialized quiz.
+        favourites = Quiz.favoured_by.through.objects.filter(
+            quiz_id=OuterRef("pk"), user_id=self.request.user.pk
+        )
+        return queryset.annotate(is_favourite=Exists(favourites))
+
+    def update(self, request: Request, *args, **kwargs) -> Response:
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        instance._prefetched_objects_cache = {}
+        prefetch_related_objects([instance], "questions__answer_options")
+        return Response(serializer.data)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponse:
+        """
+        Serve the quiz detail from a cache of rendered JSON keyed on
+        ``last_modified``, answering conditional requests with 304 before any
+        question is loaded.
+        """
+        quiz = self.get_object()
+        etag, last_modified = detail_validators(quiz)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self._render_detail(request, quiz)
+        return set_detail_headers(response, etag, last_modified)
+
+    def _render_detail(self, request: Request, quiz: Quiz) -> HttpResponse:
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            prefetch_related_objects([quiz], "questions__answer_options")
+            return Response(self.get_serializer(quiz).data)
+
+        cache = caches[settings.QUIZ_DETAIL_CACHE]
+        key = detail_cache_key(quiz, request.get_host())
+        content = cache.get(key)
+        if content is None:
+            prefetch_related_objects([quiz], "questions__answer_options")
+            content = JSONRenderer().render(self.get_serializer(quiz).data)
+            cache.set(key, content, settings.QUIZ_DETAIL_CACHE_TIMEOUT)
+        return HttpResponse(content, content_type="application/json")
+
+    @extend_schema(
+        summary="Start a Quiz Attempt",
+        description=(
+            "Open an attempt and start its clock. Time limited quizzes must be submitted "
+            "with the returned attempt id before the deadline."
+        ),
+        tags=["Attempts"],
+        request=None,
+        responses={201: AttemptStartSerializer},
+    )
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def start(self, request: Request, pk=None) -> Response:
+        quiz = self.get_object()
+        with transaction.atomic():
+            attempt = QuizAttempt.objects.create(user=request.user, quiz=quiz)
+            record_attempt_started(quiz.pk)
+        return Response(AttemptStartSerializer(attempt).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Submit a Quiz Attempt",
+        description=(
+            "Submit all answers of an attempt at once and get the graded result. "
+            "Late submissions of a started attempt are rejected with 409."
+        ),
+        tags=["Attempts"],
+        request=AttemptSubmitSerializer,
+        responses={201: AttemptResultSerializer},
+    )
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def submit(self, request: Request, pk=None) -> Response:
+        quiz = self.get_object()
+        answer_key = get_answer_key(quiz)
+
+        serializer = AttemptSubmitSerializer(
+            data=request.data, context={"request": request, "answer_key": answer_key}
+        )
+        serializer.is_valid(raise_exception=True)
+        attempt = open_attempt(quiz, request.user, serializer.validated_data.get("attempt"))
+
+        attempt = record_attempt(
+            quiz, request.user, answer_key, serializer.validated_data["answers"], attempt=attempt
+        )
+        return Response(
+            AttemptResultSerializer(attempt).data, status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        methods=["POST"],
+        summary="Add a Quiz to Favourites",
+        description="Add the quiz to the favourites of the requesting user.",
+        tags=["Favourites"],
+        request=None,
+        responses={201: None, 200: None},
+    )
+    @extend_schema(
+        methods=["DELETE"],
+        summary="Remove a Quiz from Favourites",
+        description="Remove the quiz from the favourites of the requesting user.",
+        tags=["Favourites"],
+        request=None,
+        responses={204: None},
+    )
+    @action(detail=True, methods=["post", "delete"], permission_classes=[IsAuthenticated])
+    def favourite(self, request: Request, pk=None) -> Response:
+        quiz = self.get_object()
+        favourites = request.user.favourite_tests
+        if request.method == "DELETE":
+            favourites.remove(quiz)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if favourites.filter(pk=quiz.pk).exists():
+            return Response(status=status.HTTP_200_OK)
+        favourites.add(quiz)
+        return Response(status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="My Favourite Quizzes",
+        description="Paginated list of the quizzes the requesting user has favourited.",
+        tags=["Favourites"],
+        responses={200: QuizListSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def favourites(self, request: Request) -> Response:
+        return self.list(request)
+
+    @extend_schema(
+        summary="Bulk Import Quizzes",
+        description=(
+            "Import quizzes from an application/x-ndjson body, one quiz per line in the "
+            "create payload shape (plus optional category). Invalid lines are reported "
+            "and skipped."
+        ),
+        tags=["Quizzes"],
+        request={"application/x-ndjson": OpenApiTypes.STR},
+        parameters=[
+            OpenApiParameter("batch_size", OpenApiTypes.INT, description="Quizzes per transaction."),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAuthenticated],
+        parser_classes=[NDJSONParser],
+    )
+    def bulk_import(self, request: Request) -> Response:
+        try:
+            batch_size = int(request.query_params.get("batch_size", settings.QUIZ_IMPORT_BATCH_SIZE))
+        except ValueError:
+            batch_size = settings.QUIZ_IMPORT_BATCH_SIZE
+        batch_size = min(max(batch_size, 1), settings.QUIZ_IMPORT_BATCH_SIZE)
+
+        report = import_quizzes(request.data, request.user, batch_size=batch_size)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Quiz Leaderboard",
+        description="Top scores of the quiz and the rank of the requesting user.",
+        tags=["Attempts"],
+        parameters=[
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Number of top scores."),
+        ],
+        responses={200: LeaderboardSerializer},
+    )
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def leaderboard(self, request: Request, pk=None) -> Response:
+        quiz = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = min(max(limit, 1), settings.QUIZ_LEADERBOARD_MAX_LIMIT)
+
+        data = {
+            "top": get_top_scores(quiz.pk, limit),
+            "me": get_user_rank(quiz.pk, request.user),
+        }
+        return Response(LeaderboardSerializer(data).data)
+
+    @extend_schema(
+        summary="Question Analytics",
+        description="How often each question is answered correctly and how picks spread over its options.",
+        tags=["Attempts"],
+        responses={200: QuestionAnalyticsSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def analytics(self, request: Request, pk=None) -> Response:
+        quiz = self.get_object()
+        return Response(QuestionAnalyticsSerializer(quiz_analytics(quiz), many=True).data)
+
+
+class CacheStatsAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        summary="In-process Cache Statistics",
+        description="Hit/miss counters of the caches held by the worker serving the request.",
+        tags=["Monitoring"],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request: Request) -> Response:
+        return Response(
+            {
+                "answer_keys": answer_key_cache.stats(),
+                "users": user_cache.stats(),
+                "token_blacklist": blacklist_filter.stats(),
+            }
+        )
+
+
+class ExportAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    content_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    @extend_schema(
+        summary="Export Data",
+        description=(
+            "Stream every row of a dataset (quizzes, attempts or answers) as NDJSON or CSV. "
+            "Pass the X-Export-Until header of the previous export as since to get only "
+            "the rows changed in between. Without since or until the export is full and also "
+            "includes open attempts and their answers."
+        ),
+        tags=["Export"],
+        parameters=[
+            OpenApiParameter("output", OpenApiTypes.STR, enum=list(EXPORT_FORMATS)),
+            OpenApiParameter("gzip", OpenApiTypes.BOOL),
+            OpenApiParameter("since", OpenApiTypes.DATETIME, description="Exclusive lower watermark."),
+            OpenApiParameter("until", OpenApiTypes.DATETIME, description="Inclusive upper watermark."),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    def get(self, request: Request, dataset: str) -> StreamingHttpResponse:
+        if dataset not in DATASETS:
+            return Response({"error": f"Unknown dataset {dataset!r}"}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise serializers.ValidationError({"output": f"Must be one of {', '.join(EXPORT_FORMATS)}."})
+        compress = request.query_params.get("gzip") in ("1", "true")
+        since = self._parse_watermark(request, "since")
+        until = self._parse_watermark(request, "until")
+        watermark = until or timezone.now()
+        # A full export has no upper bound, so it includes rows with no watermark yet
+        # (open attempts and their answers); a delta export after it may repeat rows.
+        if since is not None or until is not None:
+            until = watermark
+
+        response = StreamingHttpResponse(
+            export_stream(dataset, output=output, compress=compress, since=since, until=until),
+            content_type="application/gzip" if compress else self.content_types[output],
+        )
+        filename = f"{dataset}.{output}" + (".gz" if compress else "")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Export-Until"] = watermark.isoformat()
+        return response
+
+    def _parse_watermark(self, request: Request, name: str):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            # Well formed but not a real date, such as month 13.
+            parsed = None
+        if parsed is None:
+            raise serializers.ValidationError({name: "Must be an ISO 8601 datetime."})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -1,19 +1,27 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from .models import User
+from quiz.admin import CappedInlineFormSet
 from quiz.models import QuizAttempt
 
 class QuizAttemptInline(admin.TabularInline):
     model = QuizAttempt
     fk_name = 'user'
+    formset = CappedInlineFormSet
     fields = ('quiz', 'started_at', 'completed_at')
     readonly_fields = ('quiz', 'started_at', 'completed_at')
+    ordering = ('-started_at',)
     extra = 0
     can_delete = False
 
     def has_add_permission(self, request, obj):
         return False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('quiz')
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
@@ -25,7 +33,22 @@ class CustomUserAdmin(UserAdmin):
 
     inlines = [QuizAttemptInline]
     list_display = UserAdmin.list_display + ('quiz_attempts_count',)
+    autocomplete_fields = ('favourite_tests',)
+
+    def get_queryset(self, request):
+        # A correlated subquery rather than a JOIN + GROUP BY, so the
+        # changelist COUNT stays a plain count over users.
+        attempts = (
+            QuizAttempt.objects.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return super().get_queryset(request).annotate(
+            _quiz_attempts_count=Coalesce(Subquery(attempts, output_field=IntegerField()), 0)
+        )
 
+    @admin.display(description='Quiz Attempts Count', ordering='_quiz_attempts_count')
     def quiz_attempts_count(self, obj):
-        return obj.quiz_attempts.count()
-    quiz_attempts_count.short_description = 'Quiz Attempts Count'
\ No newline at end of file
+        return obj._quiz_attempts_count
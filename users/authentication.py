@@ -0,0 +1,127 @@
+import threading
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+
+class UserCache:
+    """
+    Users of authenticated requests, kept for ``AUTH_USER_CACHE_TIMEOUT``
+    seconds in the ``AUTH_USER_CACHE`` alias.
+
+    Entries are keyed by user id. Saving or deleting a user drops its entry
+    (see ``users.signals``), so deactivations and password changes apply to
+    the next request; rows changed with ``QuerySet.update()`` are picked up
+    when the entry expires. Hits and misses are counted per process.
+    """
+
+    key_prefix = "auth_user"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.AUTH_USER_CACHE]
+
+    def key(self, user_id: Any) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def get(self, user_id: Any) -> Optional[Any]:
+        key = self.key(user_id)
+        user = self.cache.get(key)
+        self._count(user is not None)
+        if user is None:
+            user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).first()
+            if user is not None:
+                self.cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget(self, user_id: Any) -> Optional[Any]:
+        key = self.key(user_id)
+        user = await self.cache.aget(key)
+        self._count(user is not None)
+        if user is None:
+            user = await User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+            if user is not None:
+                await self.cache.aset(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+    def invalidate(self, user) -> None:
+        key = self.key(getattr(user, jwt_settings.USER_ID_FIELD))
+
+        def delete():
+            self.cache.delete(key)
+
+        delete()
+        # Again once committed: a request may have cached the old row meanwhile.
+        transaction.on_commit(delete)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` resolving users through ``user_cache`` instead of
+    a query per request. The token version (the password hash claim, with
+    ``CHECK_REVOKE_TOKEN``) is still checked against the cached user.
+    """
+
+    def get_user(self, validated_token: Token) -> Any:
+        return self.check_user(user_cache.get(self.get_user_id(validated_token)), validated_token)
+
+    async def aget_user(self, validated_token: Token) -> Any:
+        return self.check_user(await user_cache.aget(self.get_user_id(validated_token)), validated_token)
+
+    def get_user_id(self, validated_token: Token) -> Any:
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def check_user(self, user: Optional[Any], validated_token: Token) -> Any:
+        """The checks ``JWTAuthentication.get_user`` makes once the user is loaded."""
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,192 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from jobs.models import Job, JobStatus
+from jobs.queue import current_job, task
+
+GENERATION_KEY = "token_blacklist_generation"
+
+
+class BloomFilter:
+    """Set membership with no false negatives and about ``error_rate`` false positives at ``capacity`` items."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """
+    Process-local Bloom filter of the jtis of blacklisted, unexpired refresh
+    tokens, put in front of the blacklist lookup: a jti the filter does not
+    contain is certainly not blacklisted.
+
+    Blacklisting a token bumps a generation counter in the
+    ``AUTH_BLACKLIST_CACHE`` alias once committed, and a process whose
+    filter was built under an older generation rebuilds it from the table.
+    With a per-process cache, tokens blacklisted by other processes are
+    only seen when the filter is rebuilt after
+    ``AUTH_BLACKLIST_FILTER_MAX_AGE`` seconds, so use a shared cache when
+    running several processes.
+    """
+
+    def __init__(self):
+        self.checks = 0
+        self.skipped = 0
+        self.rebuilds = 0
+        self._filter: Optional[BloomFilter] = None
+        self._generation = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.AUTH_BLACKLIST_CACHE]
+
+    def current_generation(self):
+        generation = self.cache.get(GENERATION_KEY)
+        if generation is None:
+            # Evicted or never set: start a new generation so no process keeps an old filter.
+            self.cache.add(GENERATION_KEY, time.time_ns(), None)
+            generation = self.cache.get(GENERATION_KEY)
+        return generation
+
+    def bump_generation(self) -> None:
+        self.cache.set(GENERATION_KEY, time.time_ns(), None)
+
+    def rebuild(self) -> None:
+        # Read the generation first: a token blacklisted while the table is read bumps it again.
+        generation = self.current_generation()
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list(
+                "token__jti", flat=True
+            )
+        )
+        bloom = BloomFilter(
+            max(len(jtis) * 2, settings.AUTH_BLACKLIST_FILTER_CAPACITY), settings.AUTH_BLACKLIST_FILTER_ERROR_RATE
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self._filter, self._generation, self._built_at = bloom, generation, time.monotonic()
+            self.rebuilds += 1
+
+    def might_contain(self, jti: str) -> bool:
+        with self._lock:
+            stale = (
+                self._filter is None
+                or time.monotonic() - self._built_at > settings.AUTH_BLACKLIST_FILTER_MAX_AGE
+            )
+        if stale or self.current_generation() != self._generation:
+            self.rebuild()
+        with self._lock:
+            found = jti in self._filter
+            self.checks += 1
+            self.skipped += not found
+        return found
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        transaction.on_commit(self.bump_generation)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._filter = self._generation = None
+            self.checks = self.skipped = self.rebuilds = 0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {
+                "checks": self.checks,
+                "skipped": self.skipped,
+                "rebuilds": self.rebuilds,
+                "skip_rate": self.skipped / self.checks if self.checks else None,
+            }
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """``RefreshToken`` that only queries the blacklist for jtis ``blacklist_filter`` might contain."""
+
+    def check_blacklist(self) -> None:
+        if settings.AUTH_BLACKLIST_FILTER and not blacklist_filter.might_contain(self.payload[jwt_settings.JTI_CLAIM]):
+            return
+        super().check_blacklist()
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+
+@task
+def prune_tokens(batch_size: Optional[int] = None, reschedule: bool = False) -> int:
+    """
+    Delete expired outstanding tokens and their blacklist rows,
+    ``batch_size`` tokens per transaction. With ``reschedule`` the job
+    enqueues its next run ``AUTH_TOKEN_PRUNE_INTERVAL`` seconds later.
+    """
+    batch_size = batch_size or settings.AUTH_TOKEN_PRUNE_BATCH_SIZE
+    now = timezone.now()
+    pruned = last = 0
+    while True:
+        # Walk the primary key: tokens expire in roughly the order they were issued.
+        ids = list(
+            OutstandingToken.objects.filter(pk__gt=last, expires_at__lte=now)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        # Their blacklist rows go with them, in one more DELETE.
+        _, deleted = OutstandingToken.objects.filter(pk__in=ids).only("pk").delete()
+        pruned += deleted.get(OutstandingToken._meta.label, 0)
+        last = ids[-1]
+
+    if reschedule:
+        schedule_prune_tokens(batch_size)
+    return pruned
+
+
+def schedule_prune_tokens(batch_size: Optional[int] = None) -> Optional[Job]:
+    """Enqueue the next recurring ``prune_tokens`` run, unless another one is queued or running."""
+    name = f"{prune_tokens.__module__}.{prune_tokens.__qualname__}"
+    pending = Job.objects.filter(name=name, status__in=(JobStatus.QUEUED, JobStatus.RUNNING))
+    job = current_job()
+    if job is not None:
+        # The run rescheduling itself.
+        pending = pending.exclude(pk=job.pk)
+    if pending.exists():
+        return None
+    run_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_PRUNE_INTERVAL)
+    return prune_tokens.enqueue(batch_size=batch_size, reschedule=True, run_at=run_at)
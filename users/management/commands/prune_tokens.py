@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.blacklist import prune_tokens, schedule_prune_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens, or schedule a recurring job that does."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.AUTH_TOKEN_PRUNE_BATCH_SIZE)
+        parser.add_argument(
+            "--schedule",
+            action="store_true",
+            help="Enqueue a prune_tokens job that reschedules itself every AUTH_TOKEN_PRUNE_INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            job = schedule_prune_tokens(options["batch_size"])
+            if job is None:
+                self.stdout.write("A prune_tokens job is already queued.")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Scheduled prune_tokens for {job.run_at:%Y-%m-%d %H:%M:%S}."))
+            return
+        pruned = prune_tokens(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} expired tokens."))
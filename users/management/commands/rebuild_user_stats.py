@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized user statistics from completed attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "user_ids", nargs="*", type=int, help="Limit the rebuild to these users."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_user_stats(
+            user_ids=options["user_ids"] or None, batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {rebuilt} users."))
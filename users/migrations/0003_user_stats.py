@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_user_stats(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    UserStats = apps.get_model("users", "UserStats")
+
+    users = User.objects.annotate(
+        passed=Count(
+            "quiz_attempts__quiz",
+            filter=Q(quiz_attempts__completed_at__isnull=False),
+            distinct=True,
+        )
+    ).values_list("pk", "passed")
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk, passed_quiz_count=passed) for pk, passed in users.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0010_question_analytics"),
+        ("users", "0002_user_about_user_favourite_tests"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("passed_quiz_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "User Statistics",
+                "verbose_name_plural": "User Statistics",
+                "db_table": "user_stats",
+            },
+        ),
+        migrations.RunPython(populate_user_stats, migrations.RunPython.noop),
+    ]
@@ -4,5 +4,21 @@ from django.db import models
 
 class User(AbstractUser):
     avatar = models.ImageField(upload_to="avatar", null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     about = models.TextField(null=True, blank=True)
-    favourite_tests = models.ManyToManyField("quiz.Quiz", blank=True, related_name="favoured_by")
\ No newline at end of file
+    favourite_tests = models.ManyToManyField("quiz.Quiz", blank=True, related_name="favoured_by")
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    passed_quiz_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "user_stats"
+        verbose_name = "User Statistics"
+        verbose_name_plural = "User Statistics"
+
+    def __str__(self):
+        return f"Statistics for User {self.user_id}"
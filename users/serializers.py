@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from quiz.images import variant_urls
 from quiz.models import Quiz
 User = get_user_model()
 
@@ -33,13 +34,26 @@ class FavouriteSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
 
+    avatar_variants = serializers.SerializerMethodField()
+
     favourite_tests = FavouriteSerializer(many=True)
 
     passed_tests_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ("id", "username", "email", "first_name", "last_name", "avatar", "about", "favourite_tests", "passed_tests_count")
+        fields = (
+            "id",
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "avatar",
+            "avatar_variants",
+            "about",
+            "favourite_tests",
+            "passed_tests_count",
+        )
 
     def get_avatar(self, obj):
         request = self.context.get("request")
@@ -47,5 +61,9 @@ class UserSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.avatar.url)
         return None
 
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar_variants, self.context.get("request"))
+
     def get_passed_tests_count(self, obj):
-        return obj.quiz_attempts.filter(completed_at__isnull=False).values("quiz").distinct().count()
+        stats = getattr(obj, "stats", None)
+        return stats.passed_quiz_count if stats else 0
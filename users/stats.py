@@ -0,0 +1,67 @@
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from jobs.queue import task
+
+from .models import User, UserStats
+
+
+def record_quiz_passed(user_id: int) -> None:
+    """Count a quiz the user completed for the first time."""
+    updated = UserStats.objects.filter(pk=user_id).update(
+        passed_quiz_count=F("passed_quiz_count") + 1
+    )
+    if not updated:
+        # Users created before the stats row existed: create it, then count.
+        UserStats.objects.bulk_create([UserStats(user_id=user_id)], ignore_conflicts=True)
+        UserStats.objects.filter(pk=user_id).update(passed_quiz_count=F("passed_quiz_count") + 1)
+
+
+def record_quizzes_passed(user_ids: Iterable[int]) -> None:
+    """Count one newly passed quiz per occurrence of a user id, one UPDATE per distinct multiplicity."""
+    by_count = defaultdict(list)
+    for user_id, count in Counter(user_ids).items():
+        by_count[count].append(user_id)
+    if not by_count:
+        return
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for ids in by_count.values() for user_id in ids], ignore_conflicts=True
+    )
+    for count, ids in by_count.items():
+        UserStats.objects.filter(pk__in=ids).update(passed_quiz_count=F("passed_quiz_count") + count)
+
+
+def record_quiz_deleted(quiz_id: int) -> None:
+    """Uncount a quiz that is being deleted from everyone who completed it, with one UPDATE."""
+    UserStats.objects.filter(
+        user__quiz_attempts__quiz_id=quiz_id, user__quiz_attempts__completed_at__isnull=False
+    ).update(passed_quiz_count=Greatest(F("passed_quiz_count") - 1, Value(0)))
+
+
+@task
+def rebuild_user_stats(user_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """Recompute the counters from completed attempts with one GROUP BY query."""
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    rows = users.annotate(
+        passed=Count(
+            "quiz_attempts__quiz",
+            filter=Q(quiz_attempts__completed_at__isnull=False),
+            distinct=True,
+        )
+    ).values_list("pk", "passed")
+
+    with transaction.atomic():
+        stats = UserStats.objects.bulk_create(
+            [UserStats(user_id=pk, passed_quiz_count=passed) for pk, passed in rows.iterator()],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["passed_quiz_count"],
+        )
+    return len(stats)
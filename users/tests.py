@@ -1,12 +1,37 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.db import connection, connections
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from quiz.answer_keys import answer_key_cache
+from quiz.tests import correct_answers, make_image, make_quiz
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.authentication import user_cache
+from users.blacklist import BloomFilter, blacklist_filter, schedule_prune_tokens
+from users.models import UserStats
+from jobs.models import Job, JobStatus
+from jobs.queue import claim, run_job
+from pickmequiz.db_routers import WRITE_COOKIE
 
 User = get_user_model()
 
 class AuthTests(APITestCase):
     def setUp(self):
+        cache.clear()
 
         self.register_url = reverse("users:register")
         self.login_url = reverse("users:login")
@@ -40,4 +65,303 @@ class AuthTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
 
-        self.assertIn('refresh', response.cookies)
\ No newline at end of file
+        self.assertIn('refresh', response.cookies)
+
+    @override_settings(AUTH_THROTTLE_RATES={"login_ip": "2/min", "login_username": "2/min"})
+    def test_login_is_throttled_before_hashing(self):
+        User.objects.create_user(**self.user_data)
+        attempt = {"username": "TestUser", "password": "wrong"}
+
+        for address in ("10.0.0.1", "10.0.0.2"):
+            response = self.client.post(self.login_url, attempt, REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # The account is locked from every address, whatever the letter case.
+        with mock.patch("users.views.authenticate") as authenticate:
+            response = self.client.post(
+                self.login_url, {**attempt, "username": "testuser"}, REMOTE_ADDR="10.0.0.3"
+            )
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn("Retry-After", response)
+            authenticate.assert_not_called()
+
+        # Other accounts are limited per address.
+        for username, expected in [("other1", 401), ("other2", 401), ("other3", 429)]:
+            response = self.client.post(
+                self.login_url, {"username": username, "password": "wrong"}, REMOTE_ADDR="10.0.0.4"
+            )
+            self.assertEqual(response.status_code, expected)
+
+    @override_settings(AUTH_THROTTLE_RATES={"login_ip": "2/min", "login_username": "10/min"})
+    def test_spoofed_forwarded_for_does_not_reset_the_address_limit(self):
+        for number, expected in [(1, 401), (2, 401), (3, 429)]:
+            response = self.client.post(
+                self.login_url,
+                {"username": f"user{number}", "password": "wrong"},
+                REMOTE_ADDR="10.0.0.5",
+                HTTP_X_FORWARDED_FOR=f"203.0.113.{number}",
+            )
+            self.assertEqual(response.status_code, expected)
+
+    @override_settings(AUTH_THROTTLE_RATES={"register_ip": "1/hour"})
+    def test_registration_is_throttled_per_address(self):
+        self.assertEqual(self.client.post(self.register_url, self.user_data).status_code, status.HTTP_201_CREATED)
+        response = self.client.post(self.register_url, {**self.user_data, "username": "another"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(User.objects.count(), 1)
+
+
+class UserProfileTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.url = reverse("users:profile")
+        self.creator = User.objects.create_user(username="creator", password="pass")
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def submit(self, quiz):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("quiz:quiz-submit", kwargs={"pk": quiz.pk}),
+                {"answers": correct_answers(quiz)},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def profile_queries(self, user):
+        self.authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+
+    def test_authenticated_user_is_cached_until_saved(self):
+        user = User.objects.create_user(username="player", password="pass")
+        user_cache.reset_stats()
+        _, cold = self.profile_queries(user)
+        _, warm = self.profile_queries(user)
+        self.assertEqual(warm, cold - 1)
+
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(user_cache.stats(), {"hits": 1, "misses": 2, "hit_rate": 1 / 3})
+
+    def test_passed_count_counts_distinct_quizzes(self):
+        user = User.objects.create_user(username="player", password="pass")
+        quizzes = [make_quiz(self.creator) for i in range(2)]
+        self.authenticate(user)
+        self.submit(quizzes[0])
+        self.submit(quizzes[0])
+        self.submit(quizzes[1])
+
+        response, _ = self.profile_queries(user)
+        self.assertEqual(response.data["passed_tests_count"], 2)
+
+        UserStats.objects.filter(pk=user.pk).update(passed_quiz_count=0)
+        call_command("rebuild_user_stats", user.pk, stdout=open("/dev/null", "w"))
+        self.assertEqual(UserStats.objects.get(pk=user.pk).passed_quiz_count, 2)
+
+    def test_deleting_a_quiz_uncounts_it(self):
+        user = User.objects.create_user(username="player", password="pass")
+        kept, deleted = make_quiz(self.creator), make_quiz(self.creator)
+        self.authenticate(user)
+        self.submit(kept)
+        self.submit(deleted)
+        self.submit(deleted)
+
+        deleted.delete()
+
+        response, _ = self.profile_queries(user)
+        self.assertEqual(response.data["passed_tests_count"], 1)
+
+    def test_profile_queries_do_not_grow_with_history(self):
+        newcomer = User.objects.create_user(username="newcomer", password="pass")
+        self.profile_queries(newcomer)
+        _, baseline = self.profile_queries(newcomer)
+
+        veteran = User.objects.create_user(username="veteran", password="pass")
+        quizzes = [make_quiz(self.creator) for i in range(5)]
+        veteran.favourite_tests.set(quizzes)
+        self.authenticate(veteran)
+        for quiz in quizzes:
+            self.submit(quiz)
+
+        response, queries = self.profile_queries(veteran)
+        self.assertEqual(response.data["passed_tests_count"], 5)
+        self.assertEqual(len(response.data["favourite_tests"]), 5)
+        self.assertEqual(queries, baseline)
+
+    def test_avatar_variants_in_profile(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        user = User.objects.create_user(username="player", password="pass")
+        with override_settings(MEDIA_ROOT=media_root, JOBS_EAGER=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                user.avatar = make_image()
+                user.save()
+            response, _ = self.profile_queries(user)
+
+        self.assertEqual(set(response.data["avatar_variants"]), {"thumbnail", "medium"})
+        self.assertTrue(response.data["avatar_variants"]["thumbnail"]["webp"].startswith("http://testserver/media/"))
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"member-{i}")
+        self.assertTrue(all(f"member-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenBlacklistTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.clear()
+        self.user = User.objects.create_user(username="player", password="pass")
+        self.refresh_url = reverse("users:token_refresh")
+        self.logout_url = reverse("users:logout")
+
+    def refresh_queries(self, token):
+        self.client.cookies["refresh"] = str(token)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.refresh_url)
+        return response, len(ctx.captured_queries)
+
+    def test_refresh_skips_blacklist_lookup_until_token_is_blacklisted(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh_queries(token)
+        response, filtered = self.refresh_queries(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with override_settings(AUTH_BLACKLIST_FILTER=False):
+            _, unfiltered = self.refresh_queries(token)
+        self.assertEqual(filtered, unfiltered - 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(self.logout_url).status_code, status.HTTP_200_OK)
+        response, _ = self.refresh_queries(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Both refreshes and the logout skipped the lookup.
+        self.assertEqual(blacklist_filter.stats()["skipped"], 3)
+
+    def test_filter_is_rebuilt_when_another_process_blacklists(self):
+        token = RefreshToken.for_user(self.user)
+        self.refresh_queries(token)
+        # A blacklisting seen only through the shared generation counter.
+        blacklist_filter._filter = BloomFilter(10)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token["jti"]))
+        blacklist_filter.bump_generation()
+        response, _ = self.refresh_queries(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_prune_tokens_deletes_expired_rows_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        tokens = [
+            OutstandingToken.objects.create(user=self.user, jti=f"expired-{i}", token="x", expires_at=past)
+            for i in range(5)
+        ]
+        BlacklistedToken.objects.create(token=tokens[0])
+        live = RefreshToken.for_user(self.user)
+
+        out = StringIO()
+        call_command("prune_tokens", batch_size=2, stdout=out)
+        self.assertIn("Pruned 5 expired tokens.", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        call_command("prune_tokens", schedule=True, stdout=out)
+        call_command("prune_tokens", schedule=True, stdout=out)
+        self.assertEqual(Job.objects.filter(name="users.blacklist.prune_tokens").count(), 1)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_scheduled_prune_runs_once_and_reschedules_itself(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("prune_tokens", schedule=True, stdout=StringIO())
+        [job] = Job.objects.filter(name="users.blacklist.prune_tokens")
+        self.assertEqual(job.status, JobStatus.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+
+        Job.objects.update(run_at=timezone.now())
+        [job] = claim("worker")
+        self.assertIsNone(schedule_prune_tokens())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(run_job(job))
+        [next_run] = Job.objects.filter(name="users.blacklist.prune_tokens")
+        self.assertNotEqual(next_run.pk, job.pk)
+        self.assertEqual(next_run.status, JobStatus.QUEUED)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_READ_YOUR_WRITES=10)
+class ReplicaRoutingTests(APITestCase):
+    """A second SQLite file, copied from the test database, stands in for a replica."""
+
+    # Resolved in setUpClass, once the replica alias exists.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        # Deferred transactions: the test case's transaction on the replica must not
+        # hold its write lock while setUpTestData fills it.
+        connections.settings["replica"] = {**connection.settings_dict, "NAME": cls.replica_path, "OPTIONS": {}}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        os.unlink(cls.replica_path)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="player", password="pass")
+        cls.quiz = make_quiz(cls.user)
+        # A dump through the test connection also copies its uncommitted rows. The
+        # full-text search table is left out: SQLite cannot restore virtual tables from it.
+        dump = [statement for statement in connection.connection.iterdump() if "quiz_search" not in statement]
+        replica = sqlite3.connect(cls.replica_path)
+        replica.executescript("\n".join(dump))
+        replica.close()
+
+    def setUp(self):
+        cache.clear()
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def favourites(self, client):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = client.get(reverse("users:profile"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [quiz["id"] for quiz in response.data["favourite_tests"]], bool(replica_queries)
+
+    def test_reads_use_the_replica_except_after_the_clients_own_writes(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(self.favourites(self.client), ([], True))
+
+        # The write goes to the primary only, which the replica copy never sees.
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.post(reverse("quiz:quiz-favourite", kwargs={"pk": self.quiz.pk}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(replica_queries)
+        self.assertEqual(response.cookies[WRITE_COOKIE]["max-age"], 10)
+
+        # The writer reads its write, by cookie or by the cache marker of its user.
+        self.assertEqual(self.favourites(self.client), ([self.quiz.pk], False))
+        other_client = self.client_class()
+        other_client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(self.favourites(other_client), ([self.quiz.pk], False))
+
+        cache.clear()
+        self.assertEqual(self.favourites(other_client), ([], True))
+
+    def test_admin_is_served_from_the_primary(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            self.client.get("/admin/login/")
+        self.assertFalse(replica_queries)
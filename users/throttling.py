@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthRateThrottle(SimpleRateThrottle):
+    """
+    Sliding-window throttle for the authentication endpoints. DRF checks
+    throttles before the handler runs, so a blocked request is rejected
+    with 429 before any password is hashed.
+
+    Rates come from ``AUTH_THROTTLE_RATES`` by scope, ``None`` disabling
+    one, and request timestamps are kept in the ``AUTH_THROTTLE_CACHE``
+    alias: local memory counts per process, a shared cache per site.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.AUTH_THROTTLE_CACHE]
+        super().__init__()
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+
+class IPRateThrottle(AuthRateThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class UsernameRateThrottle(AuthRateThrottle):
+    """Counts attempts on one account from every address, against distributed credential stuffing."""
+
+    def get_cache_key(self, request, view):
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Hashed so any username makes a valid cache key of bounded length.
+        ident = hashlib.sha256(username.casefold().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPRateThrottle(IPRateThrottle):
+    scope = "login_ip"
+
+
+class LoginUsernameRateThrottle(UsernameRateThrottle):
+    scope = "login_username"
+
+
+class RegisterIPRateThrottle(IPRateThrottle):
+    scope = "register_ip"
+
+
+class TokenRefreshIPRateThrottle(IPRateThrottle):
+    scope = "refresh_ip"
@@ -1,4 +1,5 @@
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, get_user_model
+from django.db.models import Prefetch
 from drf_spectacular.utils import OpenApiTypes, extend_schema, inline_serializer
 from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
@@ -9,11 +10,22 @@ from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from quiz.models import Quiz
+from users.blacklist import FilteredRefreshToken, FilteredTokenRefreshSerializer
 from users.serializers import RegisterSerializer, UserSerializer
+from users.throttling import (
+    LoginIPRateThrottle,
+    LoginUsernameRateThrottle,
+    RegisterIPRateThrottle,
+    TokenRefreshIPRateThrottle,
+)
+
+User = get_user_model()
 
 
 class LoginAPIView(APIView):
     authentication_classes = []
+    throttle_classes = (LoginIPRateThrottle, LoginUsernameRateThrottle)
 
     @extend_schema(
         summary="User Login",
@@ -34,6 +46,7 @@ class LoginAPIView(APIView):
                 },
             ),
             401: OpenApiTypes.OBJECT,
+            429: OpenApiTypes.OBJECT,
         },
     )
     def post(self, request: Request) -> Response:
@@ -72,6 +85,7 @@ class LoginAPIView(APIView):
 
 
 class RegistrationAPIView(APIView):
+    throttle_classes = (RegisterIPRateThrottle,)
 
     @extend_schema(
         summary="User Registration",
@@ -86,6 +100,7 @@ class RegistrationAPIView(APIView):
                 },
             ),
             400: OpenApiTypes.OBJECT,
+            429: OpenApiTypes.OBJECT,
         },
     )
     def post(self, request: Request) -> Response:
@@ -138,7 +153,7 @@ class LogoutAPIView(APIView):
             )
 
         try:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         except TokenError:
             return Response(
@@ -154,6 +169,16 @@ class LogoutAPIView(APIView):
 class UserProfileAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
+    def get_object(self, request: Request):
+        # Stats and favourites in two queries, however long the history is.
+        return (
+            User.objects.select_related("stats")
+            .prefetch_related(
+                Prefetch("favourite_tests", queryset=Quiz.objects.only("id", "title", "description"))
+            )
+            .get(pk=request.user.pk)
+        )
+
     @extend_schema(
         summary="Get User Profile",
         description="Retrieve the profile of the authenticated user",
@@ -161,7 +186,7 @@ class UserProfileAPIView(APIView):
         responses={200: UserSerializer},
     )
     def get(self, request: Request) -> Response:
-        serializer = UserSerializer(request.user, context={"request": request})
+        serializer = UserSerializer(self.get_object(request), context={"request": request})
         return Response(serializer.data)
 
     @extend_schema(
@@ -173,7 +198,7 @@ class UserProfileAPIView(APIView):
     )
     def put(self, request: Request) -> Response:
         serializer = UserSerializer(
-            request.user, data=request.data, partial=True, context={"request": request}
+            self.get_object(request), data=request.data, partial=True, context={"request": request}
         )
         if serializer.is_valid():
             serializer.save()
@@ -186,6 +211,9 @@ class CustomTokenRefreshView(TokenRefreshView):
     Custom Token Refresh View that reads the refresh token from HttpOnly cookie.
     """
 
+    serializer_class = FilteredTokenRefreshSerializer
+    throttle_classes = (TokenRefreshIPRateThrottle,)
+
     @extend_schema(
         summary="Refresh Access Token",
         description="Refresh access token using refresh token from HttpOnly cookie",
@@ -199,6 +227,7 @@ class CustomTokenRefreshView(TokenRefreshView):
                 },
             ),
             401: OpenApiTypes.OBJECT,
+            429: OpenApiTypes.OBJECT,
         },
     )
     def post(self, request: Request, *args, **kwargs) -> Response: